@@ -1,5 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
+from app.services.background import LocalJobQueue
+from app.services.registry import ServiceRegistry
 
 db = SQLAlchemy()
 jwt = JWTManager()
+job_queue = LocalJobQueue()
+services = ServiceRegistry()
@@ -1,43 +1,64 @@
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 from config import config
-from app import db, jwt
+from app import db, jwt, job_queue, services
+from app.utils.metrics import collect_metrics, metrics_access_allowed, register_metrics
+from app.utils.db_pool import engine_options, pool_stats
 
 def create_app(config_name='development'):
     """Factory para crear la aplicacion Flask"""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    # Pool de la BD segun el perfil de despliegue (tamaño, pre-ping, recycle, PgBouncer)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
     
     # Inicializar extensiones
     db.init_app(app)
     jwt.init_app(app)
+    job_queue.init_app(app)
+    services.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
+    register_metrics('job_queue', job_queue.stats)
+    register_metrics('services', services.stats)
+    register_metrics('db_pool', lambda: pool_stats.snapshot(db.engine.pool))
+    
+    # Servicios compartidos: se construyen una vez por proceso al primer uso
+    _register_services()
     
     # Registrar blueprints - versión simplificada con IA
     from app.routes.auth import auth_bp
     from app.routes.tasks import tasks_bp
     from app.routes.routines import routines_bp
     from app.routes.medications import medications_bp
+    from app.routes.reports import reports_bp
     # Rutas antiguas comentadas - ahora todo está integrado con IA
     # from app.routes.ai import ai_bp
     # from app.routes.sync import sync_bp
     # from app.routes.calendar import calendar_bp
-    # from app.routes.reports import reports_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(tasks_bp)
     app.register_blueprint(routines_bp)
     app.register_blueprint(medications_bp)
+    app.register_blueprint(reports_bp)
     # app.register_blueprint(ai_bp)
     # app.register_blueprint(sync_bp)
     # app.register_blueprint(calendar_bp)
-    # app.register_blueprint(reports_bp)
     
     # Ruta de salud
     @app.route('/health')
     def health():
         return {'status': 'ok', 'message': 'SynapTech API is running'}, 200
     
+    # Metricas del worker (cache de IA, cola de trabajos, ...): solo con token o desde el host
+    @app.route('/metrics')
+    def metrics():
+        if not metrics_access_allowed(request, app.config['METRICS_TOKEN']):
+            return {'error': 'No autorizado'}, 401
+        return collect_metrics(), 200
+    
     # Ruta raiz
     @app.route('/')
     def index():
@@ -69,3 +90,16 @@ def create_app(config_name='development'):
         return {'error': 'Error interno del servidor'}, 500
     
     return app
+
+
+def _register_services():
+    """Servicios disponibles para blueprints y trabajos via services.get(nombre)"""
+    from app.services.gemini_service import GeminiService
+    from app.services.speech_service import SpeechService
+    from app.services.routine_service import RoutineService
+    from app.services.report_service import ReportService
+    
+    services.register('gemini', GeminiService)
+    services.register('speech', SpeechService)
+    services.register('routines', lambda: RoutineService(services.get('gemini')))
+    services.register('report', ReportService)
@@ -1,7 +1,11 @@
 from app.models.user import User, UserPermission
 from app.models.task import Task
 from app.models.medication import Medication
-from app.models.sync import DeviceSync, ReminderLog, ProductivityMetric
+from app.models.sync import DeviceSync, ReminderLog, ProductivityMetric, ProductivityRollup
+from app.models.ai_cache import AIResponseCache
+from app.models.routine import RoutineSuggestion, RoutineState
+from app.models.collection_version import CollectionVersion
+from app.models.job_checkpoint import JobCheckpoint
 
 __all__ = [
     'User',
@@ -10,5 +14,11 @@ __all__ = [
     'Medication',
     'DeviceSync',
     'ReminderLog',
-    'ProductivityMetric'
+    'ProductivityMetric',
+    'ProductivityRollup',
+    'AIResponseCache',
+    'RoutineSuggestion',
+    'RoutineState',
+    'CollectionVersion',
+    'JobCheckpoint'
 ]
@@ -0,0 +1,12 @@
+"""Cache compartida de respuestas de IA (visible para todos los workers)"""
+from datetime import datetime
+from app import db
+
+class AIResponseCache(db.Model):
+    """Respuesta de Gemini indexada por el hash de su entrada"""
+    __tablename__ = 'ai_response_cache'
+    
+    key = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    value = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,10 @@
+"""Version por usuario de cada coleccion (tareas, medicamentos, ...) para ETags"""
+from app import db
+
+class CollectionVersion(db.Model):
+    """Contador que se incrementa en cada escritura de la coleccion del usuario"""
+    __tablename__ = 'collection_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    collection = db.Column(db.String(50), primary_key=True)  # tasks, medications, routines
+    version = db.Column(db.Integer, nullable=False, default=0)
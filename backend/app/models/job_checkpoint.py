@@ -0,0 +1,28 @@
+"""Checkpoints de jobs por lotes (reanudables e idempotentes)"""
+from datetime import datetime
+from app import db
+
+class JobCheckpoint(db.Model):
+    """Progreso de una ejecucion de un job: hasta que id se proceso"""
+    __tablename__ = 'job_checkpoints'
+    
+    job_name = db.Column(db.String(100), primary_key=True)
+    run_date = db.Column(db.Date, primary_key=True)  # Dia para el que corre el job
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # Ultimo id procesado
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    created = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convierte el checkpoint a diccionario"""
+        return {
+            'job_name': self.job_name,
+            'run_date': self.run_date.isoformat() if self.run_date else None,
+            'last_id': self.last_id,
+            'processed': self.processed,
+            'created': self.created,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -20,6 +20,11 @@ class Medication(db.Model):
     # Relación
     user = db.relationship('User', back_populates='medications')
     
+    __table_args__ = (
+        # GET /api/medications: WHERE user_id [AND is_active] ORDER BY created_at DESC
+        db.Index('ix_medications_user_active_created', user_id, is_active, created_at.desc()),
+    )
+    
     def to_dict(self):
         """Convierte el medicamento a diccionario"""
         return {
@@ -0,0 +1,31 @@
+"""Sugerencias de rutina persistidas por tarea"""
+from datetime import datetime
+from app import db
+
+class RoutineSuggestion(db.Model):
+    """Sugerencia generada por IA para una tarea, valida mientras no cambie su huella"""
+    __tablename__ = 'routine_suggestions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False, unique=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # Hash de los campos de la tarea
+    cuerpo = db.Column(db.Text, nullable=False)
+    generation = db.Column(db.Integer, nullable=False)  # Version del usuario que la genero
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convierte la sugerencia al formato de /api/routines"""
+        return {
+            'id_tarea': self.task_id,
+            'cuerpo': self.cuerpo
+        }
+
+class RoutineState(db.Model):
+    """Version de generacion de rutinas por usuario (una fila por usuario)"""
+    __tablename__ = 'routine_states'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    generated_at = db.Column(db.DateTime)
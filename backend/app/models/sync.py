@@ -17,6 +17,11 @@ class DeviceSync(db.Model):
     # Relaciones
     user = db.relationship('User', back_populates='device_syncs')
     
+    __table_args__ = (
+        # Ultima sincronizacion del usuario
+        db.Index('ix_device_syncs_user_created', user_id, created_at.desc()),
+    )
+    
     def to_dict(self):
         """Convierte el registro a diccionario"""
         return {
@@ -41,6 +46,16 @@ class ReminderLog(db.Model):
     was_acknowledged = db.Column(db.Boolean, default=False)
     acknowledged_at = db.Column(db.DateTime)
     
+    __table_args__ = (
+        # Recordatorios reconocidos por usuario y fecha (metricas diarias)
+        db.Index(
+            'ix_reminder_logs_user_acknowledged_at', user_id, acknowledged_at,
+            postgresql_where=(was_acknowledged == True),
+            sqlite_where=(was_acknowledged == True)
+        ),
+        db.Index('ix_reminder_logs_task_id', task_id),
+    )
+    
     def to_dict(self):
         """Convierte el log a diccionario"""
         return {
@@ -67,6 +82,11 @@ class ProductivityMetric(db.Model):
     total_focus_time = db.Column(db.Integer, default=0)  # en minutos
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Una fila por usuario y dia; sirve tambien para los rangos de fechas
+        db.UniqueConstraint('user_id', 'date', name='uq_productivity_metrics_user_date'),
+    )
+    
     def to_dict(self):
         """Convierte la metrica a diccionario"""
         return {
@@ -79,3 +99,29 @@ class ProductivityMetric(db.Model):
             'reminders_acknowledged': self.reminders_acknowledged,
             'total_focus_time': self.total_focus_time
         }
+
+class ProductivityRollup(db.Model):
+    """Suma semanal o mensual de las metricas diarias (se mantiene al escribir)"""
+    __tablename__ = 'productivity_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)  # week, month
+    period_start = db.Column(db.Date, primary_key=True)  # lunes o dia 1
+    tasks_completed = db.Column(db.Integer, nullable=False, default=0)
+    tasks_created = db.Column(db.Integer, nullable=False, default=0)
+    routines_followed = db.Column(db.Integer, nullable=False, default=0)
+    reminders_acknowledged = db.Column(db.Integer, nullable=False, default=0)
+    total_focus_time = db.Column(db.Integer, nullable=False, default=0)  # en minutos
+    
+    def to_dict(self):
+        """Convierte el acumulado a diccionario (mismas claves que ProductivityMetric)"""
+        return {
+            'user_id': self.user_id,
+            'period': self.period,
+            'date': self.period_start.isoformat() if self.period_start else None,
+            'tasks_completed': self.tasks_completed,
+            'tasks_created': self.tasks_created,
+            'routines_followed': self.routines_followed,
+            'reminders_acknowledged': self.reminders_acknowledged,
+            'total_focus_time': self.total_focus_time
+        }
@@ -11,13 +11,55 @@ class Task(db.Model):
     body = db.Column(db.Text)  # Descripción/cuerpo de la tarea
     priority = db.Column(db.String(20), default='medium')  # low, medium, high, urgent
     due_date = db.Column(db.DateTime)
-    status = db.Column(db.String(20), default='pending')  # pending, completed
+    status = db.Column(db.String(20), default='pending')  # processing, pending, completed, failed
+    processing_error = db.Column(db.Text)  # Error del procesamiento asincrono con IA
     completed_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Dosis de medicamento: la tarea se identifica por (medication_id, scheduled_at)
+    medication_id = db.Column(db.Integer, db.ForeignKey('medications.id', ondelete='SET NULL'))
+    scheduled_at = db.Column(db.DateTime)
+    
     # Relaciones
     user = db.relationship('User', back_populates='tasks')
     
+    __table_args__ = (
+        # Listado paginado de GET /api/tasks: WHERE user_id [AND status]
+        # ORDER BY created_at DESC, id DESC (la clave completa del cursor keyset)
+        db.Index('ix_tasks_user_created', user_id, created_at.desc(), id.desc()),
+        db.Index('ix_tasks_user_status_created', user_id, status, created_at.desc(), id.desc()),
+        # Pendientes por usuario y vencimiento (rutinas, tareas de hoy, dosis)
+        db.Index(
+            'ix_tasks_pending_user_due', user_id, due_date,
+            postgresql_where=(status == 'pending'),
+            sqlite_where=(status == 'pending')
+        ),
+        # Completadas por usuario y fecha (metricas y dashboard)
+        db.Index(
+            'ix_tasks_completed_user_completed_at', user_id, completed_at,
+            postgresql_where=(status == 'completed'),
+            sqlite_where=(status == 'completed')
+        ),
+        # Una sola tarea por toma: permite materializar dosis con ON CONFLICT DO NOTHING
+        db.UniqueConstraint('medication_id', 'scheduled_at', name='uq_tasks_medication_scheduled'),
+    )
+    
+    # Campos que se pueden pedir con ?fields= (mismas claves que to_dict)
+    SERIALIZABLE_FIELDS = [
+        'id', 'user_id', 'title', 'body', 'priority', 'due_date',
+        'status', 'processing_error', 'completed_at', 'created_at',
+        'medication_id', 'scheduled_at'
+    ]
+    
+    @staticmethod
+    def serialize_row(row, fields):
+        """Serializa una fila proyectada (solo algunas columnas) igual que to_dict"""
+        data = {}
+        for field in fields:
+            value = getattr(row, field)
+            data[field] = value.isoformat() if isinstance(value, datetime) else value
+        return data
+    
     def to_dict(self):
         """Convierte la tarea a diccionario"""
         return {
@@ -28,7 +70,10 @@ class Task(db.Model):
             'priority': self.priority,
             'due_date': self.due_date.isoformat() if self.due_date else None,
             'status': self.status,
+            'processing_error': self.processing_error,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'medication_id': self.medication_id,
+            'scheduled_at': self.scheduled_at.isoformat() if self.scheduled_at else None
         }
 
@@ -1,13 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from app import db
+from app import db, services
 from app.models.task import Task
 from app.models.sync import ReminderLog
-from app.services.gemini_service import GeminiService
 
 ai_bp = Blueprint('ai', __name__, url_prefix='/api/ai')
-gemini_service = GeminiService()
 
 @ai_bp.route('/transcribe-task', methods=['POST'])
 @jwt_required()
@@ -23,7 +21,7 @@ def transcribe_task():
             return jsonify({'error': 'Texto de voz requerido'}), 400
         
         # Usar Gemini para extraer informacion
-        task_data = gemini_service.transcribe_voice_to_task(voice_text)
+        task_data = services.get('gemini').transcribe_voice_to_task(voice_text)
         
         # Crear tarea
         task = Task(
@@ -76,7 +74,7 @@ def prioritize_tasks():
         }
         
         # Usar IA para priorizar
-        prioritization = gemini_service.prioritize_tasks(tasks_data, user_patterns)
+        prioritization = services.get('gemini').prioritize_tasks(tasks_data, user_patterns)
         
         return jsonify({
             'prioritization': prioritization
@@ -100,7 +98,7 @@ def suggest_routines():
         tasks_data = [task.to_dict() for task in tasks]
         
         # Generar sugerencias
-        suggestions = gemini_service.generate_routine_suggestions(tasks_data, time_of_day)
+        suggestions = services.get('gemini').generate_routine_suggestions(tasks_data, time_of_day)
         
         return jsonify({
             'suggestions': suggestions
@@ -121,7 +119,7 @@ def generate_reminder(task_id):
             return jsonify({'error': 'Tarea no encontrada'}), 404
         
         # Generar mensaje
-        message = gemini_service.generate_reminder_message(task.to_dict())
+        message = services.get('gemini').generate_reminder_message(task.to_dict())
         
         # Registrar recordatorio
         reminder_log = ReminderLog(
@@ -157,7 +155,7 @@ def chat_with_ai():
         if not message:
             return jsonify({'error': 'Mensaje requerido'}), 400
         
-        if not gemini_service.model:
+        if not services.get('gemini').provider:
             return jsonify({'error': 'Servicio de IA no disponible'}), 503
         
         # Contexto para el chat
@@ -175,10 +173,10 @@ def chat_with_ai():
         Asistente:
         """
         
-        response = gemini_service.model.generate_content(prompt)
+        response_text = services.get('gemini').provider.generate(prompt)
         
         return jsonify({
-            'response': response.text.strip()
+            'response': response_text.strip()
         }), 200
         
     except Exception as e:
@@ -1,20 +1,28 @@
 """Rutas para gestión de medicamentos"""
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
+from datetime import datetime
 from app import db
 from app.models.medication import Medication
-from app.models.task import Task
+from app.services.dose_scheduler import materialize_doses, clear_future_doses
+from app.services.collection_versions import (
+    bump_version, collection_etag, request_variant, not_modified_response, set_etag
+)
 
 medications_bp = Blueprint("medications", __name__, url_prefix="/api/medications")
 
 @medications_bp.route("", methods=["GET"])
 @jwt_required()
 def get_medications():
-    """Obtener todos los medicamentos del usuario"""
+    """Obtener todos los medicamentos del usuario (con ETag / 304)"""
     try:
         current_user_id = int(get_jwt_identity())
         
+        etag = collection_etag(current_user_id, ['medications'], request_variant())
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
         # Obtener parámetro de query para filtrar por activos
         active_only = request.args.get('active_only', 'true').lower() == 'true'
         
@@ -26,10 +34,10 @@ def get_medications():
         
         medications = query.order_by(Medication.created_at.desc()).all()
         
-        return jsonify({
+        return set_etag(jsonify({
             "medications": [med.to_dict() for med in medications],
             "total": len(medications)
-        }), 200
+        }), etag), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener medicamentos: {str(e)}"}), 500
@@ -85,10 +93,12 @@ def create_medication():
         )
         
         db.session.add(medication)
-        db.session.commit()
+        db.session.flush()
         
-        # Crear tareas para cada horario de hoy
-        _create_medication_tasks(medication)
+        # Crear tareas para cada horario dentro del horizonte (en la misma transaccion)
+        materialize_doses([medication])
+        bump_version(current_user_id, "medications")
+        db.session.commit()
         
         return jsonify({
             "message": "Medicamento creado exitosamente",
@@ -107,6 +117,11 @@ def get_medication(medication_id):
     try:
         current_user_id = int(get_jwt_identity())
         
+        etag = collection_etag(current_user_id, ['medications'], medication_id)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
         medication = Medication.query.filter_by(
             id=medication_id,
             user_id=current_user_id
@@ -115,7 +130,7 @@ def get_medication(medication_id):
         if not medication:
             return jsonify({"error": "Medicamento no encontrado"}), 404
         
-        return jsonify(medication.to_dict()), 200
+        return set_etag(jsonify(medication.to_dict()), etag), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener medicamento: {str(e)}"}), 500
@@ -186,11 +201,14 @@ def update_medication(medication_id):
             medication.is_active = bool(data["is_active"])
         
         medication.updated_at = datetime.utcnow()
-        db.session.commit()
         
-        # Si se actualizaron los horarios y está activo, crear nuevas tareas
-        if "schedules" in data and medication.is_active:
-            _create_medication_tasks(medication)
+        # Nuevos horarios o desactivado: las dosis pendientes futuras se regeneran
+        if "schedules" in data or "is_active" in data:
+            clear_future_doses(medication)
+            materialize_doses([medication])
+        
+        bump_version(current_user_id, "medications")
+        db.session.commit()
         
         return jsonify({
             "message": "Medicamento actualizado exitosamente",
@@ -217,7 +235,9 @@ def delete_medication(medication_id):
         if not medication:
             return jsonify({"error": "Medicamento no encontrado"}), 404
         
+        clear_future_doses(medication)
         db.session.delete(medication)
+        bump_version(current_user_id, "medications")
         db.session.commit()
         
         return jsonify({
@@ -228,44 +248,3 @@ def delete_medication(medication_id):
         db.session.rollback()
         return jsonify({"error": f"Error al eliminar medicamento: {str(e)}"}), 500
 
-
-def _create_medication_tasks(medication):
-    """
-    Función auxiliar para crear tareas automáticas para cada horario del medicamento
-    Solo crea tareas para hoy si aún no existen
-    """
-    try:
-        today = datetime.now().date()
-        
-        for schedule_time in medication.schedules:
-            # Parsear horario
-            hour, minute = map(int, schedule_time.split(":"))
-            
-            # Crear datetime para hoy con ese horario
-            schedule_datetime = datetime.combine(today, datetime.min.time().replace(hour=hour, minute=minute))
-            
-            # Verificar si ya existe una tarea para este medicamento y horario hoy
-            existing_task = Task.query.filter(
-                Task.user_id == medication.user_id,
-                Task.title.like(f"%{medication.name}%"),
-                Task.due_date >= datetime.combine(today, datetime.min.time()),
-                Task.due_date < datetime.combine(today + timedelta(days=1), datetime.min.time())
-            ).first()
-            
-            # Solo crear si no existe
-            if not existing_task:
-                task = Task(
-                    user_id=medication.user_id,
-                    title=f"Tomar medicamento: {medication.name}",
-                    body=f"Dosis: {medication.dosage or 'Ver instrucciones'}\n{medication.notes or ''}".strip(),
-                    priority="high",  # Medicamentos son alta prioridad
-                    due_date=schedule_datetime,
-                    status="pending"
-                )
-                db.session.add(task)
-        
-        db.session.commit()
-        
-    except Exception as e:
-        print(f"Error al crear tareas de medicamento: {str(e)}")
-        db.session.rollback()
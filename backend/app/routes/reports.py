@@ -1,23 +1,24 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta, date
-from app import db
-from app.models.user import User
-from app.models.task import Task, Routine
-from app.models.sync import ProductivityMetric, ReminderLog
-from app.services.report_service import ReportService
-from app.services.gemini_service import GeminiService
+from datetime import datetime, timedelta
+from app import services
+from app.models.sync import ProductivityMetric
+from app.services import pdf_reports
+from app.services.dashboard_service import get_dashboard
+from app.services.productivity_metrics import METRIC_FIELDS, metric_totals, metric_series
+from app.services.productivity_analytics import accessible_user_ids, cohort_analytics
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
-report_service = ReportService()
-gemini_service = GeminiService()
+
+# Clave de la serie en GET /metrics segun ?granularity=
+SERIES_KEYS = {'day': 'daily_metrics', 'week': 'weekly_metrics', 'month': 'monthly_metrics'}
 
 @reports_bp.route('/metrics', methods=['GET'])
 @jwt_required()
 def get_metrics():
     """Obtener metricas de productividad"""
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         
         # Parametros de fecha
         start_date = request.args.get('start_date')
@@ -33,30 +34,22 @@ def get_metrics():
         else:
             end_date = datetime.fromisoformat(end_date).date()
         
-        # Obtener metricas del periodo
-        metrics = ProductivityMetric.query.filter(
-            ProductivityMetric.user_id == user_id,
-            ProductivityMetric.date >= start_date,
-            ProductivityMetric.date <= end_date
-        ).all()
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in SERIES_KEYS:
+            return jsonify({'error': "granularity debe ser 'day', 'week' o 'month'"}), 400
         
-        # Calcular totales
-        total_metrics = {
-            'tasks_completed': sum(m.tasks_completed for m in metrics),
-            'tasks_created': sum(m.tasks_created for m in metrics),
-            'routines_followed': sum(m.routines_followed for m in metrics),
-            'reminders_acknowledged': sum(m.reminders_acknowledged for m in metrics),
-            'total_focus_time': sum(m.total_focus_time for m in metrics),
-            'period_days': len(metrics)
-        }
+        # Totales desde los acumulados mensuales/semanales y los dias sueltos
+        total_metrics = metric_totals(user_id, start_date, end_date)
+        series = metric_series(user_id, start_date, end_date, granularity)
+        total_metrics['period_days'] = len(series) if granularity == 'day' else (end_date - start_date).days + 1
         
         # Calcular score de productividad
-        productivity_score = report_service.calculate_productivity_score(total_metrics)
+        productivity_score = services.get('report').calculate_productivity_score(total_metrics)
         
         return jsonify({
             'metrics': total_metrics,
             'productivity_score': productivity_score,
-            'daily_metrics': [m.to_dict() for m in metrics]
+            SERIES_KEYS[granularity]: series
         }), 200
         
     except Exception as e:
@@ -65,129 +58,118 @@ def get_metrics():
 @reports_bp.route('/update-metrics', methods=['POST'])
 @jwt_required()
 def update_daily_metrics():
-    """Actualizar metricas diarias"""
+    """
+    Metricas del dia
+    
+    Los contadores se actualizan al crear/completar tareas y reconocer
+    recordatorios; este endpoint ya no recalcula nada, solo devuelve la fila
+    de hoy (se conserva por compatibilidad con los clientes que lo llaman).
+    """
     try:
-        user_id = get_jwt_identity()
-        today = date.today()
-        
-        # Buscar o crear metrica del dia
-        metric = ProductivityMetric.query.filter_by(
-            user_id=user_id,
-            date=today
-        ).first()
-        
-        if not metric:
-            metric = ProductivityMetric(
-                user_id=user_id,
-                date=today
-            )
-            db.session.add(metric)
-        
-        # Calcular metricas del dia
-        tasks_completed = Task.query.filter(
-            Task.user_id == user_id,
-            Task.status == 'completed',
-            Task.completed_at >= datetime.combine(today, datetime.min.time())
-        ).count()
+        user_id = int(get_jwt_identity())
+        today = datetime.utcnow().date()
         
-        tasks_created = Task.query.filter(
-            Task.user_id == user_id,
-            Task.created_at >= datetime.combine(today, datetime.min.time())
-        ).count()
-        
-        reminders_acknowledged = ReminderLog.query.filter(
-            ReminderLog.user_id == user_id,
-            ReminderLog.was_acknowledged == True,
-            ReminderLog.acknowledged_at >= datetime.combine(today, datetime.min.time())
-        ).count()
-        
-        # Actualizar
-        metric.tasks_completed = tasks_completed
-        metric.tasks_created = tasks_created
-        metric.reminders_acknowledged = reminders_acknowledged
-        
-        db.session.commit()
+        metric = ProductivityMetric.query.filter_by(user_id=user_id, date=today).first()
+        data = metric.to_dict() if metric else {
+            'user_id': user_id, 'date': today.isoformat(), **dict.fromkeys(METRIC_FIELDS, 0)
+        }
         
         return jsonify({
-            'message': 'Metricas actualizadas',
-            'metrics': metric.to_dict()
+            'message': 'Metricas del dia (se actualizan en cada evento, no hace falta recalcular)',
+            'metrics': data
         }), 200
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': f'Error al actualizar metricas: {str(e)}'}), 500
 
 @reports_bp.route('/pdf', methods=['POST'])
 @jwt_required()
 def generate_pdf_report():
-    """Generar reporte en PDF"""
+    """
+    Solicitar reporte en PDF
+    
+    El PDF se genera en segundo plano y se cachea por (usuario, rango,
+    version de los datos). Responde 200 si ya esta listo o 202 si se encolo;
+    en ambos casos el PDF se descarga desde download_url.
+    """
     try:
-        user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Obtener datos del usuario
-        user = User.query.get(user_id)
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
         
-        # Obtener metricas
         start_date = data.get('start_date')
         if start_date:
             start_date = datetime.fromisoformat(start_date).date()
         else:
             start_date = (datetime.now() - timedelta(days=30)).date()
         
-        metrics_list = ProductivityMetric.query.filter(
-            ProductivityMetric.user_id == user_id,
-            ProductivityMetric.date >= start_date
-        ).all()
-        
-        total_metrics = {
-            'tasks_completed': sum(m.tasks_completed for m in metrics_list),
-            'tasks_created': sum(m.tasks_created for m in metrics_list),
-            'routines_followed': sum(m.routines_followed for m in metrics_list),
-            'reminders_acknowledged': sum(m.reminders_acknowledged for m in metrics_list),
-            'total_focus_time': sum(m.total_focus_time for m in metrics_list)
-        }
-        
-        # Obtener tareas recientes
-        tasks = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).limit(20).all()
-        tasks_data = [t.to_dict() for t in tasks]
+        report_id, status = pdf_reports.request_report(user_id, start_date, datetime.now().date())
+        download_url = url_for('reports.download_pdf_report', report_id=report_id)
         
-        # Obtener rutinas
-        routines = Routine.query.filter_by(user_id=user_id).all()
-        routines_data = [r.to_dict() for r in routines]
+        response = jsonify({
+            'report_id': report_id,
+            'status': status,
+            'download_url': download_url
+        })
+        if status == 'ready':
+            return response, 200
+        response.headers['Location'] = download_url
+        return response, 202
         
-        # Generar PDF
-        pdf_buffer = report_service.generate_pdf_report(
-            user,
-            total_metrics,
-            tasks_data,
-            routines_data
-        )
-        
-        if not pdf_buffer:
-            return jsonify({'error': 'Error al generar reporte'}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error al generar PDF: {str(e)}'}), 500
+
+@reports_bp.route('/pdf/<report_id>', methods=['GET'])
+@jwt_required()
+def download_pdf_report(report_id):
+    """Descargar un reporte PDF (202 mientras se genera)"""
+    try:
+        user_id = int(get_jwt_identity())
+        status, detail = pdf_reports.report_status(user_id, report_id)
+        
+        if status is None:
+            return jsonify({'error': 'Reporte no encontrado'}), 404
+        if status == 'failed':
+            return jsonify({'report_id': report_id, 'status': status, 'error': detail}), 500
+        if status == 'pending':
+            response = jsonify({'report_id': report_id, 'status': status})
+            response.headers['Retry-After'] = '1'
+            return response, 202
         
         return send_file(
-            pdf_buffer,
+            detail,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'reporte_synaptech_{datetime.now().strftime("%Y%m%d")}.pdf'
         )
         
     except Exception as e:
-        return jsonify({'error': f'Error al generar PDF: {str(e)}'}), 500
+        return jsonify({'error': f'Error al descargar PDF: {str(e)}'}), 500
 
 @reports_bp.route('/csv', methods=['POST'])
 @jwt_required()
 def generate_csv_report():
-    """Generar reporte en CSV"""
+    """
+    Exportar tareas y metricas
+    
+    ?format=xlsx (por defecto): libro con hojas Tareas y Metricas, escrito
+    por lotes a un archivo temporal. ?format=csv: solo las tareas, enviadas
+    en streaming mientras se leen de la base.
+    """
     try:
-        user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Obtener tareas
-        tasks = Task.query.filter_by(user_id=user_id).all()
-        tasks_data = [t.to_dict() for t in tasks]
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        export_format = request.args.get('format', 'xlsx')
+        if export_format not in ('xlsx', 'csv'):
+            return jsonify({'error': 'Formato no soportado (xlsx o csv)'}), 400
+        
+        filename = f'reporte_synaptech_{datetime.now().strftime("%Y%m%d")}.{export_format}'
+        
+        if export_format == 'csv':
+            return Response(
+                stream_with_context(services.get('report').stream_tasks_csv(user_id)),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
         
         # Obtener metricas
         start_date = data.get('start_date')
@@ -196,29 +178,14 @@ def generate_csv_report():
         else:
             start_date = (datetime.now() - timedelta(days=30)).date()
         
-        metrics_list = ProductivityMetric.query.filter(
-            ProductivityMetric.user_id == user_id,
-            ProductivityMetric.date >= start_date
-        ).all()
-        
-        metrics_data = {
-            'tasks_completed': sum(m.tasks_completed for m in metrics_list),
-            'tasks_created': sum(m.tasks_created for m in metrics_list),
-            'routines_followed': sum(m.routines_followed for m in metrics_list),
-            'reminders_acknowledged': sum(m.reminders_acknowledged for m in metrics_list)
-        }
-        
-        # Generar CSV
-        csv_buffer = report_service.generate_csv_report(tasks_data, metrics_data)
-        
-        if not csv_buffer:
-            return jsonify({'error': 'Error al generar reporte'}), 500
+        metrics_data = metric_totals(user_id, start_date, datetime.now().date())
+        metrics_data.pop('total_focus_time')
         
         return send_file(
-            csv_buffer,
+            services.get('report').write_tasks_xlsx(user_id, metrics_data),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
-            download_name=f'reporte_synaptech_{datetime.now().strftime("%Y%m%d")}.xlsx'
+            download_name=filename
         )
         
     except Exception as e:
@@ -229,7 +196,7 @@ def generate_csv_report():
 def get_insights():
     """Obtener insights de productividad con IA"""
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         
         # Obtener metricas del ultimo mes
         start_date = (datetime.now() - timedelta(days=30)).date()
@@ -242,7 +209,7 @@ def get_insights():
         metrics_data = [m.to_dict() for m in metrics]
         
         # Analizar con IA
-        insights = gemini_service.analyze_productivity_patterns(metrics_data)
+        insights = services.get('gemini').analyze_productivity_patterns(metrics_data)
         
         return jsonify({
             'insights': insights
@@ -254,54 +221,56 @@ def get_insights():
 @reports_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard_data():
-    """Obtener datos para dashboard"""
+    """Obtener datos para dashboard (contadores en una sola consulta + tareas de hoy)"""
     try:
-        user_id = get_jwt_identity()
-        today = date.today()
-        
-        # Tareas de hoy
-        today_tasks = Task.query.filter(
-            Task.user_id == user_id,
-            Task.due_date >= datetime.combine(today, datetime.min.time()),
-            Task.due_date < datetime.combine(today + timedelta(days=1), datetime.min.time()),
-            Task.status != 'completed'
-        ).all()
+        user_id = int(get_jwt_identity())
+        return jsonify(get_dashboard(user_id)), 200
         
-        # Tareas pendientes
-        pending_tasks = Task.query.filter_by(
-            user_id=user_id,
-            status='pending'
-        ).count()
-        
-        # Tareas completadas hoy
-        completed_today = Task.query.filter(
-            Task.user_id == user_id,
-            Task.status == 'completed',
-            Task.completed_at >= datetime.combine(today, datetime.min.time())
-        ).count()
-        
-        # Rutinas activas
-        active_routines = Routine.query.filter_by(
-            user_id=user_id,
-            is_active=True
-        ).count()
-        
-        # Metricas de la semana
-        week_start = today - timedelta(days=today.weekday())
-        week_metrics = ProductivityMetric.query.filter(
-            ProductivityMetric.user_id == user_id,
-            ProductivityMetric.date >= week_start
-        ).all()
-        
-        week_completion = sum(m.tasks_completed for m in week_metrics)
+    except Exception as e:
+        return jsonify({'error': f'Error al obtener dashboard: {str(e)}'}), 500
+
+@reports_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def get_analytics():
+    """
+    Analitica de productividad de uno o varios usuarios
+    
+    ?user_ids=1,2,3 (por defecto el propio usuario): requiere permiso activo
+    'view' o 'report' sobre cada uno. Devuelve por usuario totales, puntaje,
+    rachas, perfil por dia de la semana y tasa de completitud movil
+    (?window= dias), calculados para toda la cohorte en una pasada.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
         
-        return jsonify({
-            'today_tasks': [t.to_dict() for t in today_tasks],
-            'pending_tasks': pending_tasks,
-            'completed_today': completed_today,
-            'active_routines': active_routines,
-            'week_completion': week_completion
-        }), 200
+        user_ids = request.args.get('user_ids')
+        user_ids = sorted({int(value) for value in user_ids.split(',')}) if user_ids else [current_user_id]
+        if len(user_ids) > current_app.config['ANALYTICS_MAX_USERS']:
+            return jsonify({'error': f"Maximo {current_app.config['ANALYTICS_MAX_USERS']} usuarios por consulta"}), 400
         
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        end_date = datetime.fromisoformat(end_date).date() if end_date else datetime.now().date()
+        start_date = datetime.fromisoformat(start_date).date() if start_date else end_date - timedelta(days=29)
+        days = (end_date - start_date).days + 1
+        if days < 1 or days > current_app.config['ANALYTICS_MAX_DAYS']:
+            return jsonify({'error': f"El rango debe tener entre 1 y {current_app.config['ANALYTICS_MAX_DAYS']} dias"}), 400
+        
+        window = request.args.get('window', 7, type=int)
+        if window < 1 or window > days:
+            return jsonify({'error': 'window debe estar entre 1 y el numero de dias del rango'}), 400
+        
+        denied = set(user_ids) - accessible_user_ids(current_user_id, user_ids)
+        if denied:
+            return jsonify({
+                'error': 'Sin permiso para ver la analitica de algunos usuarios',
+                'user_ids': sorted(denied)
+            }), 403
+        
+        analytics = cohort_analytics(user_ids, start_date, end_date, window)
+        return jsonify(analytics), 200
+        
+    except ValueError as e:
+        return jsonify({'error': f'Parametros invalidos: {str(e)}'}), 400
     except Exception as e:
-        return jsonify({'error': f'Error al obtener dashboard: {str(e)}'}), 500
+        return jsonify({'error': f'Error al obtener analitica: {str(e)}'}), 500
@@ -1,27 +1,44 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.task import Task
-from app.services.gemini_service import GeminiService
+from app import db, services
+from app.models.routine import RoutineState
+from app.services.collection_versions import get_versions, etag_for, not_modified_response, set_etag
 
 routines_bp = Blueprint("routines", __name__, url_prefix="/api/routines")
-gemini_service = GeminiService()
 
 @routines_bp.route("", methods=["GET"])
 @jwt_required()
 def get_routines():
+    """
+    Rutinas para las tareas pendientes del usuario
+    
+    Solo las tareas nuevas o modificadas desde la ultima generacion se envian
+    a la IA; el resto se sirve desde routine_suggestions. El ETag depende de
+    la version de las tareas y de la generacion de rutinas: con If-None-Match
+    vigente se responde 304 sin leer tareas ni llamar al modelo.
+    """
     try:
         current_user_id = int(get_jwt_identity())  # Convertir de string a int
         
-        user_tasks = Task.query.filter_by(user_id=current_user_id, status="pending").all()
+        versions = get_versions(current_user_id, ["tasks"])
+        state = db.session.get(RoutineState, current_user_id)
+        versions["routines"] = state.version if state else 0
+        not_modified = not_modified_response(etag_for(current_user_id, versions))
+        if not_modified:
+            return not_modified
         
-        tasks_data = [task.to_dict() for task in user_tasks]
+        routine_suggestions, version, complete = services.get("routines").get_routines(current_user_id)
         
-        routine_suggestions = gemini_service.generate_routine_suggestions(tasks_data)
-        
-        return jsonify({
+        response = jsonify({
             "message": "Rutinas generadas exitosamente",
-            "routines": routine_suggestions
-        }), 200
+            "routines": routine_suggestions,
+            "version": version
+        })
+        # Con rutinas de fallback no hay ETag: la siguiente peticion puede mejorar el resultado
+        if complete:
+            versions["routines"] = version
+            set_etag(response, etag_for(current_user_id, versions))
+        return response, 200
         
     except Exception as e:
         return jsonify({"error": f"Error al generar rutinas: {str(e)}"}), 500
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
 from app.models.sync import DeviceSync, ReminderLog
+from app.services.productivity_metrics import record
 
 sync_bp = Blueprint('sync', __name__, url_prefix='/api/sync')
 
@@ -119,8 +120,10 @@ def acknowledge_reminder(reminder_id):
         if not reminder:
             return jsonify({'error': 'Recordatorio no encontrado'}), 404
         
-        reminder.was_acknowledged = True
-        reminder.acknowledged_at = datetime.utcnow()
+        if not reminder.was_acknowledged:
+            reminder.was_acknowledged = True
+            reminder.acknowledged_at = datetime.utcnow()
+            record(reminder.user_id, 'reminders_acknowledged', at=reminder.acknowledged_at)
         
         db.session.commit()
         
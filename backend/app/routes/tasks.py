@@ -1,52 +1,94 @@
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from app import db
+from sqlalchemy import tuple_, insert
+from app import db, job_queue, services
 from app.models.task import Task
-from app.services.gemini_service import GeminiService
-from app.services.speech_service import SpeechService
+from app.services.task_pipeline import enrich_task, combine_body_text, apply_ai_result, save_upload, task_fields
+from app.services.collection_versions import (
+    bump_version, collection_etag, request_variant, not_modified_response, set_etag
+)
+from app.services.productivity_metrics import record, record_events, completion_events
+from app.utils.pagination import encode_cursor, decode_cursor
 
 tasks_bp = Blueprint("tasks", __name__, url_prefix="/api/tasks")
-gemini_service = GeminiService()
-speech_service = SpeechService()
 
 @tasks_bp.route("", methods=["GET"])
 @jwt_required()
 def get_tasks():
     """
-    Obtener todas las tareas del usuario autenticado
+    Obtener las tareas del usuario autenticado, paginadas por cursor
     
     Query params opcionales:
     - status: filtrar por estado (pending, in_progress, completed)
-    - limit: limitar número de resultados
+    - limit: tamaño de página (por defecto TASKS_PAGE_SIZE, máximo TASKS_MAX_PAGE_SIZE)
+    - cursor: valor 'next_cursor' de la página anterior
+    - fields: columnas a devolver separadas por coma (ej: id,title,status)
+    - include_total: 'true' para incluir el total (hace un COUNT(*) extra)
+    
+    Responde con ETag; con If-None-Match vigente devuelve 304 sin consultar tareas.
     """
     try:
         current_user_id = int(get_jwt_identity())
         
+        # La version se lee antes que las filas: si hay una escritura en medio
+        # el ETag queda viejo y el siguiente GET simplemente vuelve a descargar
+        etag = collection_etag(current_user_id, ['tasks'], request_variant())
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
         # Obtener parámetros de query
         status = request.args.get('status')
-        limit = request.args.get('limit', type=int)
+        limit = request.args.get('limit', type=int) or current_app.config['TASKS_PAGE_SIZE']
+        limit = max(1, min(limit, current_app.config['TASKS_MAX_PAGE_SIZE']))
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
-        # Construir query
-        query = Task.query.filter_by(user_id=current_user_id)
+        fields = Task.SERIALIZABLE_FIELDS
+        if request.args.get('fields'):
+            fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+            invalid = [field for field in fields if field not in Task.SERIALIZABLE_FIELDS]
+            if invalid:
+                return jsonify({"error": f"Campos inválidos: {', '.join(invalid)}"}), 400
+        
+        # Solo se leen de la base las columnas pedidas (+ la clave del cursor)
+        selected = list(dict.fromkeys([*fields, 'created_at', 'id']))
+        query = db.session.query(*[getattr(Task, field) for field in selected]).filter(
+            Task.user_id == current_user_id
+        )
         
         # Filtrar por estado si se proporciona
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(Task.status == status)
+        
+        total = query.count() if include_total else None
+        
+        # Continuar después de la última fila de la página anterior
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            query = query.filter(tuple_(Task.created_at, Task.id) < (cursor_created_at, cursor_id))
         
         # Ordenar por fecha de creación (más recientes primero)
-        query = query.order_by(Task.created_at.desc())
+        rows = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
         
-        # Limitar resultados si se especifica
-        if limit:
-            query = query.limit(limit)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
         
-        tasks = query.all()
+        response = {
+            "tasks": [Task.serialize_row(row, fields) for row in rows],
+            "next_cursor": next_cursor
+        }
+        if include_total:
+            response["total"] = total
         
-        return jsonify({
-            "tasks": [task.to_dict() for task in tasks],
-            "total": len(tasks)
-        }), 200
+        return set_etag(jsonify(response), etag), 200
         
     except Exception as e:
         return jsonify({"error": f"Error al obtener tareas: {str(e)}"}), 500
@@ -61,11 +103,17 @@ def create_task():
     - JSON con campo 'cuerpo' (texto)
     - Multipart/form-data con archivo 'audio' (WAV)
     - Multipart/form-data con 'cuerpo' y/o 'audio' (combina ambos)
+    
+    Modo asincrono (ASYNC_TASK_PROCESSING o header 'Prefer: respond-async'):
+    la tarea se guarda al instante con status 'processing', se responde 202
+    y la transcripcion + IA corren en segundo plano. El estado se consulta
+    en GET /api/tasks/<id>.
     """
     try:
         current_user_id = int(get_jwt_identity())
         body_text = ""
         fecha = None
+        audio_file = None
         
         # Verificar si es multipart/form-data (con posible archivo de audio)
         if request.content_type and 'multipart/form-data' in request.content_type:
@@ -74,26 +122,8 @@ def create_task():
             fecha = request.form.get("fecha")
             audio_file = request.files.get("audio")
             
-            # Si hay audio, transcribirlo
-            if audio_file:
-                try:
-                    audio_content = audio_file.read()
-                    transcribed_text = speech_service.transcribe_audio(audio_content)
-                    
-                    # Si no hay texto en cuerpo, usar solo el audio transcrito
-                    # Si hay texto, combinarlos
-                    if transcribed_text:
-                        if body_text:
-                            body_text = f"{body_text} {transcribed_text}".strip()
-                        else:
-                            body_text = transcribed_text.strip()
-                except Exception as e:
-                    return jsonify({
-                        "error": f"Error al transcribir audio: {str(e)}"
-                    }), 400
-            
             # Si no hay audio ni texto, error
-            if not body_text:
+            if not body_text and not audio_file:
                 return jsonify({
                     "error": "Debe proporcionar 'cuerpo' (texto) o 'audio' (archivo WAV/M4A)"
                 }), 400
@@ -112,19 +142,37 @@ def create_task():
                     "error": "El campo 'cuerpo' es requerido"
                 }), 400
         
+        if _wants_async():
+            return _accept_task(current_user_id, body_text, fecha, audio_file)
+        
+        # Si hay audio, transcribirlo por ventanas directamente desde el upload
+        if audio_file:
+            try:
+                transcribed_text = services.get("speech").transcribe_stream(audio_file.stream)
+                body_text = combine_body_text(body_text, transcribed_text)
+            except Exception as e:
+                return jsonify({
+                    "error": f"Error al transcribir audio: {str(e)}"
+                }), 400
+            
+            if not body_text:
+                return jsonify({
+                    "error": "Debe proporcionar 'cuerpo' (texto) o 'audio' (archivo WAV/M4A)"
+                }), 400
+        
         # Procesar con IA
-        ai_result = gemini_service.process_task_input(body_text=body_text, fecha=fecha)
-        
-        new_task = Task(
-            user_id=current_user_id,
-            title=ai_result["title"],
-            body=ai_result["body"],
-            priority=ai_result["priority"],
-            due_date=datetime.fromisoformat(ai_result["due_date"]) if ai_result["due_date"] else None,
-            status="pending"
+        ai_result = services.get("gemini").process_task_input(
+            body_text=body_text,
+            fecha=fecha,
+            user_id=current_user_id
         )
         
+        new_task = Task(user_id=current_user_id, status="pending")
+        apply_ai_result(new_task, ai_result)
+        
         db.session.add(new_task)
+        bump_version(current_user_id, "tasks")
+        record(current_user_id, "tasks_created")
         db.session.commit()
         
         return jsonify({
@@ -139,6 +187,169 @@ def create_task():
         return jsonify({"error": f"Error al crear tarea: {str(e)}"}), 500
 
 
+@tasks_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def create_tasks_batch():
+    """
+    Crear varias tareas desde texto en una sola petición
+    
+    Body:
+    {
+        "tareas": [
+            "Comprar pan mañana",
+            {"cuerpo": "Llamar al médico", "fecha": "2025-12-10T10:00:00"}
+        ]
+    }
+    
+    Los textos se envían a la IA en prompts por lotes y todas las tareas se
+    guardan con un solo INSERT y un solo commit. La respuesta trae un
+    resultado por item, en el mismo orden ('created' o 'error').
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True)
+        
+        if not data or not isinstance(data.get("tareas"), list) or not data["tareas"]:
+            return jsonify({"error": "El campo 'tareas' debe ser una lista no vacía"}), 400
+        
+        max_items = current_app.config["TASK_BATCH_MAX_ITEMS"]
+        if len(data["tareas"]) > max_items:
+            return jsonify({"error": f"Máximo {max_items} tareas por petición"}), 400
+        
+        # Validar cada item: los invalidos se reportan sin cortar el lote
+        results = []
+        items = []
+        for index, entry in enumerate(data["tareas"]):
+            if isinstance(entry, str):
+                entry = {"cuerpo": entry}
+            cuerpo = entry.get("cuerpo") if isinstance(entry, dict) else None
+            if not isinstance(cuerpo, str) or not cuerpo.strip():
+                results.append({"index": index, "status": "error", "error": "El campo 'cuerpo' es requerido"})
+                continue
+            items.append({"index": index, "cuerpo": cuerpo.strip(), "fecha": entry.get("fecha")})
+            results.append(None)
+        
+        # Procesar con IA por lotes
+        ai_results = services.get("gemini").process_task_batch(items) if items else []
+        
+        rows = []
+        accepted = []
+        now = datetime.utcnow()
+        for item, ai_result in zip(items, ai_results):
+            try:
+                fields = task_fields(ai_result)
+            except (KeyError, TypeError, ValueError) as e:
+                results[item["index"]] = {"index": item["index"], "status": "error", "error": f"Resultado inválido: {str(e)}"}
+                continue
+            rows.append({**fields, "user_id": current_user_id, "status": "pending", "created_at": now})
+            accepted.append(item["index"])
+        
+        if rows:
+            # Un solo INSERT (executemany) con los ids en el orden de las filas
+            ids = db.session.execute(
+                insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+            bump_version(current_user_id, "tasks")
+            record(current_user_id, "tasks_created", len(ids), at=now)
+            db.session.commit()
+            
+            for index, task_id, row in zip(accepted, ids, rows):
+                results[index] = {
+                    "index": index,
+                    "status": "created",
+                    "id_tarea": task_id,
+                    "title": row["title"],
+                    "priority": row["priority"],
+                    "due_date": row["due_date"].isoformat() if row["due_date"] else None
+                }
+        
+        created = len(rows)
+        return jsonify({
+            "results": results,
+            "created": created,
+            "failed": len(results) - created
+        }), 201 if created else 400
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Error al crear tareas: {str(e)}"}), 500
+
+
+@tasks_bp.route("/<int:task_id>", methods=["GET"])
+@jwt_required()
+def get_task(task_id):
+    """Obtener una tarea (sirve para consultar el estado de una tarea en 'processing')"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        etag = collection_etag(current_user_id, ["tasks"], task_id)
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
+        task = Task.query.filter_by(id=task_id, user_id=current_user_id).first()
+        
+        if not task:
+            return jsonify({"error": "Tarea no encontrada"}), 404
+        
+        response = set_etag(jsonify(task.to_dict()), etag)
+        if task.status == "processing":
+            response.headers["Retry-After"] = "1"
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Error al obtener tarea: {str(e)}"}), 500
+
+
+def _wants_async():
+    """El cliente pide modo asincrono con 'Prefer: respond-async' o esta activo por config"""
+    if "respond-async" in request.headers.get("Prefer", ""):
+        return True
+    return current_app.config.get("ASYNC_TASK_PROCESSING", False)
+
+
+def _accept_task(user_id, body_text, fecha, audio_file):
+    """Guarda la tarea cruda en 'processing' y encola el enriquecimiento"""
+    # El audio se copia a disco: el worker lo transcribe por ventanas y lo borra
+    audio_path = save_upload(audio_file) if audio_file else None
+    
+    new_task = Task(
+        user_id=user_id,
+        title=body_text[:100] if body_text else "Nueva tarea",
+        body=body_text,
+        priority="medium",
+        status="processing"
+    )
+    
+    try:
+        db.session.add(new_task)
+        bump_version(user_id, "tasks")
+        record(user_id, "tasks_created")
+        db.session.commit()
+    except Exception:
+        if audio_path:
+            os.unlink(audio_path)
+        raise
+    
+    job_queue.submit(
+        enrich_task,
+        new_task.id,
+        body_text=body_text,
+        fecha=fecha,
+        audio_path=audio_path
+    )
+    
+    status_url = url_for("tasks.get_task", task_id=new_task.id)
+    response = jsonify({
+        "id_tarea": new_task.id,
+        "status": new_task.status,
+        "status_url": status_url
+    })
+    response.headers["Location"] = status_url
+    return response, 202
+
+
 @tasks_bp.route("/<int:task_id>", methods=["PUT"])
 @jwt_required()
 def update_task_status(task_id):
@@ -154,6 +365,7 @@ def update_task_status(task_id):
         if not task:
             return jsonify({"error": "Tarea no encontrada"}), 404
         
+        previous_completed_at = task.completed_at if task.status == "completed" else None
         task.status = data["status"]
         
         if data["status"] == "completed":
@@ -161,6 +373,8 @@ def update_task_status(task_id):
         else:
             task.completed_at = None
         
+        bump_version(current_user_id, "tasks")
+        record_events(completion_events(current_user_id, previous_completed_at, task.completed_at))
         db.session.commit()
         
         return jsonify({
@@ -0,0 +1,177 @@
+"""Cache de respuestas de IA: LRU/TTL en proceso + backend compartido opcional"""
+import hashlib
+import json
+import threading
+import unicodedata
+from datetime import datetime, timedelta, date
+from cachetools import TTLCache
+from app.utils.metrics import Counters
+
+
+def normalize_text(text):
+    """Normaliza texto para que variantes triviales compartan entrada de cache"""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.lower().split())
+
+
+def make_cache_key(*parts):
+    """Hash sha256 estable de las partes de la entrada"""
+    payload = json.dumps(parts, ensure_ascii=False, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _CountingTTLCache(TTLCache):
+    """TTLCache que cuenta desalojos por tamaño (LRU) y por expiracion (TTL)"""
+
+    def __init__(self, maxsize, ttl, counters):
+        super().__init__(maxsize, ttl)
+        self._counters = counters
+
+    def popitem(self):
+        item = super().popitem()
+        self._counters.incr('evictions')
+        return item
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        if expired:
+            self._counters.incr('expirations', len(expired))
+        return expired
+
+
+class DatabaseCacheBackend:
+    """
+    Backend compartido sobre la tabla ai_response_cache
+
+    Usa su propia conexion (no la sesion del request) para no mezclar
+    transacciones. Requiere app context.
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, ttl, counters):
+        self.ttl = ttl
+        self._counters = counters
+        self._writes = 0
+
+    def get(self, key):
+        from app import db
+        from app.models.ai_cache import AIResponseCache
+
+        table = AIResponseCache.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                table.select().where(
+                    table.c.key == key,
+                    table.c.expires_at > datetime.utcnow()
+                )
+            ).first()
+        return row.value if row else None
+
+    def set(self, key, value):
+        from app import db
+        from app.models.ai_cache import AIResponseCache
+        from app.utils.sql import dialect_insert
+
+        table = AIResponseCache.__table__
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        with db.engine.begin() as conn:
+            stmt = dialect_insert(conn, table).values(
+                key=key, value=value, expires_at=expires_at, created_at=now
+            )
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={'value': value, 'expires_at': expires_at}
+            ))
+
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                result = conn.execute(table.delete().where(table.c.expires_at <= now))
+                self._counters.incr('expirations', result.rowcount or 0)
+
+
+class ResponseCache:
+    """
+    Cache de dos niveles: memoria del worker (L1) y, opcionalmente, la base de
+    datos compartida por todos los workers (L2)
+
+    Los errores del backend compartido nunca rompen la llamada: se cuentan y
+    se sigue como si fuera un miss.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, backend='memory'):
+        self.enabled = backend != 'none' and maxsize > 0
+        self.counters = Counters(
+            'hits', 'shared_hits', 'misses', 'evictions', 'expirations', 'backend_errors'
+        )
+        self._lock = threading.Lock()
+        self._local = _CountingTTLCache(max(maxsize, 1), ttl, self.counters)
+        self._shared = DatabaseCacheBackend(ttl, self.counters) if backend == 'database' else None
+
+    @property
+    def shared(self):
+        """True si otros workers ven lo que se guarda (backend 'database')"""
+        return self.enabled and self._shared is not None
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            value = self._local.get(key)
+        if value is not None:
+            self.counters.incr('hits')
+            return value
+
+        if self._shared:
+            try:
+                value = self._shared.get(key)
+            except Exception as e:
+                print(f"Error leyendo cache compartida: {str(e)}")
+                self.counters.incr('backend_errors')
+            if value is not None:
+                self.counters.incr('shared_hits')
+                with self._lock:
+                    self._local[key] = value
+                return value
+
+        self.counters.incr('misses')
+        return None
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._local[key] = value
+
+        if self._shared:
+            try:
+                self._shared.set(key, value)
+            except Exception as e:
+                print(f"Error escribiendo cache compartida: {str(e)}")
+                self.counters.incr('backend_errors')
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        with self._lock:
+            stats['size'] = len(self._local)
+        stats['maxsize'] = self._local.maxsize
+        stats['backend'] = 'database' if self._shared else 'memory'
+        return stats
+
+
+def task_cache_key(prompt_version, body_text, fecha, today=None):
+    """
+    Clave para process_task_input
+
+    Incluye el dia actual: "mañana" resuelve a fechas distintas segun el dia,
+    asi que una respuesta de ayer nunca se reutiliza hoy.
+    """
+    today = today or date.today()
+    return make_cache_key(prompt_version, normalize_text(body_text), fecha or '', today.isoformat())
@@ -0,0 +1,244 @@
+"""Esquemas de las respuestas JSON de Gemini: validacion con pydantic y reparacion local"""
+import json
+import re
+import threading
+from datetime import datetime
+from typing import Optional, Union
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+from app.utils.metrics import register_metrics
+
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+
+
+class TaskExtraction(BaseModel):
+    """Tarea extraida por el modelo (los campos que falten se completan despues)"""
+    title: Optional[str] = None
+    priority: Optional[str] = None
+    due_date: Optional[str] = None
+    body: Optional[str] = None
+
+    @field_validator('due_date')
+    @classmethod
+    def _iso_date(cls, value):
+        # Una fecha que no se puede parsear se trata como ausente
+        if value is None:
+            return None
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return value
+
+
+class BatchTaskExtraction(TaskExtraction):
+    """Tarea de un lote: indice del input al que corresponde"""
+    indice: int
+
+
+class RoutineItem(BaseModel):
+    """Sugerencia de rutina para una tarea"""
+    id_tarea: Union[int, str]
+    cuerpo: str = Field(min_length=1)
+
+
+class ProductivityInsights(BaseModel):
+    """Analisis de las metricas de productividad del usuario"""
+    resumen: str = Field(min_length=1)
+    patrones: list[str] = []
+    recomendaciones: list[str] = []
+
+
+# Adaptadores precompilados (el esquema de validacion se construye una sola vez)
+TASK_ADAPTER = TypeAdapter(TaskExtraction)
+BATCH_TASK_ADAPTER = TypeAdapter(BatchTaskExtraction)
+ROUTINE_ADAPTER = TypeAdapter(RoutineItem)
+INSIGHTS_ADAPTER = TypeAdapter(ProductivityInsights)
+
+
+# Esquemas de respuesta para Gemini (subconjunto OpenAPI que admite response_schema)
+_TASK_PROPERTIES = {
+    'title': {'type': 'string'},
+    'priority': {'type': 'string', 'enum': PRIORITIES},
+    'due_date': {'type': 'string', 'description': 'YYYY-MM-DDTHH:MM:SS'},
+    'body': {'type': 'string'},
+}
+
+TASK_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': _TASK_PROPERTIES,
+    'required': list(_TASK_PROPERTIES),
+}
+
+TASK_BATCH_RESPONSE_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {'indice': {'type': 'integer'}, **_TASK_PROPERTIES},
+        'required': ['indice', *_TASK_PROPERTIES],
+    },
+}
+
+ROUTINES_RESPONSE_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'id_tarea': {'type': 'integer'},
+            'cuerpo': {'type': 'string'},
+        },
+        'required': ['id_tarea', 'cuerpo'],
+    },
+}
+
+
+INSIGHTS_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'resumen': {'type': 'string'},
+        'patrones': {'type': 'array', 'items': {'type': 'string'}},
+        'recomendaciones': {'type': 'array', 'items': {'type': 'string'}},
+    },
+    'required': ['resumen', 'patrones', 'recomendaciones'],
+}
+
+
+def json_generation_config(schema):
+    """generation_config para pedir a Gemini JSON con el esquema dado"""
+    return {
+        'response_mime_type': 'application/json',
+        'response_schema': schema,
+    }
+
+
+class ParseStats:
+    """Contadores de parseo por version de prompt (llamadas desperdiciadas medibles)"""
+
+    OUTCOMES = ('ok', 'repaired', 'invalid_json', 'invalid_schema', 'invalid_items')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def incr(self, prompt_version, outcome, amount=1):
+        with self._lock:
+            counters = self._values.setdefault(prompt_version, dict.fromkeys(self.OUTCOMES, 0))
+            counters[outcome] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {version: dict(counters) for version, counters in self._values.items()}
+
+
+parse_stats = ParseStats()
+register_metrics('ai_parse', parse_stats.snapshot)
+
+
+_FENCE = re.compile(r'```(?:json)?\s*(.*?)(?:```|$)', re.S)
+_TRAILING_COMMA = re.compile(r',\s*(?=[\]}])')
+_SMART_QUOTE_OPEN = re.compile(r'(?<=[{\[,:])(\s*)[“”„]')
+_SMART_QUOTE_CLOSE = re.compile(r'[“”„](?=\s*[:,}\]])')
+
+
+def repair_json(text):
+    """
+    Arreglos baratos de JSON casi valido
+
+    Quita bloques markdown y texto alrededor, comillas tipograficas usadas
+    como delimitadores, comas finales, y cierra strings y corchetes de una
+    respuesta truncada.
+    """
+    text = text.strip()
+    fence = _FENCE.search(text)
+    if fence:
+        text = fence.group(1).strip()
+
+    starts = [i for i in (text.find('{'), text.find('[')) if i >= 0]
+    if not starts:
+        return text
+    text = text[min(starts):]
+
+    text = _SMART_QUOTE_OPEN.sub(r'\1"', text)
+    text = _SMART_QUOTE_CLOSE.sub('"', text)
+    text = _TRAILING_COMMA.sub('', text)
+    return _close_brackets(text)
+
+
+def _close_brackets(text):
+    """Recorta lo que sobra tras el JSON y cierra lo que quedo abierto"""
+    stack = []
+    in_string = escaped = False
+    for position, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if not stack or stack[-1] != char:
+                # Cierre que no corresponde: se descarta desde aqui
+                text = text[:position]
+                break
+            stack.pop()
+            if not stack:
+                # Texto despues del valor completo: se descarta
+                return text[:position + 1]
+
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(',:')
+    return _TRAILING_COMMA.sub('', text + ''.join(reversed(stack)))
+
+
+def load_json(text, prompt_version):
+    """JSON de la respuesta del modelo, con reparacion local si no es valido"""
+    try:
+        data = json.loads(text)
+        parse_stats.incr(prompt_version, 'ok')
+        return data
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        data = json.loads(repair_json(text or ''))
+    except ValueError as e:
+        parse_stats.incr(prompt_version, 'invalid_json')
+        raise ValueError(f"Respuesta JSON invalida del modelo: {str(e)}") from e
+    parse_stats.incr(prompt_version, 'repaired')
+    return data
+
+
+def parse_object(text, adapter, prompt_version):
+    """Valida una respuesta objeto -> dict (sin los campos nulos)"""
+    data = load_json(text, prompt_version)
+    try:
+        return adapter.validate_python(data).model_dump(exclude_none=True)
+    except ValidationError as e:
+        parse_stats.incr(prompt_version, 'invalid_schema')
+        raise ValueError(f"Respuesta del modelo fuera de esquema: {str(e)}") from e
+
+
+def parse_items(text, adapter, prompt_version):
+    """
+    Valida una respuesta array item por item -> lista de dicts
+
+    Los items invalidos se descartan (y se cuentan) sin tirar el resto.
+    """
+    data = load_json(text, prompt_version)
+    if not isinstance(data, list):
+        parse_stats.incr(prompt_version, 'invalid_schema')
+        raise ValueError("La respuesta del modelo no es un JSON array")
+
+    items = []
+    for item in data:
+        try:
+            items.append(adapter.validate_python(item).model_dump(exclude_none=True))
+        except ValidationError:
+            parse_stats.incr(prompt_version, 'invalid_items')
+    return items
@@ -0,0 +1,97 @@
+"""Cola de trabajos en segundo plano para sacar el trabajo lento del request"""
+import queue
+import threading
+
+
+class JobQueue:
+    """
+    Interfaz minima de una cola de trabajos
+
+    Un backend real (RQ, Celery, etc.) solo necesita implementar submit().
+    Los trabajos se ejecutan siempre dentro de un app context.
+    """
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['job_queue'] = self
+
+    def submit(self, func, *args, **kwargs):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class LocalJobQueue(JobQueue):
+    """
+    Stand-in en proceso: queue.Queue + pool de hilos por worker de Gunicorn
+
+    Los hilos se arrancan en el primer submit() (despues del fork), asi que
+    es seguro crear la app en el proceso padre. Los trabajos pendientes se
+    pierden si el worker se reinicia.
+    """
+
+    def __init__(self, app=None, workers=4):
+        self.app = None
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.workers = app.config.get('TASK_WORKER_THREADS', self.workers)
+
+    def submit(self, func, *args, **kwargs):
+        """Encola func(*args, **kwargs) para ejecutarse en un hilo del pool"""
+        self._ensure_started()
+        with self._lock:
+            self._counters['submitted'] += 1
+        self._queue.put((func, args, kwargs))
+
+    def join(self):
+        """Bloquea hasta que todos los trabajos encolados terminen"""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['queued'] = self._queue.qsize()
+        stats['workers'] = len(self._threads)
+        return stats
+
+    def _ensure_started(self):
+        with self._lock:
+            # Tras un fork los hilos del padre no existen en el hijo
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._run,
+                    name=f"job-worker-{len(self._threads)}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        from app import db
+
+        while True:
+            func, args, kwargs = self._queue.get()
+            try:
+                with self.app.app_context():
+                    try:
+                        func(*args, **kwargs)
+                    finally:
+                        db.session.remove()
+                with self._lock:
+                    self._counters['completed'] += 1
+            except Exception as e:
+                print(f"Error en trabajo en segundo plano: {str(e)}")
+                with self._lock:
+                    self._counters['failed'] += 1
+            finally:
+                self._queue.task_done()
@@ -1,9 +1,9 @@
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
 import os
 
+# Las librerias de Google (oauth2, oauthlib, discovery) se importan en cada
+# metodo: cargarlas al arrancar retrasa el boot de todos los workers
+
 class GoogleCalendarService:
     """Servicio para integracion con Google Calendar"""
     
@@ -15,6 +15,8 @@ class GoogleCalendarService:
     
     def get_auth_url(self, redirect_uri):
         """Obtener URL de autorizacion de Google"""
+        from google_auth_oauthlib.flow import Flow
+        
         try:
             flow = Flow.from_client_config(
                 {
@@ -39,6 +41,8 @@ class GoogleCalendarService:
     
     def exchange_code_for_token(self, code, redirect_uri):
         """Intercambiar codigo de autorizacion por token"""
+        from google_auth_oauthlib.flow import Flow
+        
         try:
             flow = Flow.from_client_config(
                 {
@@ -72,6 +76,9 @@ class GoogleCalendarService:
     
     def initialize_service(self, credentials_dict):
         """Inicializar servicio con credenciales"""
+        from google.oauth2.credentials import Credentials
+        from googleapiclient.discovery import build
+        
         try:
             self.credentials = Credentials(
                 token=credentials_dict['token'],
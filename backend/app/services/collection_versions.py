@@ -0,0 +1,76 @@
+"""Versiones de coleccion por usuario y ETags fuertes derivados de ellas"""
+from flask import request, current_app
+from app import db
+from app.models.collection_version import CollectionVersion
+from app.services.ai_cache import make_cache_key
+from app.utils.sql import dialect_insert
+
+
+def bump_version(user_id, *collections):
+    """
+    Incrementa atomicamente la version de las colecciones del usuario
+
+    Se ejecuta en la transaccion de la escritura (UPDATE ... SET version =
+    version + 1 con upsert), asi que solo cuenta si la escritura hace commit.
+    """
+    for collection in collections:
+        bump_versions([user_id], collection)
+
+
+def bump_versions(user_ids, collection):
+    """bump_version de una coleccion para muchos usuarios en un solo executemany"""
+    rows = [{'user_id': user_id, 'collection': collection, 'version': 1} for user_id in sorted(set(user_ids))]
+    if not rows:
+        return
+    table = CollectionVersion.__table__
+    stmt = dialect_insert(db.session.get_bind(), table)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.collection],
+        set_={'version': table.c.version + 1}
+    ), rows)
+
+
+def get_versions(user_id, collections):
+    """{coleccion: version} en una sola consulta (0 si nunca se escribio)"""
+    rows = db.session.query(CollectionVersion.collection, CollectionVersion.version).filter(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection.in_(collections)
+    ).all()
+    versions = dict.fromkeys(collections, 0)
+    versions.update(dict(rows))
+    return versions
+
+
+def etag_for(user_id, versions, variant=''):
+    """
+    ETag fuerte de una vista del usuario a partir de {coleccion: version}
+
+    variant distingue vistas de la misma coleccion (query string, paginas...).
+    """
+    return make_cache_key(user_id, sorted(versions.items()), variant)
+
+
+def collection_etag(user_id, collections, variant=''):
+    """ETag de la vista leyendo las versiones actuales de las colecciones"""
+    return etag_for(user_id, get_versions(user_id, collections), variant)
+
+
+def request_variant():
+    """Parametros de la peticion en orden estable, para distinguir vistas"""
+    return sorted(request.args.items(multi=True))
+
+
+def not_modified_response(etag):
+    """Respuesta 304 si el cliente ya tiene esta version (If-None-Match), si no None"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        set_etag(response, etag)
+        return response
+    return None
+
+
+def set_etag(response, etag):
+    """ETag + obligacion de revalidar, sin cachear en proxies compartidos"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,67 @@
+"""Datos del dashboard: todos los contadores en una sola consulta con agregados condicionales"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import and_, func, select
+from app import db
+from app.models.routine import RoutineSuggestion
+from app.models.sync import ProductivityMetric
+from app.models.task import Task
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def dashboard_counters(user_id, today=None):
+    """
+    Contadores del dashboard en un solo round trip
+
+    Una pasada por las tareas del usuario con COUNT(*) FILTER (WHERE ...)
+    (pendientes, completadas hoy, por vencer hoy y las pendientes con rutina
+    sugerida) y la suma semanal de metricas como subconsulta escalar.
+    """
+    today = today or date.today()
+    day_start, day_end = _day_bounds(today)
+    week_start = today - timedelta(days=today.weekday())
+
+    week_completion = select(func.coalesce(func.sum(ProductivityMetric.tasks_completed), 0)).where(
+        ProductivityMetric.user_id == user_id,
+        ProductivityMetric.date >= week_start
+    ).scalar_subquery()
+
+    pending = Task.status == 'pending'
+    stmt = select(
+        func.count(Task.id).filter(pending).label('pending_tasks'),
+        func.count(Task.id).filter(and_(
+            Task.status == 'completed', Task.completed_at >= day_start, Task.completed_at < day_end
+        )).label('completed_today'),
+        func.count(Task.id).filter(and_(
+            Task.status != 'completed', Task.due_date >= day_start, Task.due_date < day_end
+        )).label('due_today'),
+        func.count(RoutineSuggestion.id).filter(pending).label('active_routines'),
+        week_completion.label('week_completion'),
+    ).select_from(Task).outerjoin(RoutineSuggestion, RoutineSuggestion.task_id == Task.id).where(
+        Task.user_id == user_id
+    )
+
+    return dict(db.session.execute(stmt).one()._mapping)
+
+
+def today_tasks(user_id, today=None):
+    """Tareas sin completar que vencen hoy"""
+    day_start, day_end = _day_bounds(today or date.today())
+    return Task.query.filter(
+        Task.user_id == user_id,
+        Task.due_date >= day_start,
+        Task.due_date < day_end,
+        Task.status != 'completed'
+    ).order_by(Task.due_date).all()
+
+
+def get_dashboard(user_id, today=None):
+    """Contadores + tareas de hoy (dos consultas en total)"""
+    counters = dashboard_counters(user_id, today)
+    return {
+        'today_tasks': [task.to_dict() for task in today_tasks(user_id, today)],
+        **counters
+    }
@@ -0,0 +1,163 @@
+"""Materializacion de dosis de medicamentos como tareas, por conjuntos y sin duplicados"""
+from datetime import datetime, date, timedelta
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.medication import Medication
+from app.models.job_checkpoint import JobCheckpoint
+from app.models.task import Task
+from app.services.collection_versions import bump_versions
+from app.services.productivity_metrics import record_events
+from app.utils.sql import dialect_insert, iter_partitions
+
+DAILY_DOSES_JOB = 'daily_doses'
+
+
+def parse_schedule(schedule):
+    """'HH:MM' -> time (None si el formato no es valido)"""
+    try:
+        return datetime.strptime(schedule, "%H:%M").time()
+    except (TypeError, ValueError):
+        return None
+
+
+def dose_rows(medication, start_date, days):
+    """Filas de tareas para cada toma del medicamento en [start_date, start_date + days)"""
+    now = datetime.utcnow()
+    body = f"Dosis: {medication.dosage or 'Ver instrucciones'}\n{medication.notes or ''}".strip()
+    times = sorted({t for t in map(parse_schedule, medication.schedules or []) if t is not None})
+    
+    rows = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        for schedule_time in times:
+            scheduled_at = datetime.combine(day, schedule_time)
+            rows.append({
+                'user_id': medication.user_id,
+                'medication_id': medication.id,
+                'scheduled_at': scheduled_at,
+                'due_date': scheduled_at,
+                'title': f"Tomar medicamento: {medication.name}",
+                'body': body,
+                'priority': 'high',  # Medicamentos son alta prioridad
+                'status': 'pending',
+                'created_at': now
+            })
+    return rows
+
+
+def materialize_doses(medications, start_date=None, days=None):
+    """
+    Crea las tareas de dosis que falten para los medicamentos dados
+    
+    Un solo INSERT ... ON CONFLICT (medication_id, scheduled_at) DO NOTHING:
+    las tomas ya existentes no se duplican y se puede repetir sin efecto.
+    Corre en la transaccion actual (el commit lo hace quien llama).
+    Devuelve el numero de tareas nuevas.
+    """
+    start_date = start_date or date.today()
+    days = days or current_app.config['DOSE_HORIZON_DAYS']
+    
+    rows = [row for medication in medications if medication.is_active
+            for row in dose_rows(medication, start_date, days)]
+    if not rows:
+        return 0
+    
+    table = Task.__table__
+    stmt = dialect_insert(db.session.get_bind(), table).on_conflict_do_nothing(
+        index_elements=[table.c.medication_id, table.c.scheduled_at]
+    ).returning(table.c.user_id)
+    created = db.session.execute(stmt, rows).scalars().all()
+    
+    # Solo cambia la version de tareas de los usuarios que recibieron dosis nuevas
+    bump_versions(created, 'tasks')
+    today = datetime.utcnow().date()
+    record_events((user_id, today, 'tasks_created', 1) for user_id in created)
+    return len(created)
+
+
+def clear_future_doses(medication, since=None):
+    """Borra las dosis pendientes futuras (al cambiar horarios, desactivar o eliminar)"""
+    since = since or datetime.now()
+    doses = db.session.execute(select(Task.id, Task.created_at).where(
+        Task.medication_id == medication.id,
+        Task.status == 'pending',
+        Task.scheduled_at >= since
+    )).all()
+    if not doses:
+        return 0
+    
+    deleted = Task.query.filter(Task.id.in_([dose.id for dose in doses])).delete(synchronize_session=False)
+    bump_versions([medication.user_id], 'tasks')
+    # Las dosis borradas dejan de contar como creadas en su dia (como en rebuild_metrics)
+    record_events((medication.user_id, dose.created_at.date(), 'tasks_created', -1) for dose in doses)
+    return deleted
+
+
+def iter_active_medications(after_id=0, batch_size=None):
+    """Lotes de medicamentos activos con id > after_id, en orden de id (cursor del servidor en PostgreSQL)"""
+    batch_size = batch_size or current_app.config['DOSE_BATCH_SIZE']
+    table = Medication.__table__
+    stmt = select(
+        table.c.id, table.c.user_id, table.c.name, table.c.dosage,
+        table.c.notes, table.c.schedules, table.c.is_active
+    ).where(table.c.is_active.is_(True))
+    return iter_partitions(stmt, table.c.id, batch_size, after=after_id)
+
+
+def materialize_all(start_date=None, days=None, batch_size=None):
+    """
+    Job por lotes: materializa las dosis de todos los medicamentos activos
+    
+    Hace commit por lote. Devuelve (medicamentos procesados, tareas nuevas).
+    """
+    processed = created = 0
+    for batch in iter_active_medications(batch_size=batch_size):
+        created += materialize_doses(batch, start_date, days)
+        db.session.commit()
+        processed += len(batch)
+    return processed, created
+
+
+def run_daily_doses(run_date=None, batch_size=None, restart=False):
+    """
+    Precalcula las dosis de run_date (por defecto mañana) para todos los usuarios
+    
+    El progreso se guarda en job_checkpoints en la misma transaccion que las
+    tareas de cada lote: si el job se corta, la siguiente ejecucion sigue
+    desde el ultimo id y una ejecucion ya completada no hace nada. restart
+    vuelve a recorrer todo (las dosis existentes no se duplican).
+    Devuelve el checkpoint.
+    """
+    run_date = run_date or date.today() + timedelta(days=1)
+    checkpoint = _load_checkpoint(DAILY_DOSES_JOB, run_date)
+    
+    if restart:
+        checkpoint.last_id = checkpoint.processed = checkpoint.created = 0
+        checkpoint.completed_at = None
+        db.session.commit()
+    elif checkpoint.completed_at:
+        return checkpoint
+    
+    for batch in iter_active_medications(checkpoint.last_id, batch_size):
+        created = materialize_doses(batch, run_date, days=1)
+        checkpoint.last_id = batch[-1].id
+        checkpoint.processed += len(batch)
+        checkpoint.created += created
+        db.session.commit()
+    
+    checkpoint.completed_at = datetime.utcnow()
+    db.session.commit()
+    return checkpoint
+
+
+def _load_checkpoint(job_name, run_date):
+    """Crea el checkpoint si no existe (sin carrera entre procesos) y lo devuelve"""
+    table = JobCheckpoint.__table__
+    stmt = dialect_insert(db.session.get_bind(), table).values(
+        job_name=job_name, run_date=run_date, last_id=0, processed=0, created=0,
+        started_at=datetime.utcnow()
+    )
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=[table.c.job_name, table.c.run_date]))
+    db.session.commit()
+    return db.session.get(JobCheckpoint, (job_name, run_date))
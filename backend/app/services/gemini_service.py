@@ -1,30 +1,60 @@
-import google.generativeai as genai
 import os
 import json
 from datetime import datetime, timedelta
 from config import Config
+from app.services.ai_cache import ResponseCache, task_cache_key
+from app.services.singleflight import ai_flight
+from app.services.task_parser import parse_task, parser_stats
+from app.services.ai_schemas import (
+    TASK_ADAPTER, BATCH_TASK_ADAPTER, ROUTINE_ADAPTER, INSIGHTS_ADAPTER,
+    TASK_RESPONSE_SCHEMA, TASK_BATCH_RESPONSE_SCHEMA, ROUTINES_RESPONSE_SCHEMA, INSIGHTS_RESPONSE_SCHEMA,
+    parse_object, parse_items
+)
+from app.services.llm_providers import create_provider
+from app.services.productivity_metrics import METRIC_FIELDS
+from app.services.routine_service import routine_sort_key
+from app.utils.metrics import register_metrics
+
+# Version del prompt de extraccion de tareas; cambiarla invalida la cache
+TASK_PROMPT_VERSION = 'task-v2'
+# Versiones de los demas prompts (para los contadores de parseo en /metrics)
+TASK_BATCH_PROMPT_VERSION = 'task-batch-v1'
+ROUTINE_PROMPT_VERSION = 'routine-v1'
+INSIGHTS_PROMPT_VERSION = 'insights-v1'
+
+# Cache compartida por todas las instancias del servicio en este worker
+response_cache = ResponseCache(
+    maxsize=Config.GEMINI_CACHE_MAXSIZE,
+    ttl=Config.GEMINI_CACHE_TTL,
+    backend=Config.GEMINI_CACHE_BACKEND
+)
+register_metrics('gemini_cache', response_cache.stats)
 
 class GeminiService:
     """Servicio simplificado para IA con Gemini - Procesa tareas y genera rutinas"""
     
     def __init__(self):
-        api_key = Config.GEMINI_API_KEY
-        if api_key:
-            genai.configure(api_key=api_key)
-            # Configuración con temperatura baja para evitar alucinaciones
-            generation_config = {
-                'temperature': 0.3,  # Más determinista, menos creativo
-                'top_p': 0.8,
-                'top_k': 40,
-            }
-            self.model = genai.GenerativeModel(
-                'gemini-2.5-flash',
-                generation_config=generation_config
-            )
-        else:
-            self.model = None
+        # Proveedor de LLM segun LLM_PROVIDER (None = sin IA, se usan los fallbacks)
+        self.provider = create_provider(Config)
+        
+        # Generacion de rutinas por bloques en paralelo
+        self.routine_chunk_size = Config.ROUTINE_CHUNK_SIZE
+        self.routine_max_concurrency = Config.ROUTINE_MAX_CONCURRENCY
+        
+        # Extraccion de tareas por lotes
+        self.task_batch_chunk_size = Config.TASK_BATCH_CHUNK_SIZE
+        self.task_batch_max_concurrency = Config.TASK_BATCH_MAX_CONCURRENCY
+        
+        # Ruta rapida local para textos cortos y sin ambiguedad
+        self.local_parser_enabled = Config.LOCAL_TASK_PARSER_ENABLED
+        self.local_parser_min_confidence = Config.LOCAL_TASK_PARSER_MIN_CONFIDENCE
     
-    def process_task_input(self, body_text="", audio_file=None, fecha=None):
+    def warm_up(self):
+        """Prepara el proveedor de LLM en este proceso (sin llamadas de red)"""
+        if self.provider:
+            self.provider.warm_up()
+    
+    def process_task_input(self, body_text="", audio_file=None, fecha=None, user_id=None):
         """
         Procesa input del usuario (texto y/o audio) y extrae información de la tarea
         
@@ -32,6 +62,8 @@ class GeminiService:
             body_text: Texto del cuerpo de la tarea (puede estar vacío)
             audio_file: Archivo de audio (opcional)
             fecha: Fecha sugerida por el usuario (opcional)
+            user_id: Si se indica, las peticiones identicas concurrentes del
+                usuario comparten una sola llamada al modelo (single-flight)
         
         Returns:
             dict: {
@@ -41,23 +73,42 @@ class GeminiService:
                 'body': str (descripción refinada)
             }
         """
-        if not self.model:
+        if not audio_file:
+            local_result = self.parse_locally(body_text, fecha)
+            if local_result is not None:
+                return local_result
+        
+        if not self.provider:
             # Fallback sin IA
-            return {
-                'title': body_text[:100] if body_text else "Nueva tarea",
-                'priority': 'medium',
-                'due_date': fecha if fecha else (datetime.now() + timedelta(days=1)).isoformat(),
-                'body': body_text
-            }
+            return self.task_fallback(body_text, fecha)
         
+        # Si hay audio, transcribirlo primero
+        transcribed_text = body_text
+        if audio_file:
+            # Aquí puedes usar la API de transcripción de Gemini si está disponible
+            # Por ahora, asumimos que el audio viene como texto
+            transcribed_text = audio_file
+        
+        cache_key = task_cache_key(TASK_PROMPT_VERSION, transcribed_text, fecha)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        if user_id is None:
+            return dict(self._extract_task(transcribed_text, fecha, cache_key))
+        
+        # Solo con la cache en base de datos otro worker puede dejar el resultado
+        # visible; con la cache en memoria basta la coalescencia local
+        lookup = (lambda: response_cache.get(cache_key)) if response_cache.shared else None
+        return dict(ai_flight.do(
+            f"task:{user_id}:{cache_key}",
+            lambda: self._extract_task(transcribed_text, fecha, cache_key),
+            lookup=lookup
+        ))
+    
+    def _extract_task(self, transcribed_text, fecha, cache_key):
+        """Llamada real al modelo para process_task_input"""
         try:
-            # Si hay audio, transcribirlo primero
-            transcribed_text = body_text
-            if audio_file:
-                # Aquí puedes usar la API de transcripción de Gemini si está disponible
-                # Por ahora, asumimos que el audio viene como texto
-                transcribed_text = audio_file
-            
             # Prompt para el agente
             prompt = f"""
 Eres un asistente personal especializado en ayudar a personas con ADHD a gestionar tareas.
@@ -93,47 +144,186 @@ Responde ÚNICAMENTE con un JSON válido en este formato exacto:
 NO añadas texto adicional, SOLO el JSON.
 """
             
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Limpiar el texto si viene con markdown
-            if result_text.startswith("```json"):
-                result_text = result_text[7:]
-            if result_text.startswith("```"):
-                result_text = result_text[3:]
-            if result_text.endswith("```"):
-                result_text = result_text[:-3]
-            
-            result = json.loads(result_text.strip())
+            response_text = self.provider.generate(prompt, TASK_RESPONSE_SCHEMA)
+            result = self.validate_task_result(
+                parse_object(response_text, TASK_ADAPTER, TASK_PROMPT_VERSION),
+                transcribed_text
+            )
             
-            # Validar campos obligatorios
-            if 'title' not in result:
-                result['title'] = transcribed_text[:100]
-            if 'priority' not in result or result['priority'] not in ['low', 'medium', 'high', 'urgent']:
-                result['priority'] = 'medium'
-            if 'due_date' not in result:
-                result['due_date'] = (datetime.now() + timedelta(days=1)).isoformat()
-            if 'body' not in result:
-                result['body'] = transcribed_text
+            # Solo se cachean respuestas reales del modelo, nunca el fallback
+            response_cache.set(cache_key, result)
             
             return result
             
         except Exception as e:
             print(f"Error procesando tarea con IA: {str(e)}")
             # Fallback seguro
-            return {
-                'title': transcribed_text[:100] if transcribed_text else "Nueva tarea",
-                'priority': 'medium',
-                'due_date': fecha if fecha else (datetime.now() + timedelta(days=1)).isoformat(),
-                'body': transcribed_text
-            }
+            return self.task_fallback(transcribed_text, fecha)
+    
+    def validate_task_result(self, result, body_text):
+        """Completa los campos obligatorios que falten o sean invalidos en la respuesta del modelo"""
+        if not isinstance(result, dict):
+            raise ValueError("La respuesta de la tarea no es un objeto JSON")
+        if 'title' not in result:
+            result['title'] = body_text[:100]
+        if 'priority' not in result or result['priority'] not in ['low', 'medium', 'high', 'urgent']:
+            result['priority'] = 'medium'
+        if 'due_date' not in result:
+            result['due_date'] = (datetime.now() + timedelta(days=1)).isoformat()
+        if 'body' not in result:
+            result['body'] = body_text
+        return result
+    
+    def parse_locally(self, body_text, fecha=None):
+        """Tarea extraida por reglas si la confianza es suficiente, si no None (va al modelo)"""
+        if not self.local_parser_enabled:
+            return None
+        
+        result, confidence = parse_task(body_text, fecha)
+        if result is None or confidence < self.local_parser_min_confidence:
+            parser_stats.incr('escalated')
+            return None
+        
+        parser_stats.incr('local')
+        return result
+    
+    def task_fallback(self, body_text, fecha=None):
+        """Tarea sin IA: el texto como titulo y cuerpo, prioridad media"""
+        due_date = (datetime.now() + timedelta(days=1)).isoformat()
+        if fecha:
+            # Solo fechas ISO: sin modelo no hay quien normalice otros formatos
+            try:
+                due_date = datetime.fromisoformat(fecha).isoformat()
+            except (TypeError, ValueError):
+                pass
+        return {
+            'title': body_text[:100] if body_text else "Nueva tarea",
+            'priority': 'medium',
+            'due_date': due_date,
+            'body': body_text
+        }
+    
+    def process_task_batch(self, items):
+        """
+        Extrae varias tareas con prompts por lotes
+        
+        Args:
+            items: Lista de dicts {'cuerpo': str, 'fecha': str|None}
+        
+        Returns:
+            list: Un resultado por item, en el mismo orden y con el mismo
+            formato que process_task_input. Los items que el parser local
+            resuelve no llegan al modelo; los que el modelo no devuelve (o
+            todo el lote si falla) usan el fallback.
+        """
+        results = [None] * len(items)
+        keys = [task_cache_key(TASK_PROMPT_VERSION, item['cuerpo'], item.get('fecha')) for item in items]
+        
+        pending = []
+        for index, (item, key) in enumerate(zip(items, keys)):
+            local_result = self.parse_locally(item['cuerpo'], item.get('fecha'))
+            cached = response_cache.get(key) if self.provider and local_result is None else None
+            if local_result is not None:
+                results[index] = local_result
+            elif cached is not None:
+                results[index] = dict(cached)
+            else:
+                pending.append(index)
+        
+        if self.provider and pending:
+            chunk_size = max(self.task_batch_chunk_size, 1)
+            chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+            responses = self.provider.generate_batch(
+                [self._tasks_prompt(items, chunk) for chunk in chunks],
+                TASK_BATCH_RESPONSE_SCHEMA,
+                max_concurrency=self.task_batch_max_concurrency
+            )
+            
+            for chunk, response in zip(chunks, responses):
+                partial = self._task_chunk(items, chunk, response)
+                for index, result in partial.items():
+                    response_cache.set(keys[index], result)
+                    results[index] = result
+        
+        return [
+            result if result is not None else self.task_fallback(item['cuerpo'], item.get('fecha'))
+            for item, result in zip(items, results)
+        ]
+    
+    def _task_chunk(self, items, indexes, response):
+        """Respuesta de un bloque de items -> {indice: tarea validada}; {} si fallo"""
+        try:
+            if isinstance(response, Exception):
+                raise response
+            return self._parse_tasks(items, indexes, response)
+        except Exception as e:
+            print(f"Error procesando lote de tareas con IA: {str(e)}")
+            return {}
+    
+    def _tasks_prompt(self, items, indexes):
+        """Prompt de un bloque de items de process_task_batch"""
+        inputs = [
+            {'indice': index, 'texto': items[index]['cuerpo'], 'fecha': items[index].get('fecha')}
+            for index in indexes
+        ]
+        return f"""
+Eres un asistente personal especializado en ayudar a personas con ADHD a gestionar tareas.
+Analiza cada uno de los siguientes inputs del usuario y extrae la información clave para crear una tarea bien estructurada por cada uno.
+
+Inputs del usuario (fecha null = no especificada):
+{json.dumps(inputs, ensure_ascii=False)}
+
+Para CADA input:
+1. Extrae o genera un título claro y conciso (máximo 100 caracteres)
+2. Determina la prioridad basándote en palabras clave:
+   - urgent: si menciona "urgente", "ya", "ahora", "inmediato"
+   - high: si menciona "importante", "pronto", "mañana"
+   - medium: si menciona "cuando pueda", "esta semana"
+   - low: si menciona "algún día", "no urgente", "eventualmente"
+3. Establece una fecha de vencimiento realista:
+   - Si el input trae fecha, úsala
+   - Si no, infiere basándote en la urgencia:
+     * urgent: hoy
+     * high: mañana
+     * medium: dentro de 3 días
+     * low: dentro de una semana
+4. Refina el cuerpo/descripción: mejora la redacción y añade detalles útiles
+
+Responde ÚNICAMENTE con un JSON array válido, un objeto por input, en este formato exacto:
+[
+    {{
+        "indice": indice del input,
+        "title": "título aquí",
+        "priority": "low|medium|high|urgent",
+        "due_date": "YYYY-MM-DDTHH:MM:SS",
+        "body": "descripción refinada aquí"
+    }},
+    ...
+]
+
+Debes incluir los {len(inputs)} inputs. NO añadas texto adicional, SOLO el JSON array.
+"""
     
-    def generate_routine_suggestions(self, user_tasks):
+    def _parse_tasks(self, items, indexes, response_text):
+        """Tareas validadas de la respuesta de un bloque de process_task_batch"""
+        result = parse_items(response_text, BATCH_TASK_ADAPTER, TASK_BATCH_PROMPT_VERSION)
+        
+        # Solo indices del bloque, sin duplicados
+        results = {}
+        for item in result:
+            index = item.pop('indice')
+            if index in indexes and index not in results:
+                results[index] = self.validate_task_result(item, items[index]['cuerpo'])
+        return results
+    
+    def generate_routine_suggestions(self, user_tasks, fallback=True):
         """
         Genera rutinas dinámicas basadas en las tareas existentes del usuario
         
         Args:
             user_tasks: Lista de tareas del usuario con sus detalles
+            fallback: Si es False, los errores de la IA se propagan en lugar
+                de devolver la lista de respaldo (para no persistirla)
         
         Returns:
             list: [
@@ -144,7 +334,7 @@ NO añadas texto adicional, SOLO el JSON.
                 ...
             ]
         """
-        if not self.model or not user_tasks:
+        if not self.provider or not user_tasks:
             # Fallback: devolver TODAS las tareas sin procesamiento
             return [
                 {
@@ -154,24 +344,69 @@ NO añadas texto adicional, SOLO el JSON.
                 for task in user_tasks  # TODAS las tareas
             ]
         
+        # Preparar resumen de tareas, ordenado por prioridad y fecha de vencimiento
+        tasks_summary = []
+        for task in user_tasks:
+            tasks_summary.append({
+                'id': task['id'],
+                'title': task['title'],
+                'body': task.get('body', ''),
+                'priority': task.get('priority', 'medium'),
+                'due_date': task.get('due_date'),
+                'status': task.get('status', 'pending')
+            })
+        tasks_summary.sort(key=routine_sort_key)
+        
+        # Bloques pequeños en paralelo: prompts cortos, respuestas que no se truncan
+        chunk_size = max(self.routine_chunk_size, 1)
+        chunks = [tasks_summary[i:i + chunk_size] for i in range(0, len(tasks_summary), chunk_size)]
+        
+        responses = self.provider.generate_batch(
+            [self._routines_prompt(chunk) for chunk in chunks],
+            ROUTINES_RESPONSE_SCHEMA,
+            max_concurrency=self.routine_max_concurrency
+        )
+        partials = [self._routine_chunk(chunk, response) for chunk, response in zip(chunks, responses)]
+        
+        if all(isinstance(partial, Exception) for partial in partials):
+            print(f"Error generando rutinas con IA: {str(partials[0])}")
+            if not fallback:
+                raise partials[0]
+            return self.routine_fallback(user_tasks)
+        
+        # Merge determinista: orden de los bloques y, dentro de cada uno, el del modelo
+        result = []
+        for chunk, partial in zip(chunks, partials):
+            if isinstance(partial, Exception):
+                print(f"Error generando bloque de rutinas con IA: {str(partial)}")
+                if fallback:
+                    result.extend(self.routine_fallback(chunk))
+                continue
+            result.extend(partial)
+        
+        return result
+    
+    def _routine_chunk(self, chunk, response):
+        """
+        Rutinas de un bloque de tareas a partir de la respuesta del modelo
+        
+        Devuelve la excepcion en lugar de lanzarla para que un bloque fallido
+        no descarte el resto.
+        """
         try:
-            # Preparar resumen de tareas
-            tasks_summary = []
-            for task in user_tasks:
-                tasks_summary.append({
-                    'id': task['id'],
-                    'title': task['title'],
-                    'body': task.get('body', ''),
-                    'priority': task.get('priority', 'medium'),
-                    'due_date': task.get('due_date'),
-                    'status': task.get('status', 'pending')
-                })
-            
-            prompt = f"""
+            if isinstance(response, Exception):
+                raise response
+            return self._parse_routines(chunk, response)
+        except Exception as e:
+            return e
+    
+    def _routines_prompt(self, tasks_summary):
+        """Prompt de rutinas para un bloque de tareas"""
+        return f"""
 Eres un asistente personal especializado en ayudar a personas con ADHD a organizar su día.
 Tienes acceso a las siguientes tareas pendientes del usuario:
 
-{json.dumps(tasks_summary, indent=2, ensure_ascii=False)}
+{json.dumps(tasks_summary, ensure_ascii=False)}
 
 ⚠️ IMPORTANTE: Debes incluir TODAS las tareas que te proporcioné en tu respuesta. No omitas ninguna.
 
@@ -197,7 +432,7 @@ Tu objetivo:
 Responde ÚNICAMENTE con un JSON válido en este formato exacto:
 [
     {{
-        "id_tarea": Titulo de la tarea,
+        "id_tarea": id numérico de la tarea,
         "cuerpo": "Mañana (8:00-9:00) - 30min estimados\\nPasos: ...\\nConsejo: ..."
     }},
     ...
@@ -206,40 +441,109 @@ Responde ÚNICAMENTE con un JSON válido en este formato exacto:
 RECUERDA: Debes incluir las {len(tasks_summary)} tareas en tu respuesta. NO omitas ninguna.
 NO añadas texto adicional, SOLO el JSON array.
 """
-            
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Limpiar el texto si viene con markdown
-            if result_text.startswith("```json"):
-                result_text = result_text[7:]
-            if result_text.startswith("```"):
-                result_text = result_text[3:]
-            if result_text.endswith("```"):
-                result_text = result_text[:-3]
-            
-            result = json.loads(result_text.strip())
-            
-            return result
-            
+    
+    def _parse_routines(self, tasks_summary, response_text):
+        """Items de la respuesta de un bloque; solo los de tareas del bloque"""
+        result = parse_items(response_text, ROUTINE_ADAPTER, ROUTINE_PROMPT_VERSION)
+        
+        # Descartar ids ajenos al bloque y duplicados
+        ids = {str(task['id']) for task in tasks_summary}
+        titles = {task['title'] for task in tasks_summary}
+        seen = set()
+        items = []
+        for item in result:
+            item_id = str(item['id_tarea'])
+            if (item_id not in ids and item_id not in titles) or item_id in seen:
+                continue
+            seen.add(item_id)
+            items.append(item)
+        return items
+    
+    def routine_fallback(self, user_tasks):
+        """Fallback: devolver TODAS las tareas ordenadas por prioridad y vencimiento"""
+        sorted_tasks = sorted(user_tasks, key=routine_sort_key)
+        return [
+            {
+                'id_tarea': task['id'],
+                'cuerpo': f"{task['title']} - Prioridad: {task.get('priority', 'medium')}"
+            }
+            for task in sorted_tasks  # TODAS las tareas
+        ]
+    
+    def analyze_productivity_patterns(self, metrics_data):
+        """
+        Analiza las metricas diarias del usuario y sugiere mejoras
+        
+        Args:
+            metrics_data: Lista de ProductivityMetric.to_dict() del periodo
+        
+        Returns:
+            dict: {
+                'resumen': str,
+                'patrones': [str, ...],
+                'recomendaciones': [str, ...]
+            }
+        """
+        if not self.provider or not metrics_data:
+            return self.insights_fallback(metrics_data)
+        
+        try:
+            response_text = self.provider.generate(self._insights_prompt(metrics_data), INSIGHTS_RESPONSE_SCHEMA)
+            return parse_object(response_text, INSIGHTS_ADAPTER, INSIGHTS_PROMPT_VERSION)
         except Exception as e:
-            print(f"Error generando rutinas con IA: {str(e)}")
-            # Fallback: devolver TODAS las tareas ordenadas por prioridad
-            sorted_tasks = sorted(
-                user_tasks,
-                key=lambda x: (
-                    0 if x.get('priority') == 'urgent' else
-                    1 if x.get('priority') == 'high' else
-                    2 if x.get('priority') == 'medium' else 3
-                )
-            )
-            return [
-                {
-                    'id_tarea': task['id'],
-                    'cuerpo': f"{task['title']} - Prioridad: {task.get('priority', 'medium')}"
-                }
-                for task in sorted_tasks  # TODAS las tareas
-            ]
+            print(f"Error analizando productividad con IA: {str(e)}")
+            return self.insights_fallback(metrics_data)
+    
+    def _insights_prompt(self, metrics_data):
+        """Prompt de analisis con las metricas por dia (solo fecha y contadores)"""
+        days = [
+            {'date': metric['date'], **{field: metric.get(field) or 0 for field in METRIC_FIELDS}}
+            for metric in sorted(metrics_data, key=lambda metric: metric['date'])
+        ]
+        return f"""
+Eres un asistente personal especializado en ayudar a personas con ADHD a mejorar su productividad.
+Estas son las métricas diarias del usuario (días sin actividad no aparecen):
+
+{json.dumps(days, ensure_ascii=False)}
 
-# Instancia singleton
-gemini_service = GeminiService()
+Campos: tasks_created (tareas creadas), tasks_completed (tareas completadas),
+routines_followed (rutinas seguidas), reminders_acknowledged (recordatorios atendidos),
+total_focus_time (minutos de concentración).
+
+Tu tarea:
+1. Resume en 2-3 frases cómo fue el periodo, en tono positivo y sin juzgar
+2. Identifica patrones concretos (días de la semana más productivos, rachas, caídas)
+3. Da recomendaciones prácticas y breves, adaptadas a personas con ADHD
+
+Responde ÚNICAMENTE con un JSON válido en este formato exacto:
+{{
+    "resumen": "resumen aquí",
+    "patrones": ["patrón 1", "patrón 2"],
+    "recomendaciones": ["recomendación 1", "recomendación 2"]
+}}
+
+NO añadas texto adicional, SOLO el JSON.
+"""
+    
+    def insights_fallback(self, metrics_data):
+        """Analisis sin IA: totales del periodo y una recomendacion segun la tasa de completitud"""
+        if not metrics_data:
+            return {
+                'resumen': "Aún no hay métricas suficientes para analizar",
+                'patrones': [],
+                'recomendaciones': ["Registra y completa algunas tareas para recibir recomendaciones"]
+            }
+        
+        created = sum(metric.get('tasks_created') or 0 for metric in metrics_data)
+        completed = sum(metric.get('tasks_completed') or 0 for metric in metrics_data)
+        active_days = sum(1 for metric in metrics_data if metric.get('tasks_completed'))
+        
+        if created and completed / created < 0.5:
+            recommendation = "Divide las tareas grandes en pasos más pequeños y empieza por uno solo"
+        else:
+            recommendation = "Mantén la rutina: planifica las tareas del día a la misma hora"
+        return {
+            'resumen': f"Completaste {completed} de {created} tareas creadas en {len(metrics_data)} días con actividad",
+            'patrones': [f"{active_days} días con al menos una tarea completada"],
+            'recomendaciones': [recommendation]
+        }
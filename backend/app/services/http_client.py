@@ -0,0 +1,212 @@
+"""Cliente HTTP saliente con pool keep-alive, reintentos con backoff y circuit breaker"""
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from app.utils.metrics import Counters
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Limites (ms) del histograma de latencia por llamada
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(Exception):
+    """El upstream esta degradado y el breaker rechaza la llamada sin intentarla"""
+
+
+class CircuitBreaker:
+    """
+    Breaker clasico closed -> open -> half_open
+
+    Tras failure_threshold fallos seguidos se abre y rechaza llamadas durante
+    reset_timeout segundos; despues deja pasar una llamada de prueba que lo
+    cierra si sale bien o lo vuelve a abrir si falla.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self.times_opened += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+
+class ResilientHttpClient:
+    """
+    Session de requests compartida por los hilos del worker
+
+    - Pool de conexiones keep-alive (se recrea tras un fork)
+    - Timeouts de conexion y lectura en todas las llamadas
+    - Reintentos con backoff exponencial con jitter en 429/5xx y errores de red
+    - Plazo total por llamada (deadline) que acota intentos, esperas y
+      timeouts: debe quedar por debajo del timeout del worker de Gunicorn
+      para que el error y el breaker lleguen a ejecutarse
+    - Circuit breaker para fallar rapido si el upstream esta caido
+    """
+
+    def __init__(self, name, pool_size=10, connect_timeout=3.05, read_timeout=30.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, deadline=60.0, breaker=None):
+        self.name = name
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.counters = Counters('calls', 'retries', 'failures', 'rejected_open', 'deadline_exceeded')
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+        self._latency = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        self._buckets = dict.fromkeys([*LATENCY_BUCKETS_MS, 'inf'], 0)
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None or self._session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+                self._session_pid = os.getpid()
+            return self._session
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """Hace la peticion con reintentos; lanza CircuitOpenError si el breaker esta abierto"""
+        if not self.breaker.allow():
+            self.counters.incr('rejected_open')
+            raise CircuitOpenError(f"{self.name}: circuito abierto, upstream degradado")
+
+        self.counters.incr('calls')
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self._request_with_retries(method, url, **kwargs)
+        except Exception:
+            self.counters.incr('failures')
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._record_latency((time.perf_counter() - start) * 1000)
+
+        if response.status_code in RETRY_STATUS_CODES:
+            self.counters.incr('failures')
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        stats['breaker_state'] = self.breaker.state
+        stats['breaker_opened'] = self.breaker.times_opened
+        with self._lock:
+            latency = dict(self._latency)
+            latency['buckets_ms'] = {str(bucket): count for bucket, count in self._buckets.items()}
+        latency['avg_ms'] = round(latency['total_ms'] / latency['count'], 2) if latency['count'] else 0
+        latency['total_ms'] = round(latency['total_ms'], 2)
+        latency['max_ms'] = round(latency['max_ms'], 2)
+        stats['latency'] = latency
+        return stats
+
+    def _request_with_retries(self, method, url, **kwargs):
+        deadline_at = time.monotonic() + self.deadline
+        timeout = kwargs.pop('timeout')
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                # El ultimo intento solo dispone de lo que queda del plazo
+                timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_after(response) or self._backoff(attempt)
+                if not self._fits(deadline_at, delay):
+                    self.counters.incr('deadline_exceeded')
+                    return response
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                if not self._fits(deadline_at, delay):
+                    self.counters.incr('deadline_exceeded')
+                    raise
+
+            attempt += 1
+            self.counters.incr('retries')
+            time.sleep(delay)
+
+    def _fits(self, deadline_at, delay):
+        """Queda plazo para esperar delay y hacer al menos un intento mas"""
+        return deadline_at - time.monotonic() - delay > 0.1
+
+    def _backoff(self, attempt):
+        """Full jitter: aleatorio entre 0 y base * 2^intento (con tope)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        try:
+            return min(float(response.headers.get('Retry-After', '')), self.backoff_max)
+        except ValueError:
+            return None
+
+    def _record_latency(self, elapsed_ms):
+        with self._lock:
+            self._latency['count'] += 1
+            self._latency['total_ms'] += elapsed_ms
+            self._latency['max_ms'] = max(self._latency['max_ms'], elapsed_ms)
+            for bucket in LATENCY_BUCKETS_MS:
+                if elapsed_ms <= bucket:
+                    self._buckets[bucket] += 1
+                    break
+            else:
+                self._buckets['inf'] += 1
@@ -0,0 +1,177 @@
+"""Proveedores de LLM intercambiables: Gemini en produccion, stub local para pruebas de carga"""
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app.services.ai_schemas import json_generation_config
+from app.utils.metrics import Counters, register_metrics
+
+
+class LLMProvider:
+    """
+    Interfaz comun de los modelos de lenguaje
+
+    generate devuelve el texto de la respuesta (JSON si se pasa schema),
+    generate_batch varios prompts en paralelo y stream los fragmentos de
+    texto a medida que llegan.
+    """
+
+    name = 'base'
+
+    def generate(self, prompt, schema=None):
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, schema=None, max_concurrency=4):
+        """
+        Una respuesta por prompt, en el mismo orden
+
+        Un prompt fallido devuelve su excepcion en lugar del texto, para
+        que no se pierdan las respuestas del resto.
+        """
+        def call(prompt):
+            try:
+                return self.generate(prompt, schema)
+            except Exception as e:
+                return e
+
+        if len(prompts) <= 1:
+            return [call(prompt) for prompt in prompts]
+
+        workers = max(min(max_concurrency, len(prompts)), 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(call, prompts))
+
+    def stream(self, prompt, schema=None):
+        """Fragmentos de la respuesta (por defecto, la respuesta completa de una vez)"""
+        yield self.generate(prompt, schema)
+
+    def warm_up(self):
+        """Preparacion por proceso antes de recibir peticiones (por defecto nada)"""
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google-generativeai"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name='gemini-2.5-flash'):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        # Configuración con temperatura baja para evitar alucinaciones
+        generation_config = {
+            'temperature': 0.3,  # Más determinista, menos creativo
+            'top_p': 0.8,
+            'top_k': 40,
+        }
+        self.model = genai.GenerativeModel(model_name, generation_config=generation_config)
+
+    def generate(self, prompt, schema=None):
+        response = self.model.generate_content(prompt, generation_config=self._config(schema))
+        return response.text
+
+    def stream(self, prompt, schema=None):
+        for chunk in self.model.generate_content(prompt, generation_config=self._config(schema), stream=True):
+            yield chunk.text
+
+    def _config(self, schema):
+        return json_generation_config(schema) if schema else None
+
+
+class StubProvider(LLMProvider):
+    """
+    LLM local determinista para benchmarks y pruebas de carga
+
+    Responde JSON valido para el schema pedido: los arrays llevan un item
+    por cada id ("id" o "indice") que aparece en el prompt. La latencia es
+    latency + per_item_latency por item generado (como la salida de un LLM)
+    y failure_rate es la fraccion de llamadas que fallan. Con la misma
+    semilla la secuencia de latencias y fallos se repite.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency=0.5, per_item_latency=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = Counters('calls', 'failures')
+
+    def generate(self, prompt, schema=None):
+        self.counters.incr('calls')
+        with self._lock:
+            fails = self._random.random() < self.failure_rate
+
+        payload = self._build(schema, prompt) if schema else 'Respuesta del stub'
+        items = len(payload) if isinstance(payload, list) else 1
+        time.sleep(self.latency + self.per_item_latency * items)
+
+        if fails:
+            self.counters.incr('failures')
+            raise RuntimeError('Fallo simulado del proveedor stub')
+        return payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+
+    def stream(self, prompt, schema=None):
+        text = self.generate(prompt, schema)
+        for start in range(0, len(text), 64):
+            yield text[start:start + 64]
+
+    def stats(self):
+        return {'name': self.name, **self.counters.snapshot()}
+
+    def _build(self, schema, prompt):
+        if schema['type'] == 'array':
+            properties = schema['items'].get('properties', {})
+            key = next((name for name in ('indice', 'id_tarea') if name in properties), None)
+            ids = _prompt_ids(prompt, 'indice' if key == 'indice' else 'id')
+            return [self._value(schema['items'], position, ids[position]) for position in range(len(ids))]
+        return self._value(schema, 0, None)
+
+    def _value(self, schema, position, item_id):
+        kind = schema.get('type')
+        if kind == 'object':
+            return {
+                name: (item_id if name in ('indice', 'id_tarea') else self._value(prop, position, item_id))
+                for name, prop in schema.get('properties', {}).items()
+            }
+        if kind == 'array':
+            return []
+        if kind == 'integer':
+            return position
+        if 'enum' in schema:
+            return schema['enum'][position % len(schema['enum'])]
+        if 'YYYY' in schema.get('description', ''):
+            return (datetime.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+        return f"Respuesta del stub {position + 1}"
+
+
+def _prompt_ids(prompt, key):
+    """Ids numericos que el prompt menciona como "key": N, sin repetir"""
+    return list(dict.fromkeys(int(value) for value in re.findall(rf'"{key}": (\d+)', prompt)))
+
+
+def create_provider(config):
+    """
+    Proveedor segun LLM_PROVIDER ('gemini', 'stub' o 'none')
+
+    Devuelve None si no hay proveedor (sin API key de Gemini o 'none'):
+    los servicios usan entonces sus respuestas de respaldo.
+    """
+    name = config.LLM_PROVIDER
+    if name == 'stub':
+        provider = StubProvider(
+            latency=config.STUB_LLM_LATENCY,
+            per_item_latency=config.STUB_LLM_LATENCY_PER_ITEM,
+            failure_rate=config.STUB_LLM_FAILURE_RATE,
+            seed=config.STUB_LLM_SEED
+        )
+        register_metrics('llm_stub', provider.stats)
+        return provider
+    if name == 'gemini' and config.GEMINI_API_KEY:
+        return GeminiProvider(config.GEMINI_API_KEY, config.GEMINI_MODEL)
+    return None
@@ -0,0 +1,174 @@
+"""
+Reportes PDF generados en segundo plano y cacheados en disco
+
+POST /api/reports/pdf calcula el id del reporte a partir de (usuario, rango,
+version de los datos) y, si el PDF no existe todavia, encola su generacion
+en job_queue. El PDF queda en REPORTS_DIR/<user_id>/<id>.pdf: mientras los
+datos no cambien, volver a pedir el mismo rango devuelve el mismo id y la
+descarga no renderiza nada. El estado se guarda con archivos marcador junto
+al PDF para que cualquier worker pueda responder por el.
+"""
+import os
+import re
+import threading
+import time
+from flask import current_app
+from app import db, job_queue, services
+from app.models.routine import RoutineState, RoutineSuggestion
+from app.models.task import Task
+from app.models.user import User
+from app.services.ai_cache import make_cache_key
+from app.services.collection_versions import get_versions
+from app.services.productivity_metrics import metric_totals
+from app.utils.metrics import Counters, register_metrics
+
+counters = Counters('requested', 'cache_hits', 'submitted', 'rendered', 'failed')
+
+REPORT_ID_RE = re.compile(r'[0-9a-f]{64}')
+
+# Ids en cola o generandose en este worker (evita encolar dos veces el mismo)
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def report_id_for(user_id, start, end):
+    """
+    Id del reporte: hash del usuario, el rango y la version de los datos
+
+    La version combina las versiones de las colecciones de tareas y rutinas
+    con los totales de metricas del rango (baratos gracias a los
+    acumulados), asi que cualquier escritura que cambie el PDF cambia el id.
+    """
+    versions = get_versions(user_id, ['tasks'])
+    state = db.session.get(RoutineState, user_id)
+    versions['routines'] = state.version if state else 0
+    totals = metric_totals(user_id, start, end)
+    return make_cache_key(user_id, start, end, sorted(versions.items()), sorted(totals.items()))
+
+
+def _paths(user_id, report_id):
+    base = os.path.join(current_app.config['REPORTS_DIR'], str(user_id), report_id)
+    return {'pdf': base + '.pdf', 'pending': base + '.pending', 'error': base + '.error'}
+
+
+def report_status(user_id, report_id):
+    """
+    Estado del reporte del usuario: (estado, detalle)
+
+    'ready' con la ruta del PDF, 'pending', 'failed' con el error, o None si
+    no existe (o pertenece a otro usuario: la ruta incluye el user_id).
+    """
+    if not REPORT_ID_RE.fullmatch(report_id):
+        return None, None
+    paths = _paths(user_id, report_id)
+    if os.path.exists(paths['pdf']):
+        return 'ready', paths['pdf']
+    if os.path.exists(paths['error']):
+        with open(paths['error'], encoding='utf-8') as f:
+            return 'failed', f.read()
+    if os.path.exists(paths['pending']):
+        return 'pending', None
+    return None, None
+
+
+def request_report(user_id, start, end):
+    """
+    Devuelve (report_id, estado) y encola la generacion si hace falta
+
+    Un reporte fallido o pendiente desde hace mas de REPORT_JOB_TIMEOUT
+    segundos (worker reiniciado, trabajo perdido) se vuelve a encolar.
+    """
+    counters.incr('requested')
+    report_id = report_id_for(user_id, start, end)
+    status, _ = report_status(user_id, report_id)
+    if status == 'ready':
+        counters.incr('cache_hits')
+        return report_id, status
+
+    paths = _paths(user_id, report_id)
+    if status == 'pending':
+        try:
+            age = time.time() - os.path.getmtime(paths['pending'])
+        except FileNotFoundError:
+            # Otro worker lo termino entre las dos comprobaciones
+            return report_id, 'pending'
+        if age < current_app.config['REPORT_JOB_TIMEOUT']:
+            return report_id, status
+
+    with _in_flight_lock:
+        if report_id in _in_flight:
+            return report_id, 'pending'
+        _in_flight.add(report_id)
+
+    os.makedirs(os.path.dirname(paths['pdf']), exist_ok=True)
+    if os.path.exists(paths['error']):
+        os.unlink(paths['error'])
+    with open(paths['pending'], 'w'):
+        pass
+    counters.incr('submitted')
+    job_queue.submit(render_report, user_id, start, end, report_id)
+    return report_id, 'pending'
+
+
+def render_report(user_id, start, end, report_id):
+    """Trabajo en segundo plano: genera el PDF y lo publica con un rename atomico"""
+    paths = _paths(user_id, report_id)
+    try:
+        buffer = services.get('report').generate_pdf_report(*_report_data(user_id, start, end))
+        if not buffer:
+            raise RuntimeError('Error al generar reporte')
+
+        tmp_path = f"{paths['pdf']}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp_path, paths['pdf'])
+        counters.incr('rendered')
+        _prune(os.path.dirname(paths['pdf']))
+    except Exception as e:
+        counters.incr('failed')
+        with open(paths['error'], 'w', encoding='utf-8') as f:
+            f.write(str(e))
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(report_id)
+        if os.path.exists(paths['pending']):
+            os.unlink(paths['pending'])
+
+
+def _report_data(user_id, start, end):
+    """(usuario, metricas, tareas recientes, rutinas de tareas pendientes)"""
+    user = db.session.get(User, user_id)
+    total_metrics = metric_totals(user_id, start, end)
+
+    tasks = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).limit(20).all()
+    routines = RoutineSuggestion.query.join(Task, Task.id == RoutineSuggestion.task_id).filter(
+        RoutineSuggestion.user_id == user_id,
+        Task.status == 'pending'
+    ).all()
+    return user, total_metrics, [t.to_dict() for t in tasks], [r.to_dict() for r in routines]
+
+
+def _prune(user_dir):
+    """Conserva solo los REPORTS_MAX_PER_USER PDFs mas recientes del usuario"""
+    keep = current_app.config['REPORTS_MAX_PER_USER']
+    pdfs = sorted(
+        (entry for entry in os.scandir(user_dir) if entry.name.endswith('.pdf')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in pdfs[keep:]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def stats():
+    values = counters.snapshot()
+    with _in_flight_lock:
+        values['in_flight'] = len(_in_flight)
+    return values
+
+
+register_metrics('pdf_reports', stats)
@@ -0,0 +1,189 @@
+"""
+Analitica de productividad vectorizada sobre las series diarias
+
+Las filas de ProductivityMetric de uno o muchos usuarios se cargan en una
+sola consulta y se vuelcan a matrices (usuarios x dias) de numpy; tasas
+moviles, rachas, perfil por dia de la semana y puntajes se calculan con
+operaciones sobre la matriz completa, sin bucles por usuario. Pensado para
+las vistas de cuidadores/terapeutas con cientos de pacientes.
+
+numpy se importa al calcular: la mayoria de los workers nunca lo usa.
+"""
+from datetime import date, timedelta
+from sqlalchemy import select
+from app import db
+from app.models.sync import ProductivityMetric
+from app.models.user import UserPermission
+from app.services.productivity_metrics import METRIC_FIELDS
+from app.services.report_service import (
+    COMPLETION_WEIGHT, ROUTINE_POINTS, REMINDER_POINTS, MAX_SCORE, SCORE_LEVELS, LOWEST_LEVEL
+)
+
+# Permisos que dan acceso a la analitica de otro usuario
+ANALYTICS_PERMISSIONS = ('view', 'report')
+
+
+def accessible_user_ids(viewer_id, user_ids):
+    """Subconjunto de user_ids que viewer_id puede ver (el mismo o con permiso activo)"""
+    requested = set(user_ids)
+    allowed = {viewer_id} & requested
+    if requested - allowed:
+        rows = db.session.execute(select(UserPermission.user_id).where(
+            UserPermission.granted_to_id == viewer_id,
+            UserPermission.is_active == True,
+            UserPermission.permission_type.in_(ANALYTICS_PERMISSIONS),
+            UserPermission.user_id.in_(requested - allowed)
+        ))
+        allowed.update(row[0] for row in rows)
+    return allowed
+
+
+def load_metric_matrix(user_ids, start, end):
+    """
+    Metricas diarias de los usuarios en [start, end] como matrices densas
+
+    Returns:
+        dict: {campo: ndarray (len(user_ids), dias)}; los dias sin fila
+        valen 0. Las filas siguen el orden de user_ids.
+    """
+    import numpy as np
+
+    table = ProductivityMetric.__table__
+    stmt = select(table.c.user_id, table.c.date, *(table.c[field] for field in METRIC_FIELDS)).where(
+        table.c.user_id.in_(user_ids),
+        table.c.date >= start,
+        table.c.date <= end
+    )
+    rows = db.session.execute(stmt).all()
+
+    days = (end - start).days + 1
+    matrix = {field: np.zeros((len(user_ids), days), dtype=np.int64) for field in METRIC_FIELDS}
+    if not rows:
+        return matrix
+
+    columns = list(zip(*rows))
+    order = np.argsort(user_ids)
+    positions = np.searchsorted(np.asarray(user_ids)[order], np.asarray(columns[0]))
+    user_index = order[positions]
+    # toordinal es bastante mas rapido que convertir los date a datetime64
+    day_index = np.fromiter(map(date.toordinal, columns[1]), np.int64, len(rows)) - start.toordinal()
+    for offset, field in enumerate(METRIC_FIELDS, start=2):
+        values = np.asarray([value or 0 for value in columns[offset]], dtype=np.int64)
+        matrix[field][user_index, day_index] = values
+    return matrix
+
+
+def productivity_scores(tasks_completed, tasks_created, routines_followed, reminders_acknowledged):
+    """calculate_productivity_score aplicado a vectores de totales (uno por usuario)"""
+    import numpy as np
+
+    created = tasks_created.astype(np.float64)
+    completion_rate = np.divide(tasks_completed, created, out=np.zeros_like(created), where=created > 0)
+    score = np.minimum(
+        completion_rate * COMPLETION_WEIGHT + routines_followed * ROUTINE_POINTS
+        + reminders_acknowledged * REMINDER_POINTS,
+        MAX_SCORE
+    )
+    level = np.select([score >= threshold for threshold, _ in SCORE_LEVELS],
+                      [name for _, name in SCORE_LEVELS], default=LOWEST_LEVEL)
+    return np.round(score, 2), np.round(completion_rate * 100, 2), level
+
+
+def rolling_completion_rate(tasks_completed, tasks_created, window):
+    """
+    Tasa de completitud (%) de los ultimos window dias para cada dia
+
+    Sumas moviles con cumsum sobre el eje de los dias; NaN donde la ventana
+    no tiene tareas creadas.
+    """
+    import numpy as np
+
+    def window_sums(values):
+        cumulative = np.cumsum(values, axis=1)
+        shifted = np.zeros_like(cumulative)
+        shifted[:, window:] = cumulative[:, :-window]
+        return cumulative - shifted
+
+    completed = window_sums(tasks_completed)
+    created = window_sums(tasks_created).astype(np.float64)
+    rate = np.divide(completed * 100, created, out=np.full_like(created, np.nan), where=created > 0)
+    return np.round(rate, 2)
+
+
+def streaks(active):
+    """
+    Racha actual (hasta el ultimo dia) y mas larga de dias activos por fila
+
+    El largo de la racha en cada dia es el acumulado de dias activos menos
+    el acumulado en el ultimo dia inactivo (maximum.accumulate).
+    """
+    import numpy as np
+
+    cumulative = np.cumsum(active, axis=1)
+    last_reset = np.maximum.accumulate(np.where(active, 0, cumulative), axis=1)
+    run = cumulative - last_reset
+    return run[:, -1], run.max(axis=1)
+
+
+def weekday_profile(values, start):
+    """Promedio por dia de la semana (lunes a domingo) de cada fila"""
+    import numpy as np
+
+    weekdays = (start.weekday() + np.arange(values.shape[1])) % 7
+    one_hot = np.eye(7, dtype=np.float64)[weekdays]
+    counts = one_hot.sum(axis=0)
+    return np.divide(values @ one_hot, counts, out=np.zeros((values.shape[0], 7)), where=counts > 0)
+
+
+def cohort_analytics(user_ids, start, end, window=7):
+    """
+    Analitica de [start, end] para todos los usuarios en una pasada
+
+    Se cargan ademas los window - 1 dias previos a start para que la tasa
+    movil de los primeros dias tenga la ventana completa. Las rachas cuentan
+    dias con al menos una tarea completada dentro del rango.
+
+    Returns:
+        dict: {'dates': [...], 'users': [{user_id, totals, productivity_score,
+        streaks, weekday_profile, rolling_completion_rate}, ...]}
+    """
+    import numpy as np
+
+    user_ids = list(user_ids)
+    loaded = load_metric_matrix(user_ids, start - timedelta(days=window - 1), end)
+    matrix = {field: values[:, window - 1:] for field, values in loaded.items()}
+
+    totals = {field: values.sum(axis=1) for field, values in matrix.items()}
+    score, completion_rate, level = productivity_scores(
+        totals['tasks_completed'], totals['tasks_created'],
+        totals['routines_followed'], totals['reminders_acknowledged']
+    )
+    rolling = rolling_completion_rate(loaded['tasks_completed'], loaded['tasks_created'], window)[:, window - 1:]
+    rolling = np.where(np.isnan(rolling), None, rolling)
+    current_streak, longest_streak = streaks(matrix['tasks_completed'] > 0)
+    profile = np.round(weekday_profile(matrix['tasks_completed'], start), 2)
+
+    # Conversion a tipos de Python por columna (tolist) y no por celda
+    totals = {field: values.tolist() for field, values in totals.items()}
+    columns = zip(
+        user_ids, score.tolist(), completion_rate.tolist(), level.tolist(),
+        current_streak.tolist(), longest_streak.tolist(), profile.tolist(), rolling.tolist()
+    )
+    users = [
+        {
+            'user_id': user_id,
+            'totals': {field: totals[field][i] for field in METRIC_FIELDS},
+            'productivity_score': {'score': user_score, 'completion_rate': user_rate, 'level': user_level},
+            'streaks': {'current': current, 'longest': longest},
+            'weekday_profile': user_profile,
+            'rolling_completion_rate': user_rolling
+        }
+        for i, (user_id, user_score, user_rate, user_level, current, longest, user_profile, user_rolling)
+        in enumerate(columns)
+    ]
+    days = (end - start).days + 1
+    return {
+        'dates': [(start + timedelta(days=d)).isoformat() for d in range(days)],
+        'window': window,
+        'users': users
+    }
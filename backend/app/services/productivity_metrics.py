@@ -0,0 +1,247 @@
+"""
+Metricas de productividad mantenidas al escribir
+
+Cada evento (tarea creada, completada, recordatorio reconocido) suma a la
+fila diaria de ProductivityMetric y a los acumulados semanal y mensual de
+ProductivityRollup con upserts atomicos (col = col + delta), en la misma
+transaccion que la escritura. Las lecturas de un rango combinan meses,
+semanas y dias completos: O(periodos) en lugar de O(eventos).
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, union_all
+from app import db
+from app.models.sync import ProductivityMetric, ProductivityRollup, ReminderLog
+from app.models.task import Task
+from app.utils.sql import dialect_insert
+
+METRIC_FIELDS = ('tasks_completed', 'tasks_created', 'routines_followed',
+                 'reminders_acknowledged', 'total_focus_time')
+PERIODS = ('week', 'month')
+
+
+def period_start(day, period):
+    """Lunes de la semana o dia 1 del mes"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, period):
+    """Ultimo dia del periodo que empieza en start"""
+    if period == 'week':
+        return start + timedelta(days=6)
+    following = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return following - timedelta(days=1)
+
+
+def _day(at):
+    return at.date() if isinstance(at, datetime) else at or datetime.utcnow().date()
+
+
+def record(user_id, field, amount=1, at=None):
+    """Suma amount al contador del dia de at (por defecto hoy, UTC como los timestamps)"""
+    record_events([(user_id, _day(at), field, amount)])
+
+
+def record_events(events):
+    """
+    Aplica muchos eventos (user_id, dia, campo, delta) en dos executemany
+
+    Los deltas se agrupan antes por usuario y dia (y por periodo para los
+    acumulados), asi que un lote de N tareas es una fila por usuario.
+    Corre en la transaccion actual (el commit lo hace quien llama).
+    """
+    daily = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+    rollups = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+    for user_id, day, field, amount in events:
+        if not amount:
+            continue
+        daily[(user_id, day)][field] += amount
+        for period in PERIODS:
+            rollups[(user_id, period, period_start(day, period))][field] += amount
+
+    if not daily:
+        return
+
+    # Orden fijo de filas: dos transacciones concurrentes bloquean en el mismo orden
+    _increment(ProductivityMetric.__table__, ['user_id', 'date'], [
+        {'user_id': user_id, 'date': day, **values}
+        for (user_id, day), values in sorted(daily.items())
+    ])
+    _increment(ProductivityRollup.__table__, ['user_id', 'period', 'period_start'], [
+        {'user_id': user_id, 'period': period, 'period_start': start, **values}
+        for (user_id, period, start), values in sorted(rollups.items())
+    ])
+
+
+def _increment(table, keys, rows):
+    stmt = dialect_insert(db.session.get_bind(), table)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={field: func.coalesce(table.c[field], 0) + stmt.excluded[field] for field in METRIC_FIELDS}
+    ), rows)
+
+
+def completion_events(user_id, previous_completed_at, completed_at):
+    """Eventos de un cambio de estado: se descuenta la completada anterior y se suma la nueva"""
+    events = []
+    if previous_completed_at:
+        events.append((user_id, _day(previous_completed_at), 'tasks_completed', -1))
+    if completed_at:
+        events.append((user_id, _day(completed_at), 'tasks_completed', 1))
+    return events
+
+
+def split_range(start, end):
+    """
+    Cubre [start, end] con meses completos, luego semanas completas y dias sueltos
+
+    Returns:
+        tuple: (inicios de mes, inicios de semana, dias)
+    """
+    months, weeks, days = [], [], []
+    cursor = start
+    while cursor <= end:
+        if cursor.day == 1 and period_end(cursor, 'month') <= end:
+            months.append(cursor)
+            cursor = period_end(cursor, 'month') + timedelta(days=1)
+        elif cursor.weekday() == 0 and cursor + timedelta(days=6) <= end:
+            weeks.append(cursor)
+            cursor += timedelta(days=7)
+        else:
+            days.append(cursor)
+            cursor += timedelta(days=1)
+    return months, weeks, days
+
+
+def metric_totals(user_id, start, end):
+    """Totales del rango en una consulta sobre a lo sumo ~12 filas por año mas bordes"""
+    months, weeks, days = split_range(start, end)
+    rollup = ProductivityRollup.__table__
+    daily = ProductivityMetric.__table__
+
+    parts = []
+    for period, starts in (('month', months), ('week', weeks)):
+        if starts:
+            parts.append(select(*(rollup.c[field] for field in METRIC_FIELDS)).where(
+                rollup.c.user_id == user_id,
+                rollup.c.period == period,
+                rollup.c.period_start.in_(starts)
+            ))
+    if days:
+        parts.append(select(*(daily.c[field] for field in METRIC_FIELDS)).where(
+            daily.c.user_id == user_id,
+            daily.c.date.in_(days)
+        ))
+
+    totals = dict.fromkeys(METRIC_FIELDS, 0)
+    if not parts:
+        return totals
+    rows = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    stmt = select(*(func.coalesce(func.sum(rows.c[field]), 0).label(field) for field in METRIC_FIELDS))
+    totals.update(db.session.execute(stmt).one()._mapping)
+    return totals
+
+
+def metric_series(user_id, start, end, granularity='day'):
+    """Filas del rango por dia, semana o mes (las que tienen datos), en orden de fecha"""
+    if granularity == 'day':
+        rows = ProductivityMetric.query.filter(
+            ProductivityMetric.user_id == user_id,
+            ProductivityMetric.date >= start,
+            ProductivityMetric.date <= end
+        ).order_by(ProductivityMetric.date).all()
+    else:
+        rows = ProductivityRollup.query.filter(
+            ProductivityRollup.user_id == user_id,
+            ProductivityRollup.period == granularity,
+            ProductivityRollup.period_start >= period_start(start, granularity),
+            ProductivityRollup.period_start <= end
+        ).order_by(ProductivityRollup.period_start).all()
+    return [row.to_dict() for row in rows]
+
+
+def rebuild_metrics(start, end, user_id=None):
+    """
+    Recalcula desde las tareas y recordatorios los contadores de [start, end]
+
+    Para el backfill tras la migracion o para reparar desvios: reescribe
+    tasks_created, tasks_completed y reminders_acknowledged de las filas
+    diarias y despues los acumulados de las semanas y meses que tocan el
+    rango. routines_followed y total_focus_time no salen de eventos y se
+    conservan. Devuelve el numero de filas diarias escritas.
+    """
+    range_start = datetime.combine(start, datetime.min.time())
+    range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    sources = [
+        ('tasks_created', Task.user_id, Task.created_at, None),
+        ('tasks_completed', Task.user_id, Task.completed_at, Task.status == 'completed'),
+        ('reminders_acknowledged', ReminderLog.user_id, ReminderLog.acknowledged_at,
+         ReminderLog.was_acknowledged == True),
+    ]
+    counts = defaultdict(dict)
+    for field, user_column, at_column, condition in sources:
+        day = func.date(at_column)
+        query = select(user_column, day, func.count()).where(at_column >= range_start, at_column < range_end)
+        if condition is not None:
+            query = query.where(condition)
+        if user_id is not None:
+            query = query.where(user_column == user_id)
+        for row_user, row_day, count in db.session.execute(query.group_by(user_column, day)):
+            row_day = date.fromisoformat(row_day) if isinstance(row_day, str) else row_day
+            counts[(row_user, row_day)][field] = count
+
+    # Dias del rango sin eventos: a cero (si tenian fila)
+    existing = select(ProductivityMetric.user_id, ProductivityMetric.date).where(
+        ProductivityMetric.date >= start, ProductivityMetric.date <= end
+    )
+    if user_id is not None:
+        existing = existing.where(ProductivityMetric.user_id == user_id)
+    for row_user, row_day in db.session.execute(existing):
+        counts.setdefault((row_user, row_day), {})
+
+    event_fields = [field for field, _, _, _ in sources]
+    rows = [
+        {'user_id': row_user, 'date': row_day, **{field: values.get(field, 0) for field in event_fields}}
+        for (row_user, row_day), values in sorted(counts.items())
+    ]
+    if rows:
+        table = ProductivityMetric.__table__
+        stmt = dialect_insert(db.session.get_bind(), table)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.date],
+            set_={field: stmt.excluded[field] for field in event_fields}
+        ), rows)
+
+    _rebuild_rollups(start, end, user_id)
+    return len(rows)
+
+
+def _rebuild_rollups(start, end, user_id=None):
+    """Acumulados de los periodos que tocan [start, end], sumados desde las filas diarias"""
+    rollup = ProductivityRollup.__table__
+    daily = ProductivityMetric.__table__
+    for period in PERIODS:
+        first = period_start(start, period)
+        last = period_end(period_start(end, period), period)
+
+        delete = rollup.delete().where(
+            rollup.c.period == period, rollup.c.period_start >= first, rollup.c.period_start <= last
+        )
+        query = select(daily).where(daily.c.date >= first, daily.c.date <= last)
+        if user_id is not None:
+            delete = delete.where(rollup.c.user_id == user_id)
+            query = query.where(daily.c.user_id == user_id)
+        db.session.execute(delete)
+
+        sums = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+        for row in db.session.execute(query).mappings():
+            values = sums[(row['user_id'], period_start(row['date'], period))]
+            for field in METRIC_FIELDS:
+                values[field] += row[field] or 0
+        if sums:
+            db.session.execute(rollup.insert(), [
+                {'user_id': row_user, 'period': period, 'period_start': row_start, **values}
+                for (row_user, row_start), values in sorted(sums.items())
+            ])
@@ -0,0 +1,68 @@
+"""Contenedor de servicios de la app: una instancia por proceso, creada al primer uso"""
+import os
+import threading
+
+
+class ServiceRegistry:
+    """
+    Registro de servicios compartidos (IA, Speech, rutinas, ...)
+
+    Cada servicio se construye una sola vez por proceso la primera vez que
+    se pide, asi que sus caches, pools HTTP y circuit breakers se comparten
+    entre todas las peticiones del worker. Si el proceso se bifurca (Gunicorn
+    con preload_app) las instancias del padre se descartan y el hijo crea
+    las suyas.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._factories = {}
+        self._warmups = {}
+        self._instances = {}
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['services'] = self
+
+    def register(self, name, factory, warmup=None):
+        """
+        Registra factory() como constructor del servicio name
+
+        warmup(instancia) se llama en warm_up(); por defecto se usa el
+        metodo warm_up() del servicio si lo tiene.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._warmups[name] = warmup
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        """Instancia del servicio en este proceso (la crea si hace falta)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._instances = {}
+                self._pid = os.getpid()
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Servicio no registrado: {name}")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def warm_up(self, *names):
+        """Construye los servicios (todos por defecto) y ejecuta sus hooks de calentamiento"""
+        for name in names or list(self._factories):
+            instance = self.get(name)
+            hook = self._warmups.get(name)
+            if hook is not None:
+                hook(instance)
+            elif hasattr(instance, 'warm_up'):
+                instance.warm_up()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'registered': sorted(self._factories),
+                'instantiated': sorted(self._instances) if self._pid == os.getpid() else []
+            }
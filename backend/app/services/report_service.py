@@ -1,34 +1,85 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from io import BytesIO
+import csv
+import io
+import tempfile
 from datetime import datetime
-import pandas as pd
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import select
+
+# reportlab y openpyxl se importan al generar el reporte: son pesados y la
+# mayoria de los workers nunca los usa
+
+# Columnas de las exportaciones de tareas (mismas claves que Task.to_dict)
+EXPORT_FIELDS = [
+    'id', 'user_id', 'title', 'body', 'priority', 'due_date',
+    'status', 'processing_error', 'completed_at', 'created_at',
+    'medication_id', 'scheduled_at'
+]
+
+# Puntaje de productividad: peso de la tasa de completitud y puntos por
+# rutina seguida y por recordatorio atendido (tope 100). Tambien los usa la
+# version vectorizada de productivity_analytics
+COMPLETION_WEIGHT = 40
+ROUTINE_POINTS = 2
+REMINDER_POINTS = 1
+MAX_SCORE = 100
+# Umbrales de nivel, de mayor a menor; por debajo del ultimo es 'Bajo'
+SCORE_LEVELS = ((80, 'Excelente'), (60, 'Bueno'), (40, 'Moderado'))
+LOWEST_LEVEL = 'Bajo'
+
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """
+    Estilos del PDF, creados una vez por proceso
+    
+    Los ParagraphStyle/TableStyle no se modifican al construir el documento,
+    asi que todos los reportes (y los hilos que los generan) los comparten.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+    
+    sample = getSampleStyleSheet()
+    return {
+        'sample': sample,
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#2E3B4E')
+        ),
+        'metrics_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+    }
 
 class ReportService:
     """Servicio para generacion de reportes"""
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
+    @property
+    def styles(self):
+        return pdf_styles()['sample']
     
     def generate_pdf_report(self, user, metrics, tasks, routines):
         """Generar reporte en PDF"""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+        
         try:
-            buffer = BytesIO()
+            buffer = io.BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=letter)
             story = []
             
             # Titulo
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=self.styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#2E3B4E')
-            )
-            
-            story.append(Paragraph(f"Reporte de Productividad - {user.full_name}", title_style))
+            story.append(Paragraph(f"Reporte de Productividad - {user.full_name}", pdf_styles()['title']))
             story.append(Spacer(1, 0.3*inch))
             
             # Fecha
@@ -52,16 +103,7 @@ class ReportService:
             ]
             
             metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
-            metrics_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            metrics_table.setStyle(pdf_styles()['metrics_table'])
             
             story.append(metrics_table)
             story.append(Spacer(1, 0.3*inch))
@@ -83,10 +125,8 @@ class ReportService:
             story.append(Spacer(1, 0.1*inch))
             
             for routine in routines:
-                if routine['is_active']:
-                    routine_text = f"- {routine['name']} ({routine['frequency']})"
-                    story.append(Paragraph(routine_text, self.styles['Normal']))
-                    story.append(Spacer(1, 0.05*inch))
+                story.append(Paragraph(f"- {routine['cuerpo']}", self.styles['Normal']))
+                story.append(Spacer(1, 0.05*inch))
             
             # Generar PDF
             doc.build(story)
@@ -98,28 +138,61 @@ class ReportService:
             print(f"Error al generar PDF: {str(e)}")
             return None
     
-    def generate_csv_report(self, tasks, metrics):
-        """Generar reporte en CSV"""
-        try:
-            # Crear DataFrame de tareas
-            tasks_df = pd.DataFrame(tasks)
-            
-            # Crear DataFrame de metricas
-            metrics_df = pd.DataFrame([metrics])
-            
-            # Generar CSV
-            buffer = BytesIO()
-            
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                tasks_df.to_excel(writer, sheet_name='Tareas', index=False)
-                metrics_df.to_excel(writer, sheet_name='Metricas', index=False)
-            
+    def stream_tasks_csv(self, user_id, batch_size=None):
+        """
+        CSV de todas las tareas del usuario, generado por lotes
+        
+        Devuelve un generador de fragmentos de texto: la cabecera sale de
+        inmediato y cada lote leido del cursor se escribe y se entrega antes
+        de leer el siguiente, asi la memoria no depende del numero de tareas.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+        
+        for batch in self._task_batches(user_id, batch_size):
             buffer.seek(0)
-            return buffer
-            
-        except Exception as e:
-            print(f"Error al generar CSV: {str(e)}")
-            return None
+            buffer.truncate()
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in batch
+            )
+            yield buffer.getvalue()
+    
+    def write_tasks_xlsx(self, user_id, metrics, batch_size=None):
+        """
+        XLSX (hojas Tareas y Metricas) con openpyxl en modo write_only
+        
+        Las filas se vuelcan a disco a medida que se agregan; el libro se
+        escribe en un archivo temporal que se devuelve abierto al inicio
+        para enviarlo por partes. Memoria constante salvo el lote en curso.
+        """
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        tasks_sheet = workbook.create_sheet('Tareas')
+        tasks_sheet.append(EXPORT_FIELDS)
+        for batch in self._task_batches(user_id, batch_size):
+            for row in batch:
+                tasks_sheet.append(list(row))
+        
+        metrics_sheet = workbook.create_sheet('Metricas')
+        metrics_sheet.append(list(metrics))
+        metrics_sheet.append(list(metrics.values()))
+        
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return output
+    
+    def _task_batches(self, user_id, batch_size=None):
+        from app.models.task import Task
+        from app.utils.sql import iter_partitions
+        
+        table = Task.__table__
+        stmt = select(*(table.c[field] for field in EXPORT_FIELDS)).where(table.c.user_id == user_id)
+        return iter_partitions(stmt, table.c.id, batch_size or current_app.config['EXPORT_BATCH_SIZE'])
     
     def calculate_productivity_score(self, metrics):
         """Calcular puntaje de productividad"""
@@ -134,10 +207,11 @@ class ReportService:
             completion_rate = tasks_completed / tasks_created if tasks_created > 0 else 0
             
             # Puntaje base
-            score = (completion_rate * 40) + (routines_followed * 2) + (reminders_acknowledged * 1)
+            score = (completion_rate * COMPLETION_WEIGHT + routines_followed * ROUTINE_POINTS
+                     + reminders_acknowledged * REMINDER_POINTS)
             
             # Normalizar a 100
-            score = min(score, 100)
+            score = min(score, MAX_SCORE)
             
             return {
                 'score': round(score, 2),
@@ -147,15 +221,11 @@ class ReportService:
             
         except Exception as e:
             print(f"Error al calcular score: {str(e)}")
-            return {'score': 0, 'completion_rate': 0, 'level': 'Bajo'}
+            return {'score': 0, 'completion_rate': 0, 'level': LOWEST_LEVEL}
     
     def _get_productivity_level(self, score):
         """Determinar nivel de productividad"""
-        if score >= 80:
-            return 'Excelente'
-        elif score >= 60:
-            return 'Bueno'
-        elif score >= 40:
-            return 'Moderado'
-        else:
-            return 'Bajo'
+        for threshold, level in SCORE_LEVELS:
+            if score >= threshold:
+                return level
+        return LOWEST_LEVEL
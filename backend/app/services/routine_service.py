@@ -0,0 +1,182 @@
+"""Generacion incremental de rutinas: solo se envian al modelo las tareas nuevas o modificadas"""
+from datetime import datetime
+from app import db
+from app.models.task import Task
+from app.models.routine import RoutineSuggestion, RoutineState
+from app.services.ai_cache import make_cache_key
+from app.services.singleflight import ai_flight
+from app.utils.sql import dialect_insert
+
+PRIORITY_ORDER = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Campos de la tarea que, si cambian, invalidan su sugerencia
+FINGERPRINT_FIELDS = ('title', 'body', 'priority', 'due_date', 'status')
+
+
+def task_fingerprint(task_data):
+    """Huella de los campos de la tarea que se envian al modelo"""
+    return make_cache_key(*(task_data.get(field) for field in FINGERPRINT_FIELDS))
+
+
+def routine_sort_key(task):
+    """
+    Urgentes primero, luego por fecha de vencimiento (sin fecha al final)
+    
+    Orden unico de las rutinas (prompt, fallback y respuesta); acepta tareas
+    del modelo o diccionarios de to_dict (fecha como datetime o ISO).
+    """
+    if isinstance(task, dict):
+        priority, due_date, task_id = task.get('priority'), task.get('due_date'), task['id']
+    else:
+        priority, due_date, task_id = task.priority, task.due_date, task.id
+    # Las fechas solo se comparan entre tareas que tienen fecha
+    return (PRIORITY_ORDER.get(priority, 2), due_date is None, due_date or '', task_id)
+
+
+class RoutineService:
+    """Sirve las rutinas desde la base de datos y regenera solo lo que cambio"""
+    
+    def __init__(self, gemini_service):
+        self.gemini_service = gemini_service
+    
+    def get_routines(self, user_id):
+        """
+        Devuelve (rutinas, version, completo) para las tareas pendientes del usuario
+        
+        completo es False si alguna rutina salio del fallback (no se guarda y
+        la siguiente peticion puede traer otra), asi que no debe cachearse.
+        
+        Las peticiones concurrentes con el mismo conjunto de tareas pendientes
+        se coalescen con single-flight: la primera llama al modelo y las demas
+        reciben su resultado (o, desde otro worker, lo leen ya guardado).
+        """
+        tasks = Task.query.filter_by(user_id=user_id, status="pending").all()
+        fingerprints = {task.id: task_fingerprint(task.to_dict()) for task in tasks}
+        
+        served = self._serve_stored(user_id, tasks, fingerprints)
+        if served is not None:
+            return served
+        
+        key = f"routines:{user_id}:{make_cache_key(sorted(fingerprints.items()))}"
+        return ai_flight.do(
+            key,
+            lambda: self._regenerate(user_id, tasks, fingerprints),
+            lookup=lambda: self._serve_stored(user_id, tasks, fingerprints, refresh=True)
+        )
+    
+    def _serve_stored(self, user_id, tasks, fingerprints, refresh=False):
+        """(rutinas, version, True) si todas las tareas tienen sugerencia vigente, si no None"""
+        suggestions = self._load_suggestions(user_id, refresh=refresh)
+        if self._stale_tasks(tasks, fingerprints, suggestions):
+            return None
+        
+        state = db.session.get(RoutineState, user_id, populate_existing=refresh)
+        return self._merge(tasks, suggestions, {}), state.version if state else 0, True
+    
+    def _regenerate(self, user_id, tasks, fingerprints):
+        """Envia al modelo solo las tareas sin sugerencia vigente y guarda el resultado"""
+        try:
+            suggestions = self._load_suggestions(user_id, refresh=True)
+            stale = self._stale_tasks(tasks, fingerprints, suggestions)
+            generated = self._generate(stale)
+            
+            state = self._lock_state(user_id)
+            if generated:
+                # Otra peticion pudo guardar sugerencias mientras se esperaba al modelo
+                suggestions = self._load_suggestions(user_id, refresh=True)
+                state.version += 1
+                state.generated_at = datetime.utcnow()
+                # Las sugerencias de tareas que ya no estan pendientes se borran:
+                # la tabla no crece y no reaparecen si la tarea se reabre
+                for task_id in [task_id for task_id in suggestions if task_id not in fingerprints]:
+                    db.session.delete(suggestions.pop(task_id))
+                for task in stale:
+                    cuerpo = generated.get(task.id)
+                    if cuerpo is None:
+                        continue
+                    suggestion = suggestions.get(task.id)
+                    if suggestion is None:
+                        suggestion = RoutineSuggestion(user_id=user_id, task_id=task.id)
+                        db.session.add(suggestion)
+                        suggestions[task.id] = suggestion
+                    suggestion.fingerprint = fingerprints[task.id]
+                    suggestion.cuerpo = cuerpo
+                    suggestion.generation = state.version
+            
+            # Las tareas que el modelo no devolvio se sirven con el fallback sin guardarse
+            missing = [task.to_dict() for task in stale if task.id not in generated]
+            if self.gemini_service.provider:
+                missing = self.gemini_service.routine_fallback(missing)
+            else:
+                missing = self.gemini_service.generate_routine_suggestions(missing)
+            fallback = {item['id_tarea']: item['cuerpo'] for item in missing}
+            
+            # Antes del commit: despues las tareas expiran y se recargarian una a una
+            result = self._merge(tasks, suggestions, fallback), state.version, not fallback
+            db.session.commit()
+            
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return result
+    
+    def _load_suggestions(self, user_id, refresh=False):
+        query = RoutineSuggestion.query.filter_by(user_id=user_id)
+        if refresh:
+            query = query.populate_existing()
+        return {suggestion.task_id: suggestion for suggestion in query.all()}
+    
+    def _stale_tasks(self, tasks, fingerprints, suggestions):
+        return [
+            task for task in tasks
+            if task.id not in suggestions or suggestions[task.id].fingerprint != fingerprints[task.id]
+        ]
+    
+    def _lock_state(self, user_id):
+        """Crea la fila de estado si no existe y la bloquea para incrementar la version"""
+        table = RoutineState.__table__
+        stmt = dialect_insert(db.session.get_bind(), table).values(user_id=user_id, version=0)
+        db.session.execute(stmt.on_conflict_do_nothing(index_elements=[table.c.user_id]))
+        
+        return RoutineState.query.filter_by(user_id=user_id).populate_existing().with_for_update().one()
+    
+    def _generate(self, stale):
+        """Llama al modelo solo con las tareas pendientes de sugerencia -> {task_id: cuerpo}"""
+        if not self.gemini_service.provider:
+            return {}
+        
+        try:
+            result = self.gemini_service.generate_routine_suggestions(
+                [task.to_dict() for task in stale],
+                fallback=False
+            )
+        except Exception:
+            return {}
+        
+        ids = {task.id for task in stale}
+        ids_by_title = {task.title: task.id for task in stale}
+        generated = {}
+        for item in result if isinstance(result, list) else []:
+            if not isinstance(item, dict) or not item.get('cuerpo'):
+                continue
+            task_id = item.get('id_tarea')
+            try:
+                task_id = int(task_id)
+            except (TypeError, ValueError):
+                task_id = ids_by_title.get(task_id)
+            if task_id in ids:
+                generated[task_id] = str(item['cuerpo'])
+        return generated
+    
+    def _merge(self, tasks, suggestions, fallback):
+        routines = []
+        for task in sorted(tasks, key=routine_sort_key):
+            if task.id in fallback:
+                cuerpo = fallback[task.id]
+            elif task.id in suggestions:
+                cuerpo = suggestions[task.id].cuerpo
+            else:
+                continue
+            routines.append({'id_tarea': task.id, 'cuerpo': cuerpo})
+        return routines
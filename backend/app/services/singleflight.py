@@ -0,0 +1,135 @@
+"""Single-flight: peticiones concurrentes identicas comparten una sola llamada a la IA"""
+import copy
+import hashlib
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from flask import current_app, has_app_context
+from sqlalchemy import text
+from app.utils.metrics import Counters, register_metrics
+
+
+def advisory_lock_id(key):
+    """Entero de 64 bits con signo para pg_advisory_lock"""
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big', signed=True)
+
+
+class SingleFlight:
+    """
+    Coalescencia de llamadas por clave
+
+    - Dentro del worker: los hilos con la misma clave esperan el resultado
+      del primero (lider) en lugar de repetir la llamada.
+    - Entre workers: en PostgreSQL, y solo si se pasa lookup, el lider toma
+      un advisory lock sobre la clave. Quien tuvo que esperar el lock
+      consulta lookup() antes de ejecutar, porque otro proceso probablemente
+      ya guardo el resultado (cache compartida, tabla de sugerencias, ...).
+      El lock ocupa una conexion extra del pool durante toda la llamada, asi
+      que sin un lookup que pueda ver el resultado de otro worker no se toma.
+      En otros motores, o detras de PgBouncer (DB_PGBOUNCER: en modo
+      transaction un lock de sesion quedaria en una conexion del servidor
+      que reusan otros clientes), solo aplica la parte local.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counters = Counters(
+            'calls', 'executed', 'deduplicated_local', 'deduplicated_remote', 'lock_waits'
+        )
+
+    def do(self, key, fn, lookup=None):
+        """Ejecuta fn() una sola vez por clave en vuelo y devuelve su resultado"""
+        self.counters.incr('calls')
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not is_leader:
+            self.counters.incr('deduplicated_local')
+            return copy.deepcopy(future.result())
+
+        try:
+            with self._process_lock(key, enabled=lookup is not None) as waited:
+                result = lookup() if (waited and lookup) else None
+                if result is not None:
+                    self.counters.incr('deduplicated_remote')
+                else:
+                    result = fn()
+                    self.counters.incr('executed')
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        stats = self.counters.snapshot()
+        with self._lock:
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+    @contextmanager
+    def _process_lock(self, key, enabled=True):
+        """
+        Advisory lock de PostgreSQL sobre una conexion dedicada
+
+        Produce True si otro proceso tenia el lock y hubo que esperarlo.
+        """
+        conn = self._lock_connection() if enabled else None
+        if conn is None:
+            yield False
+            return
+
+        lock_id = advisory_lock_id(key)
+        try:
+            waited = not conn.execute(
+                text('SELECT pg_try_advisory_lock(:id)'), {'id': lock_id}
+            ).scalar()
+            if waited:
+                self.counters.incr('lock_waits')
+                conn.execute(text('SELECT pg_advisory_lock(:id)'), {'id': lock_id})
+            conn.commit()
+        except Exception as e:
+            print(f"Error tomando advisory lock, se usa solo el lock local: {str(e)}")
+            conn.close()
+            conn = None
+
+        if conn is None:
+            yield False
+            return
+
+        try:
+            yield waited
+        finally:
+            try:
+                conn.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': lock_id})
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _lock_connection(self):
+        if not has_app_context():
+            return None
+
+        from app import db
+
+        if db.engine.dialect.name != 'postgresql' or current_app.config.get('DB_PGBOUNCER'):
+            return None
+        try:
+            return db.engine.connect()
+        except Exception as e:
+            print(f"Error conectando para advisory lock: {str(e)}")
+            return None
+
+
+# Instancia compartida por los servicios de IA del worker
+ai_flight = SingleFlight()
+register_metrics('singleflight', ai_flight.stats)
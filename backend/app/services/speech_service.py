@@ -3,15 +3,42 @@ import os
 import base64
 import wave
 import io
-from google.cloud import speech_v1
-from google.oauth2 import service_account
+import math
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from config import Config
+from app.services.http_client import ResilientHttpClient, CircuitBreaker
+from app.utils.metrics import register_metrics
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Session keep-alive compartida por todas las llamadas a Speech del worker
+speech_http = ResilientHttpClient(
+    'speech',
+    pool_size=Config.SPEECH_HTTP_POOL_SIZE,
+    connect_timeout=Config.SPEECH_CONNECT_TIMEOUT,
+    read_timeout=Config.SPEECH_READ_TIMEOUT,
+    max_retries=Config.SPEECH_MAX_RETRIES,
+    backoff_base=Config.SPEECH_BACKOFF_BASE,
+    backoff_max=Config.SPEECH_BACKOFF_MAX,
+    deadline=Config.SPEECH_HTTP_DEADLINE,
+    breaker=CircuitBreaker(
+        failure_threshold=Config.SPEECH_BREAKER_THRESHOLD,
+        reset_timeout=Config.SPEECH_BREAKER_RESET_SECONDS
+    )
+)
+register_metrics('speech_http', speech_http.stats)
 
 
 class SpeechService:
     """Servicio para transcribir audio a texto usando Google Cloud Speech-to-Text"""
     
-    def __init__(self):
+    def __init__(self, recognizer=None):
         # Configurar credenciales desde la API key
         self.api_key = Config.SPEECH_API_KEY
         
@@ -23,6 +50,20 @@ class SpeechService:
         else:
             self.client = None
             self.use_rest_api = False
+        
+        # Reconocedor por ventana: REST API o uno inyectado (stub en pruebas)
+        if recognizer is None and self.api_key:
+            recognizer = RestSpeechRecognizer(self.api_key)
+        self.recognizer = recognizer
+        
+        # Transcripcion por ventanas con memoria acotada
+        self.window_seconds = Config.SPEECH_STREAM_WINDOW_SECONDS
+        self.max_in_flight = max(Config.SPEECH_STREAM_MAX_IN_FLIGHT, 1)
+    
+    def warm_up(self):
+        """Crea el pool HTTP keep-alive de este proceso antes de la primera peticion"""
+        if self.recognizer is not None:
+            speech_http.session
     
     def detect_audio_format(self, audio_content):
         """
@@ -39,135 +80,84 @@ class SpeechService:
         else:
             return 'unknown'
     
-    def convert_m4a_to_wav(self, audio_content):
+    def transcribe_audio(self, audio_content, language_code="es-MX"):
         """
-        Convierte audio M4A a formato WAV
+        Transcribe audio a texto
         
-        Returns:
-            bytes: Audio en formato WAV
-        """
-        try:
-            from pydub import AudioSegment
-            
-            # Cargar M4A desde bytes
-            audio_buffer = io.BytesIO(audio_content)
-            audio = AudioSegment.from_file(audio_buffer, format="m4a")
-            
-            # Configurar para Speech-to-Text (16kHz, mono, 16-bit)
-            audio = audio.set_frame_rate(16000)
-            audio = audio.set_channels(1)
-            audio = audio.set_sample_width(2)  # 16-bit
-            
-            # Exportar a WAV
-            wav_buffer = io.BytesIO()
-            audio.export(wav_buffer, format="wav")
-            wav_buffer.seek(0)
-            
-            return wav_buffer.read()
-            
-        except ImportError:
-            raise Exception("pydub no está instalado. Ejecuta: pip install pydub")
-        except Exception as e:
-            raise Exception(f"Error convirtiendo M4A a WAV: {str(e)}")
-    
-    def get_wav_info(self, audio_content):
-        """
-        Extrae información del archivo WAV
+        Args:
+            audio_content: bytes del archivo de audio (WAV o M4A)
+            language_code: Código de idioma (default: es-MX para español de México)
         
         Returns:
-            dict: {'sample_rate': int, 'channels': int}
+            str: Texto transcrito del audio
         """
-        try:
-            # Crear un buffer de bytes
-            audio_buffer = io.BytesIO(audio_content)
-            
-            # Abrir como archivo WAV
-            with wave.open(audio_buffer, 'rb') as wav_file:
-                sample_rate = wav_file.getframerate()
-                channels = wav_file.getnchannels()
-                
-                return {
-                    'sample_rate': sample_rate,
-                    'channels': channels
-                }
-        except Exception as e:
-            # Si no es un WAV válido, usar valores por defecto
-            return {
-                'sample_rate': 16000,
-                'channels': 1
-            }
+        return self.transcribe_stream(io.BytesIO(audio_content), language_code)
     
-    def transcribe_audio(self, audio_content, language_code="es-MX"):
+    def transcribe_stream(self, stream, language_code="es-MX"):
         """
-        Transcribe audio a texto
+        Transcribe audio leyendolo por ventanas desde un stream
+        
+        El audio se corta en ventanas de SPEECH_STREAM_WINDOW_SECONDS (ajustando
+        el corte al silencio mas cercano), las ventanas se transcriben en
+        paralelo y los textos se concatenan en orden. Como mucho hay
+        SPEECH_STREAM_MAX_IN_FLIGHT ventanas en memoria, asi que el consumo no
+        depende de la duracion del archivo.
         
         Args:
-            audio_content: bytes del archivo de audio (WAV o M4A)
-            language_code: Código de idioma (default: es-MX para español de México)
+            stream: objeto tipo archivo (upload de Flask, archivo abierto, BytesIO)
+            language_code: Código de idioma
         
         Returns:
             str: Texto transcrito del audio
         """
-        if not self.api_key:
+        if not self.recognizer:
             raise Exception("SPEECH_API_KEY no configurada")
         
         try:
-            # Detectar formato de audio
-            audio_format = self.detect_audio_format(audio_content)
-            
-            # Si es M4A, convertir a WAV primero
-            if audio_format == 'm4a':
-                print("Detectado formato M4A, convirtiendo a WAV...")
-                audio_content = self.convert_m4a_to_wav(audio_content)
-            elif audio_format == 'unknown':
-                print("Formato de audio desconocido, intentando procesarlo como está...")
-            
-            # Usar la REST API con la API key
-            import requests
-            
-            # Obtener información del audio
-            wav_info = self.get_wav_info(audio_content)
-            sample_rate = wav_info['sample_rate']
-            
-            # Codificar audio en base64
-            audio_base64 = base64.b64encode(audio_content).decode('utf-8')
-            
-            # Configuración de reconocimiento
-            config = {
-                "encoding": "LINEAR16",  # WAV format
-                "sampleRateHertz": sample_rate,  # Usar la tasa de muestreo detectada
-                "languageCode": language_code,
-                "enableAutomaticPunctuation": True
-            }
-            
-            # Request body
-            request_body = {
-                "config": config,
-                "audio": {
-                    "content": audio_base64
-                }
-            }
-            
-            # Llamar a la API
-            url = f"https://speech.googleapis.com/v1/speech:recognize?key={self.api_key}"
-            response = requests.post(url, json=request_body)
-            
-            if response.status_code != 200:
-                raise Exception(f"Error en Speech API: {response.text}")
-            
-            result = response.json()
-            
-            # Extraer el texto transcrito
-            if 'results' in result and len(result['results']) > 0:
-                transcript = result['results'][0]['alternatives'][0]['transcript']
-                return transcript
-            else:
-                return ""
+            stream = _seekable(stream)
+            with self._open_pcm(stream) as source:
+                return self._transcribe_source(source, language_code)
         
         except Exception as e:
             print(f"Error transcribiendo audio: {str(e)}")
             raise Exception(f"Error al transcribir audio: {str(e)}")
     
+    def _open_pcm(self, stream):
+        """Abre el stream como fuente PCM segun su formato"""
+        header = stream.read(12)
+        stream.seek(0)
+        audio_format = self.detect_audio_format(header)
+        
+        if audio_format == 'wav':
+            return WavPcmSource(stream)
+        if audio_format == 'm4a':
+            print("Detectado formato M4A, decodificando a PCM con ffmpeg...")
+            return FfmpegPcmSource(stream)
+        
+        print("Formato de audio desconocido, intentando procesarlo como está...")
+        return RawPcmSource(stream)
+    
+    def _transcribe_source(self, source, language_code):
+        window_frames = int(source.sample_rate * self.window_seconds)
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        futures = []
+        
+        def recognize(pcm):
+            try:
+                return self.recognizer.recognize(pcm, source.sample_rate, source.channels, language_code)
+            finally:
+                in_flight.release()
+        
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for pcm in split_on_silence(source, window_frames):
+                # Bloquea la lectura hasta que haya hueco: memoria acotada
+                in_flight.acquire()
+                futures.append(pool.submit(recognize, pcm))
+            
+            transcripts = [future.result() for future in futures]
+        
+        return " ".join(text.strip() for text in transcripts if text and text.strip())
+    
     def transcribe_audio_file(self, file_path, language_code="es-MX"):
         """
         Transcribe un archivo de audio a texto
@@ -181,12 +171,211 @@ class SpeechService:
         """
         try:
             with open(file_path, 'rb') as audio_file:
-                audio_content = audio_file.read()
-            
-            return self.transcribe_audio(audio_content, language_code)
+                return self.transcribe_stream(audio_file, language_code)
         
-        except Exception as e:
+        except OSError as e:
             raise Exception(f"Error al leer archivo de audio: {str(e)}")
 
-# Instancia singleton
-speech_service = SpeechService()
+
+class RestSpeechRecognizer:
+    """Reconocedor sobre la REST API de Speech-to-Text (audio LINEAR16 sin cabecera)"""
+    
+    def __init__(self, api_key):
+        self.api_key = api_key
+    
+    def recognize(self, pcm, sample_rate, channels, language_code):
+        # Configuración de reconocimiento
+        config = {
+            "encoding": "LINEAR16",
+            "sampleRateHertz": sample_rate,
+            "audioChannelCount": channels,
+            "languageCode": language_code,
+            "enableAutomaticPunctuation": True
+        }
+        
+        # Request body
+        request_body = {
+            "config": config,
+            "audio": {
+                "content": base64.b64encode(pcm).decode('utf-8')
+            }
+        }
+        
+        # Llamar a la API
+        url = f"https://speech.googleapis.com/v1/speech:recognize?key={self.api_key}"
+        response = speech_http.post(url, json=request_body)
+        
+        if response.status_code != 200:
+            raise Exception(f"Error en Speech API: {response.text}")
+        
+        result = response.json()
+        
+        # Extraer el texto transcrito (un resultado por segmento de la ventana)
+        return " ".join(
+            item['alternatives'][0]['transcript'].strip()
+            for item in result.get('results', [])
+            if item.get('alternatives')
+        )
+
+
+class StubSpeechRecognizer:
+    """Reconocedor local para pruebas y benchmarks: no llama a ninguna API"""
+    
+    def __init__(self, latency=0.0, transcript=None):
+        self.latency = latency
+        self.transcript = transcript
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def recognize(self, pcm, sample_rate, channels, language_code):
+        with self._lock:
+            self.calls += 1
+            index = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.transcript is not None:
+            return self.transcript
+        seconds = len(pcm) / float(sample_rate * channels * 2)
+        return f"[fragmento {index}: {seconds:.1f}s]"
+
+
+class WavPcmSource:
+    """Frames PCM de un WAV leidos bajo demanda"""
+    
+    def __init__(self, stream):
+        self._wav = wave.open(stream, 'rb')
+        if self._wav.getsampwidth() != 2:
+            raise Exception("Solo se soporta WAV PCM de 16 bits")
+        self.sample_rate = self._wav.getframerate()
+        self.channels = self._wav.getnchannels()
+    
+    def read(self, frames):
+        return self._wav.readframes(frames)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self._wav.close()
+
+
+class RawPcmSource:
+    """Stream sin cabecera reconocible: se asume LINEAR16 mono a 16kHz"""
+    
+    sample_rate = 16000
+    channels = 1
+    
+    def __init__(self, stream):
+        self._stream = stream
+    
+    def read(self, frames):
+        return self._stream.read(frames * self.channels * 2)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        pass
+
+
+class FfmpegPcmSource(RawPcmSource):
+    """
+    Decodifica M4A a PCM 16kHz mono con ffmpeg leyendo su stdout por partes
+
+    El contenedor M4A puede tener el indice al final, asi que el upload se
+    copia por bloques a un archivo temporal que ffmpeg lee directamente.
+    """
+    
+    def __init__(self, stream):
+        self._tmp = tempfile.NamedTemporaryFile(suffix='.m4a', delete=False)
+        try:
+            shutil.copyfileobj(stream, self._tmp, COPY_BUFFER_SIZE)
+            self._tmp.close()
+            self._process = subprocess.Popen(
+                ['ffmpeg', '-v', 'error', '-i', self._tmp.name,
+                 '-f', 's16le', '-ac', '1', '-ar', str(self.sample_rate), 'pipe:1'],
+                stdout=subprocess.PIPE
+            )
+        except Exception as e:
+            # Cualquier fallo al copiar o lanzar ffmpeg: no dejar el .m4a en /tmp
+            self._tmp.close()
+            os.unlink(self._tmp.name)
+            if isinstance(e, FileNotFoundError):
+                raise Exception("ffmpeg no está instalado; es necesario para audio M4A")
+            raise
+        super().__init__(self._process.stdout)
+    
+    def read(self, frames):
+        size = frames * self.channels * 2
+        chunks = []
+        while size > 0:
+            data = self._stream.read(size)
+            if not data:
+                break
+            chunks.append(data)
+            size -= len(data)
+        return b"".join(chunks)
+    
+    def __exit__(self, *exc):
+        self._process.stdout.close()
+        returncode = self._process.wait()
+        os.unlink(self._tmp.name)
+        if returncode != 0 and exc[0] is None:
+            raise Exception(f"Error convirtiendo M4A a PCM (ffmpeg salió con {returncode})")
+
+
+def split_on_silence(source, window_frames, search_seconds=5.0, frame_ms=20, silence_rms=500):
+    """
+    Genera bloques PCM de como mucho window_frames frames
+    
+    En los ultimos search_seconds de cada ventana busca el tramo de frame_ms
+    mas silencioso y corta ahi (si esta por debajo de silence_rms) para no
+    partir palabras; si no hay silencio corta al final de la ventana. Lo que
+    sobra pasa a la siguiente ventana.
+    """
+    bytes_per_frame = source.channels * 2
+    window_bytes = window_frames * bytes_per_frame
+    step = max(int(source.sample_rate * frame_ms / 1000), 1) * bytes_per_frame
+    search_bytes = min(int(source.sample_rate * search_seconds) * bytes_per_frame, window_bytes // 2)
+    
+    carry = b""
+    while True:
+        data = carry + source.read(window_frames - len(carry) // bytes_per_frame)
+        if not data:
+            return
+        if len(data) < window_bytes:
+            yield data
+            return
+        
+        cut = window_bytes
+        quietest = None
+        for offset in range(window_bytes - search_bytes, window_bytes - step + 1, step):
+            level = _rms(data[offset:offset + step])
+            if quietest is None or level < quietest[0]:
+                quietest = (level, offset + step // 2 // bytes_per_frame * bytes_per_frame)
+        if quietest and quietest[0] < silence_rms:
+            cut = quietest[1]
+        
+        yield data[:cut]
+        carry = data[cut:]
+
+
+def _rms(pcm):
+    samples = array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if not samples:
+        return 0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+def _seekable(stream):
+    """Garantiza un stream con seek(); los no posicionables se copian a un temporal en disco"""
+    try:
+        if stream.seekable():
+            return stream
+    except AttributeError:
+        pass
+    spooled = tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_SIZE)
+    shutil.copyfileobj(stream, spooled, COPY_BUFFER_SIZE)
+    spooled.seek(0)
+    return spooled
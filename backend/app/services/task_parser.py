@@ -0,0 +1,270 @@
+"""Extraccion local de tareas en español: prioridad, fecha y hora por reglas (sin IA)"""
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from app.utils.metrics import Counters, register_metrics
+
+# Palabras clave de prioridad (las mismas reglas que el prompt de Gemini);
+# las frases largas van primero para que "no urgente" no cuente como "urgente"
+PRIORITY_KEYWORDS = [
+    ('low', r'algun dia|no urgente|no es urgente|eventualmente|sin prisa'),
+    ('medium', r'cuando pueda|esta semana'),
+    # "ya" solo como orden ("ya mismo", "hazlo ya", al final): "ya compre el pan" no es urgente
+    ('urgent', r'urgente|urgentemente|inmediato|inmediatamente|ahora mismo|ahora|ya mismo|hazlo ya|\bya(?=[\s.!]*$)'),
+    ('high', r'importante|pronto'),
+]
+
+# Vencimiento por prioridad cuando no se menciona fecha (dias desde hoy)
+PRIORITY_DUE_DAYS = {'urgent': 0, 'high': 1, 'medium': 3, 'low': 7}
+
+WEEKDAYS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+MONTHS = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+          'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+NUMBER_WORDS = {'un': 1, 'una': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+                'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10}
+
+# Momentos del dia sin hora exacta
+DAY_PARTS = {'manana': 9, 'tarde': 16, 'noche': 20}
+
+# Sin fecha ni hora se vence al final del dia
+END_OF_DAY = (23, 59)
+
+MAX_WORDS = 12
+
+_NUMBER = r'(\d+|' + '|'.join(NUMBER_WORDS) + r')'
+_DATE_PATTERNS = [
+    ('day_after', re.compile(r'\bpasado manana\b')),
+    ('relative', re.compile(r'\b(?:en|dentro de) ' + _NUMBER + r' (dias?|semanas?)\b')),
+    ('next_week', re.compile(r'\b(?:la )?(?:proxima semana|semana que viene)\b')),
+    ('weekday', re.compile(r'\b(?:el proximo |este |esta |el )?(' + '|'.join(WEEKDAYS) + r')(?: que viene)?\b')),
+    ('month_day', re.compile(r'\b(?:el )?(\d{1,2}) de (' + '|'.join(MONTHS) + r')\b')),
+    ('numeric', re.compile(r'\b(?:el )?(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b')),
+    ('tomorrow', re.compile(r'\bmanana\b')),
+    ('today', re.compile(r'\b(?:hoy|esta (tarde|noche))\b')),
+]
+_TIME = re.compile(
+    r'\ba (?:las|la) (\d{1,2})(?::(\d{2}))?\s*'
+    r'(am|pm|a\.m\.|p\.m\.|hrs|h|de la manana|de la tarde|de la noche|en punto)?\b'
+)
+_NOON = re.compile(r'\b(?:al|a) mediodia\b')
+_DAY_PART = re.compile(r'\b(?:por|en|de) la (manana|tarde|noche)\b')
+_HEDGES = re.compile(r'\b(?:quizas?|tal vez|a lo mejor|no se|creo que|depende|o el|o la|o mejor)\b')
+_CONNECTORS = {'a', 'al', 'el', 'la', 'de', 'del', 'para', 'y', 'que', 'en', 'antes', 'es', 'por', 'lo', 'mas', 'tarde'}
+
+parser_stats = Counters('local', 'escalated')
+register_metrics('task_parser', parser_stats.snapshot)
+
+
+def _fold(text):
+    """Minusculas y sin tildes, con la misma longitud que el texto (posiciones alineadas)"""
+    folded = []
+    for char in text:
+        plain = ''.join(c for c in unicodedata.normalize('NFD', char) if not unicodedata.combining(c))
+        folded.append(plain.lower() if len(plain) == 1 else char.lower())
+    return ''.join(folded)
+
+
+def _number(token):
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _next_weekday(today, weekday):
+    """Proxima ocurrencia del dia de la semana ("el lunes" dicho un lunes = el siguiente)"""
+    days = (weekday - today.weekday()) % 7
+    return today + timedelta(days=days or 7)
+
+
+def _resolve_date(kind, match, today):
+    if kind == 'today':
+        return today
+    if kind == 'tomorrow':
+        return today + timedelta(days=1)
+    if kind == 'day_after':
+        return today + timedelta(days=2)
+    if kind == 'relative':
+        amount = _number(match.group(1))
+        return today + timedelta(days=amount * (7 if match.group(2).startswith('semana') else 1))
+    if kind == 'next_week':
+        return today + timedelta(days=7)
+    if kind == 'weekday':
+        return _next_weekday(today, WEEKDAYS.index(match.group(1)))
+    if kind == 'month_day':
+        day, month = int(match.group(1)), MONTHS.index(match.group(2)) + 1
+        year = today.year
+    else:
+        day, month = int(match.group(1)), int(match.group(2))
+        year = int(match.group(3)) if match.group(3) else today.year
+        if year < 100:
+            year += 2000
+    candidate = today.replace(year=year, month=month, day=day)
+    if candidate < today and not (kind == 'numeric' and match.group(3)):
+        candidate = candidate.replace(year=candidate.year + 1)
+    return candidate
+
+
+def _resolve_time(match):
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    marker = (match.group(3) or '').replace('.', '')
+    if marker in ('pm', 'de la tarde', 'de la noche') and hour < 12:
+        hour += 12
+    elif marker in ('am', 'de la manana') and hour == 12:
+        hour = 0
+    elif not marker and 1 <= hour <= 7:
+        # "a las 5" en una tarea casi siempre es por la tarde
+        hour += 12
+    if hour > 23 or minute > 59:
+        raise ValueError('Hora invalida')
+    return hour, minute
+
+
+def _clean_title(text, spans):
+    """Texto sin las expresiones de fecha/hora/prioridad ni conectores sueltos en los bordes"""
+    chars = list(text)
+    for start, end in spans:
+        for position in range(start, end):
+            chars[position] = ' '
+    words = re.sub(r'[\s,;:.!¡]+', ' ', ''.join(chars)).split()
+    while words and _fold(words[-1]) in _CONNECTORS:
+        words.pop()
+    while words and _fold(words[0]) in _CONNECTORS:
+        words.pop(0)
+    title = ' '.join(words)
+    return title[:1].upper() + title[1:100]
+
+
+def _parse_fecha(fecha, today, time_of_day):
+    """
+    Fecha sugerida por el cliente -> datetime, o None si no se reconoce
+
+    Acepta ISO 8601 y las mismas expresiones de fecha que el texto
+    ("10/12/2025", "el 5 de marzo", "mañana", ...) si son toda la fecha.
+    """
+    fecha = str(fecha).strip()
+    try:
+        return datetime.fromisoformat(fecha)
+    except ValueError:
+        pass
+
+    folded = _fold(unicodedata.normalize('NFC', fecha))
+    for kind, pattern in _DATE_PATTERNS:
+        match = pattern.fullmatch(folded)
+        if match:
+            try:
+                day = _resolve_date(kind, match, today)
+            except ValueError:
+                return None
+            hour, minute = time_of_day or END_OF_DAY
+            return day.replace(hour=hour, minute=minute)
+    return None
+
+
+def parse_task(text, fecha=None, now=None):
+    """
+    Extrae titulo, prioridad y fecha de vencimiento de un texto corto
+
+    Returns:
+        tuple: (resultado con el formato de process_task_input, confianza 0..1)
+        La confianza es baja para textos largos, preguntas, dudas ("tal vez")
+        o expresiones en conflicto; en ese caso conviene consultar al modelo.
+    """
+    text = unicodedata.normalize('NFC', (text or '').strip())
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    folded = _fold(text)
+    spans = []
+    confidence = 0.9
+
+    if not text:
+        return None, 0.0
+    if len(text.split()) > MAX_WORDS:
+        confidence = 0.3
+    if '?' in text or _HEDGES.search(folded):
+        confidence = min(confidence, 0.4)
+
+    # Hora: "a las 5", "a las 17:30", "al mediodia", "por la tarde"
+    time_of_day = None
+    times = list(_TIME.finditer(folded)) + list(_NOON.finditer(folded))
+    if len(times) > 1:
+        confidence = min(confidence, 0.4)
+    for match in times[:1]:
+        try:
+            time_of_day = (12, 0) if match.re is _NOON else _resolve_time(match)
+        except ValueError:
+            confidence = 0.0
+        spans.append(match.span())
+    for match in _DAY_PART.finditer(folded):
+        if time_of_day is None:
+            time_of_day = (DAY_PARTS[match.group(1)], 0)
+        spans.append(match.span())
+
+    # Fecha: la primera expresion reconocida; varias distintas = ambiguo
+    masked = folded
+    for start, end in spans:
+        masked = masked[:start] + ' ' * (end - start) + masked[end:]
+    due_day = None
+    dates = []
+    for kind, pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(masked):
+            try:
+                dates.append(_resolve_date(kind, match, today))
+            except ValueError:
+                confidence = 0.0
+                continue
+            if kind == 'today' and match.group(1) and time_of_day is None:
+                # "esta noche" sin hora: la del momento del dia, no el final del dia
+                time_of_day = (DAY_PARTS[match.group(1)], 0)
+            spans.append(match.span())
+            masked = masked[:match.start()] + ' ' * (match.end() - match.start()) + masked[match.end():]
+    if len(set(dates)) > 1:
+        confidence = min(confidence, 0.4)
+    if dates:
+        due_day = dates[0]
+
+    # Prioridad por palabras clave; "mañana" cuenta como alta (regla del prompt)
+    priorities = []
+    for priority, pattern in PRIORITY_KEYWORDS:
+        for match in re.finditer(pattern, masked):
+            priorities.append(priority)
+            spans.append(match.span())
+            masked = masked[:match.start()] + ' ' * (match.end() - match.start()) + masked[match.end():]
+    if len(set(priorities)) > 1:
+        confidence = min(confidence, 0.4)
+    priority = priorities[0] if priorities else None
+    if priority is None and due_day is not None and due_day == today + timedelta(days=1):
+        priority = 'high'
+
+    if priority is None and due_day is None and time_of_day is None and not fecha:
+        # Sin pistas: la prioridad depende del contenido, mejor el modelo
+        confidence = min(confidence, 0.6)
+    elif priority is None:
+        confidence = min(confidence, 0.85)
+    priority = priority or 'medium'
+
+    fecha_due = _parse_fecha(fecha, today, time_of_day) if fecha else None
+    if fecha and fecha_due is None:
+        # Fecha del cliente en un formato desconocido: que la normalice el modelo
+        confidence = 0.0
+
+    if fecha_due is not None:
+        due_date = fecha_due.isoformat()
+    else:
+        if due_day is None:
+            due_day = today + timedelta(days=PRIORITY_DUE_DAYS[priority]) if time_of_day is None else today
+        hour, minute = time_of_day or END_OF_DAY
+        due = due_day.replace(hour=hour, minute=minute)
+        if due < now and due_day == today and time_of_day is not None and not dates:
+            # "a las 5" cuando ya pasaron las 5 de hoy: mañana
+            due += timedelta(days=1)
+        due_date = due.isoformat()
+
+    title = _clean_title(text, spans)
+    if len(title) < 3:
+        confidence = 0.0
+
+    return {
+        'title': title or text[:100],
+        'priority': priority,
+        'due_date': due_date,
+        'body': text
+    }, confidence
@@ -0,0 +1,86 @@
+"""Pipeline de creacion de tareas: transcripcion + extraccion con IA"""
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from app import db, services
+from app.models.task import Task
+from app.services.speech_service import COPY_BUFFER_SIZE
+from app.services.collection_versions import bump_version
+
+
+def combine_body_text(body_text, transcribed_text):
+    """Combina el texto escrito con el audio transcrito"""
+    body_text = (body_text or "").strip()
+    transcribed_text = (transcribed_text or "").strip()
+    if body_text and transcribed_text:
+        return f"{body_text} {transcribed_text}".strip()
+    return body_text or transcribed_text
+
+
+def task_fields(ai_result):
+    """Columnas de la tarea a partir del resultado de la IA"""
+    return {
+        "title": ai_result["title"],
+        "body": ai_result["body"],
+        "priority": ai_result["priority"],
+        "due_date": datetime.fromisoformat(ai_result["due_date"]) if ai_result["due_date"] else None
+    }
+
+
+def apply_ai_result(task, ai_result):
+    """Copia el resultado de la IA sobre la tarea"""
+    for field, value in task_fields(ai_result).items():
+        setattr(task, field, value)
+
+
+def save_upload(upload):
+    """Copia un archivo subido a un temporal en disco y devuelve su ruta"""
+    with tempfile.NamedTemporaryFile(prefix="synaptech_audio_", delete=False) as tmp:
+        shutil.copyfileobj(upload.stream, tmp, COPY_BUFFER_SIZE)
+        return tmp.name
+
+
+def enrich_task(task_id, body_text="", fecha=None, audio_path=None):
+    """
+    Completa una tarea creada en modo asincrono (status 'processing')
+
+    Transcribe el audio si lo hay (y borra el temporal), procesa el texto
+    con IA y deja la tarea en 'pending'. Si algo falla la tarea queda en
+    'failed' con el error.
+    """
+    try:
+        task = db.session.get(Task, task_id)
+        if not task or task.status != "processing":
+            return
+
+        _enrich(task, body_text, fecha, audio_path)
+    finally:
+        if audio_path and os.path.exists(audio_path):
+            os.unlink(audio_path)
+
+
+def _enrich(task, body_text, fecha, audio_path):
+    try:
+        if audio_path:
+            transcribed_text = services.get("speech").transcribe_audio_file(audio_path)
+            body_text = combine_body_text(body_text, transcribed_text)
+
+        if not body_text:
+            raise ValueError("No se pudo obtener texto del audio")
+
+        ai_result = services.get("gemini").process_task_input(
+            body_text=body_text,
+            fecha=fecha,
+            user_id=task.user_id
+        )
+        apply_ai_result(task, ai_result)
+        task.status = "pending"
+        task.processing_error = None
+
+    except Exception as e:
+        task.status = "failed"
+        task.processing_error = str(e)
+
+    bump_version(task.user_id, "tasks")
+    db.session.commit()
@@ -0,0 +1,118 @@
+"""Pool de conexiones de SQLAlchemy: opciones desde la configuracion y metricas por worker"""
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, Pool, QueuePool
+
+
+class PoolStats:
+    """Checkouts, conexiones nuevas, invalidaciones y espera para obtener conexion"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values = {
+                'checkouts': 0, 'checkins': 0, 'connects': 0, 'invalidated': 0,
+                'timeouts': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+            }
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+
+    def record_wait(self, seconds):
+        with self._lock:
+            wait_ms = seconds * 1000
+            self._values['wait_ms_total'] += wait_ms
+            self._values['wait_ms_max'] = max(self._values['wait_ms_max'], wait_ms)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            values = dict(self._values)
+        values['wait_ms_avg'] = values['wait_ms_total'] / values['checkouts'] if values['checkouts'] else 0.0
+        if isinstance(pool, QueuePool):
+            values.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        if pool is not None:
+            values['pool'] = type(pool).__name__
+        return values
+
+
+pool_stats = PoolStats()
+
+
+class _TimedCheckout:
+    """Mide cuanto tarda el pool en entregar una conexion (cola + conexion nueva)"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.incr('timeouts')
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats.incr('checkouts')
+
+
+@event.listens_for(Pool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    pool_stats.incr('checkins')
+
+
+@event.listens_for(Pool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    pool_stats.incr('connects')
+
+
+@event.listens_for(Pool, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    # Incluye las conexiones muertas detectadas por pre-ping
+    pool_stats.incr('invalidated')
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS para la URI configurada
+
+    Con DB_PGBOUNCER no se mantiene pool propio (NullPool): PgBouncer en modo
+    transaccion ya reparte las conexiones y un pool por worker las retendria.
+    Tampoco se envia statement_timeout como parametro de arranque, que
+    PgBouncer rechaza; en ese modo se configura en el rol de la base
+    (ALTER ROLE ... SET statement_timeout). SQLite usa los valores por
+    defecto de Flask-SQLAlchemy.
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        return {}
+
+    if config['DB_PGBOUNCER']:
+        return {'poolclass': InstrumentedNullPool}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if uri.startswith('postgresql') and config['DB_STATEMENT_TIMEOUT_MS'] > 0:
+        options['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    return options
@@ -0,0 +1,69 @@
+"""Perfil de tiempo de importacion del arranque (python -X importtime)"""
+import os
+import subprocess
+import sys
+
+# Dependencias pesadas que solo deben cargarse al primer uso, nunca al arrancar
+LAZY_MODULES = (
+    'google.generativeai',
+    'google.cloud.speech_v1',
+    'google.oauth2',
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'reportlab',
+    'pandas',
+    'openpyxl',
+    'numpy',
+)
+
+
+def profile_imports(target='wsgi', cwd=None):
+    """
+    Importa target en un interprete nuevo con -X importtime
+
+    Returns:
+        list: (modulo, propio_us, acumulado_us, profundidad) en orden de importacion
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=cwd or os.getcwd(),
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {target}: {result.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output):
+    """Lineas 'import time: self | cumulative | modulo' -> tuplas"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Cabecera "self [us] | cumulative | imported package"
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return rows
+
+
+def summarize(rows, top=15):
+    """Total (suma de los modulos de primer nivel), los mas lentos y los pesados cargados"""
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    loaded = {name for name, _, _, _ in rows}
+    eager = sorted(
+        module for module in LAZY_MODULES
+        if module in loaded or any(name.startswith(module + '.') for name in loaded)
+    )
+    return {
+        'total_ms': total_us / 1000,
+        'modules': len(rows),
+        'slowest': [(name, cumulative / 1000) for name, _, cumulative, _ in slowest],
+        'eager_heavy_modules': eager,
+    }
@@ -0,0 +1,54 @@
+"""Contadores en proceso expuestos en GET /metrics"""
+import hmac
+import os
+import threading
+
+_providers = {}
+
+
+class Counters:
+    """Contadores thread-safe (uno por servicio)"""
+
+    def __init__(self, *names):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(names, 0)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+
+def register_metrics(name, provider):
+    """Registra una funcion sin argumentos que devuelve un dict de metricas"""
+    _providers[name] = provider
+
+
+def collect_metrics():
+    """Metricas de este worker (cada worker de Gunicorn tiene las suyas)"""
+    metrics = {'pid': os.getpid()}
+    for name, provider in _providers.items():
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            metrics[name] = {'error': str(e)}
+    return metrics
+
+
+# Direcciones desde las que /metrics responde sin token (el propio host)
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+def metrics_access_allowed(request, token):
+    """
+    /metrics publica contadores internos: con METRICS_TOKEN exige
+    'Authorization: Bearer <token>'; sin token solo responde a peticiones
+    locales (scrapers en el mismo host, benchmarks).
+    """
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        return hmac.compare_digest(provided.encode(), token.encode())
+    return request.remote_addr in LOCAL_ADDRESSES
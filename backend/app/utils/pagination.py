@@ -0,0 +1,24 @@
+"""Cursores opacos para paginacion keyset"""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at, row_id):
+    """Cursor opaco a partir de la clave de orden (created_at, id) de la ultima fila"""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Devuelve (created_at, id) del cursor
+
+    Lanza ValueError si el cursor no es valido.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Cursor invalido')
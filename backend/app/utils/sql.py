@@ -0,0 +1,42 @@
+"""Helpers de SQL dependientes del dialecto (PostgreSQL en produccion, SQLite en local)"""
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+
+def dialect_insert(bind, table):
+    """
+    insert() del dialecto activo, con soporte de ON CONFLICT
+    (on_conflict_do_nothing / on_conflict_do_update)
+    """
+    if bind.dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def iter_partitions(stmt, key_column, batch_size, after=None):
+    """
+    Filas de stmt en lotes de batch_size, en orden de key_column (unica)
+
+    En PostgreSQL se leen con un cursor del servidor (stream_results +
+    yield_per) sobre una conexion propia, asi la sesion puede hacer commit
+    por lote sin cerrar el cursor. SQLite no tiene cursores de servidor y
+    se pagina por key_column (keyset). En ambos casos la memoria es la de
+    un lote.
+    """
+    stmt = stmt.order_by(key_column)
+
+    if db.engine.dialect.supports_server_side_cursors:
+        if after is not None:
+            stmt = stmt.where(key_column > after)
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+            yield from result.partitions()
+        return
+
+    while True:
+        page = stmt if after is None else stmt.where(key_column > after)
+        batch = db.session.execute(page.limit(batch_size)).all()
+        if not batch:
+            return
+        yield batch
+        after = getattr(batch[-1], key_column.key)
@@ -0,0 +1,136 @@
+"""
+Benchmark: analitica de productividad por usuario vs vectorizada por cohorte
+
+Siembra pacientes con metricas diarias (con huecos) y compara para toda la
+cohorte:
+- antes: por usuario, una consulta de sus filas y bucles de Python para
+  totales, puntaje (calculate_productivity_score), tasa movil, rachas y
+  perfil por dia de la semana
+- despues: cohort_analytics (una consulta y matrices de numpy)
+Verifica que ambos devuelvan lo mismo.
+
+Uso: python benchmarks/bench_analytics.py [--users 500] [--days 90] [--window 7] [--rounds 3]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from common import create_bench_app, print_header
+from sqlalchemy import text
+from app import db, services
+from app.models.sync import ProductivityMetric
+from app.services.productivity_analytics import cohort_analytics
+from app.services.productivity_metrics import METRIC_FIELDS
+
+
+def seed(app, users, days):
+    rng = random.Random(11)
+    today = date.today()
+    with app.app_context():
+        db.session.execute(
+            text("INSERT INTO users (email, password_hash, full_name, role, is_active) "
+                 "VALUES (:email, 'x', 'Paciente', 'user', 1)"),
+            [{"email": f"paciente{i}@synaptech.com"} for i in range(users)]
+        )
+        user_ids = [row[0] for row in db.session.execute(text("SELECT id FROM users")).all()]
+        rows = [
+            {'user_id': user_id, 'date': today - timedelta(days=d), 'tasks_created': rng.randint(0, 6),
+             'tasks_completed': rng.randint(0, 4), 'routines_followed': rng.randint(0, 2),
+             'reminders_acknowledged': rng.randint(0, 3), 'total_focus_time': rng.randint(0, 90)}
+            for user_id in user_ids for d in range(days + 10) if rng.random() < 0.8
+        ]
+        db.session.execute(ProductivityMetric.__table__.insert(), rows)
+        db.session.commit()
+    return user_ids
+
+
+def legacy_user_analytics(user_id, start, end, window):
+    """Una consulta y bucles de Python por usuario"""
+    first = start - timedelta(days=window - 1)
+    rows = ProductivityMetric.query.filter(
+        ProductivityMetric.user_id == user_id,
+        ProductivityMetric.date >= first,
+        ProductivityMetric.date <= end
+    ).all()
+    by_day = {row.date: row for row in rows}
+    days = [first + timedelta(days=d) for d in range((end - first).days + 1)]
+    series = {field: [getattr(by_day[day], field) if day in by_day else 0 for day in days] for field in METRIC_FIELDS}
+    in_range = {field: values[window - 1:] for field, values in series.items()}
+
+    totals = {field: sum(values) for field, values in in_range.items()}
+    score = services.get('report').calculate_productivity_score(totals)
+
+    rolling = []
+    for i in range(window - 1, len(days)):
+        created = sum(series['tasks_created'][i - window + 1:i + 1])
+        completed = sum(series['tasks_completed'][i - window + 1:i + 1])
+        rolling.append(round(completed * 100 / created, 2) if created else None)
+
+    current = longest = 0
+    for value in in_range['tasks_completed']:
+        current = current + 1 if value > 0 else 0
+        longest = max(longest, current)
+
+    sums, counts = [0] * 7, [0] * 7
+    for offset, value in enumerate(in_range['tasks_completed']):
+        weekday = (start + timedelta(days=offset)).weekday()
+        sums[weekday] += value
+        counts[weekday] += 1
+    profile = [round(s / c, 2) if c else 0.0 for s, c in zip(sums, counts)]
+
+    return {
+        'user_id': user_id, 'totals': totals, 'productivity_score': score,
+        'streaks': {'current': current, 'longest': longest},
+        'weekday_profile': profile, 'rolling_completion_rate': rolling
+    }
+
+
+def legacy_cohort(user_ids, start, end, window):
+    return {'users': [legacy_user_analytics(user_id, start, end, window) for user_id in user_ids]}
+
+
+def measure(app, func, user_ids, start, end, window, rounds):
+    with app.app_context():
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            result = func(user_ids, start, end, window)
+            db.session.remove()
+        elapsed = time.perf_counter() - begin
+    return elapsed / rounds * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--window", type=int, default=7)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    user_ids = seed(app, args.users, args.days)
+    end = date.today()
+    start = end - timedelta(days=args.days - 1)
+
+    print_header("BENCHMARK: ANALITICA POR USUARIO VS VECTORIZADA POR COHORTE")
+    print(f"{len(user_ids)} usuarios x {args.days} dias | ventana {args.window} | {args.rounds} rondas")
+    print()
+
+    # Calentar el import de numpy fuera de la medicion
+    measure(app, cohort_analytics, user_ids[:1], start, end, args.window, 1)
+
+    legacy_ms, legacy = measure(app, legacy_cohort, user_ids, start, end, args.window, args.rounds)
+    new_ms, new = measure(app, cohort_analytics, user_ids, start, end, args.window, args.rounds)
+
+    print(f"{'':<28} {'ms/cohorte':>11} {'ms/usuario':>11}")
+    print(f"{'antes (bucle por usuario)':<28} {legacy_ms:>11.1f} {legacy_ms / len(user_ids):>11.3f}")
+    print(f"{'despues (numpy)':<28} {new_ms:>11.1f} {new_ms / len(user_ids):>11.3f}")
+    print(f"\nSpeedup: {legacy_ms / new_ms:.1f}x")
+
+    mismatches = sum(before != after for before, after in zip(legacy['users'], new['users']))
+    print("✅ Mismos resultados" if not mismatches else f"❌ {mismatches} usuarios con resultados distintos")
+
+
+if __name__ == "__main__":
+    main()
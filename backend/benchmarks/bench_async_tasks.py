@@ -0,0 +1,85 @@
+"""
+Benchmark: POST /api/tasks sincrono vs asincrono con latencia simulada del LLM
+
+Simula N workers sync de Gunicorn (un hilo = un worker ocupado por request)
+y mide cuantas tareas por segundo acepta la API en cada modo cuando Gemini
+tarda LLM_LATENCY segundos en responder.
+
+Uso: python benchmarks/bench_async_tasks.py [--requests 40] [--workers 4] [--latency 2.0]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from common import create_bench_app, create_user, print_header
+from app import job_queue
+from app.services.gemini_service import GeminiService
+
+
+def slow_process_task_input(self, body_text="", audio_file=None, fecha=None, user_id=None):
+    """Sustituto de Gemini con latencia fija"""
+    time.sleep(LLM_LATENCY)
+    return {
+        'title': body_text[:100],
+        'priority': 'medium',
+        'due_date': (datetime.now() + timedelta(days=1)).isoformat(),
+        'body': body_text
+    }
+
+
+def run(app, headers, total_requests, workers, prefer_async):
+    request_headers = dict(headers)
+    if prefer_async:
+        request_headers["Prefer"] = "respond-async"
+
+    def post_task(i):
+        client = app.test_client()
+        response = client.post(
+            "/api/tasks",
+            json={"cuerpo": f"Tarea de prueba {i} para mañana"},
+            headers=request_headers
+        )
+        return response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(post_task, range(total_requests)))
+    accepted = time.perf_counter() - start
+
+    job_queue.join()
+    completed = time.perf_counter() - start
+    return statuses, accepted, completed
+
+
+def main():
+    global LLM_LATENCY
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    LLM_LATENCY = args.latency
+
+    GeminiService.process_task_input = slow_process_task_input
+
+    print_header("BENCHMARK: CREACION DE TAREAS SYNC VS ASYNC")
+    print(f"Requests: {args.requests} | Workers simulados: {args.workers} | Latencia LLM: {args.latency}s")
+    print()
+
+    for label, prefer_async in (("sync", False), ("async", True)):
+        app = create_bench_app()
+        job_queue.workers = args.workers * 4
+        _, headers = create_user(app)
+        statuses, accepted, completed = run(app, headers, args.requests, args.workers, prefer_async)
+        print(f"[{label}] codigos: {sorted(set(statuses))}")
+        print(f"[{label}] aceptadas en {accepted:.2f}s -> {args.requests / accepted:.1f} req/s")
+        print(f"[{label}] enriquecidas en {completed:.2f}s")
+        print()
+
+
+LLM_LATENCY = 2.0
+
+if __name__ == "__main__":
+    main()
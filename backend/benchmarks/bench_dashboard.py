@@ -0,0 +1,156 @@
+"""
+Benchmark: GET /api/reports/dashboard con cinco consultas vs agregados condicionales
+
+Siembra usuarios con tareas (pendientes, completadas, que vencen hoy),
+rutinas sugeridas y metricas diarias, y compara por usuario:
+- antes: una consulta por contador y la suma de metricas en Python
+- despues: dashboard_service (contadores con COUNT(*) FILTER en una consulta)
+contando las sentencias SQL y la latencia media. Verifica que ambos
+devuelvan lo mismo.
+
+Uso: python benchmarks/bench_dashboard.py [--users 200] [--tasks-per-user 300] [--rounds 5]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import event, text
+
+from common import create_bench_app, print_header
+from app import db
+from app.models.routine import RoutineSuggestion
+from app.models.sync import ProductivityMetric
+from app.models.task import Task
+from app.services.dashboard_service import get_dashboard
+
+
+def seed(app, users, tasks_per_user):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.execute(
+            text("INSERT INTO users (email, password_hash, full_name, role, is_active) "
+                 "VALUES (:email, 'x', 'Seed', 'user', 1)"),
+            [{"email": f"dash{i}@synaptech.com"} for i in range(users)]
+        )
+        user_ids = [row[0] for row in db.session.execute(text("SELECT id FROM users")).all()]
+
+        task_rows, metric_rows = [], []
+        for user_id in user_ids:
+            for j in range(tasks_per_user):
+                status = rng.choice(['pending', 'pending', 'completed'])
+                due = now + timedelta(hours=rng.randint(-72, 72))
+                task_rows.append({
+                    'user_id': user_id, 'title': f"Tarea {j}", 'priority': 'medium', 'status': status,
+                    'created_at': due - timedelta(days=2), 'due_date': due,
+                    'completed_at': now - timedelta(hours=rng.randint(0, 48)) if status == 'completed' else None
+                })
+            for d in range(14):
+                metric_rows.append({
+                    'user_id': user_id, 'date': date.today() - timedelta(days=d),
+                    'tasks_completed': rng.randint(0, 5), 'tasks_created': rng.randint(0, 5)
+                })
+        db.session.execute(Task.__table__.insert(), task_rows)
+        db.session.execute(ProductivityMetric.__table__.insert(), metric_rows)
+
+        suggestion_rows = [
+            {'user_id': user_id, 'task_id': task_id, 'fingerprint': 'x', 'cuerpo': 'Rutina', 'generation': 1}
+            for task_id, user_id in db.session.execute(text("SELECT id, user_id FROM tasks")).all()
+            if task_id % 3 == 0
+        ]
+        db.session.execute(RoutineSuggestion.__table__.insert(), suggestion_rows)
+        db.session.commit()
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        return user_ids
+
+
+def legacy_dashboard(user_id):
+    """Implementacion anterior: una consulta por contador"""
+    today = date.today()
+    today_tasks = Task.query.filter(
+        Task.user_id == user_id,
+        Task.due_date >= datetime.combine(today, datetime.min.time()),
+        Task.due_date < datetime.combine(today + timedelta(days=1), datetime.min.time()),
+        Task.status != 'completed'
+    ).all()
+    pending_tasks = Task.query.filter_by(user_id=user_id, status='pending').count()
+    completed_today = Task.query.filter(
+        Task.user_id == user_id,
+        Task.status == 'completed',
+        Task.completed_at >= datetime.combine(today, datetime.min.time())
+    ).count()
+    active_routines = RoutineSuggestion.query.join(Task, Task.id == RoutineSuggestion.task_id).filter(
+        RoutineSuggestion.user_id == user_id,
+        Task.status == 'pending'
+    ).count()
+    week_start = today - timedelta(days=today.weekday())
+    week_metrics = ProductivityMetric.query.filter(
+        ProductivityMetric.user_id == user_id,
+        ProductivityMetric.date >= week_start
+    ).all()
+    return {
+        'today_tasks': [t.to_dict() for t in today_tasks],
+        'pending_tasks': pending_tasks,
+        'completed_today': completed_today,
+        'active_routines': active_routines,
+        'week_completion': sum(m.tasks_completed for m in week_metrics)
+    }
+
+
+def measure(app, func, user_ids, rounds):
+    """(ms por dashboard, consultas por dashboard, resultados)"""
+    statements = []
+    with app.app_context():
+        engine = db.engine
+        listener = lambda *args: statements.append(1)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            results = {}
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for user_id in user_ids:
+                    results[user_id] = func(user_id)
+                    db.session.remove()
+            elapsed = time.perf_counter() - start
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+    calls = rounds * len(user_ids)
+    return elapsed / calls * 1000, len(statements) / calls, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks-per-user", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    user_ids = seed(app, args.users, args.tasks_per_user)
+
+    print_header("BENCHMARK: DASHBOARD CINCO CONSULTAS VS AGREGADOS CONDICIONALES")
+    print(f"{len(user_ids)} usuarios x {args.tasks_per_user} tareas | {args.rounds} rondas")
+    print()
+
+    legacy_ms, legacy_queries, legacy = measure(app, legacy_dashboard, user_ids, args.rounds)
+    new_ms, new_queries, new = measure(app, get_dashboard, user_ids, args.rounds)
+
+    print(f"{'':<22} {'consultas':>10} {'ms/dashboard':>13}")
+    print(f"{'antes (5 consultas)':<22} {legacy_queries:>10.1f} {legacy_ms:>13.2f}")
+    print(f"{'despues (FILTER)':<22} {new_queries:>10.1f} {new_ms:>13.2f}")
+    print(f"\nSpeedup: {legacy_ms / new_ms:.1f}x")
+
+    # Las tareas de hoy se comparan por id (el orden puede variar)
+    mismatches = 0
+    for user_id in user_ids:
+        before = dict(legacy[user_id], today_tasks=sorted(t['id'] for t in legacy[user_id]['today_tasks']))
+        after = {key: value for key, value in new[user_id].items() if key != 'due_today'}
+        after['today_tasks'] = sorted(t['id'] for t in after['today_tasks'])
+        mismatches += before != after
+    print("✅ Mismos resultados" if not mismatches else f"❌ {mismatches} usuarios con resultados distintos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: materializar una semana de dosis para muchos usuarios
+
+Compara el job por conjuntos (INSERT ... ON CONFLICT DO NOTHING por lote)
+con el bucle anterior de _create_medication_tasks (una consulta LIKE por
+horario y un INSERT por tarea). El bucle anterior se mide sobre una muestra
+y se extrapola, porque con 10k usuarios tarda demasiado.
+
+Uso: python benchmarks/bench_dose_scheduler.py [--users 10000] [--days 7] [--legacy-sample 200]
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+from common import create_bench_app, print_header
+from app import db
+from app.models.medication import Medication
+from app.models.task import Task
+from app.models.user import User
+from app.services.dose_scheduler import materialize_all
+
+SCHEDULES = ["08:00", "14:00", "20:00"]
+
+
+def seed(users):
+    """Un medicamento con tres tomas diarias por usuario"""
+    now = datetime.utcnow()
+    db.session.execute(db.insert(User), [
+        {"email": f"user{i}@bench.com", "password_hash": "x", "full_name": f"Usuario {i}",
+         "role": "user", "is_active": True, "created_at": now, "updated_at": now}
+        for i in range(users)
+    ])
+    user_ids = db.session.scalars(db.select(User.id)).all()
+    db.session.execute(db.insert(Medication), [
+        {"user_id": user_id, "name": f"Medicamento {user_id}", "dosage": "10mg", "schedules": SCHEDULES,
+         "is_active": True, "created_at": now, "updated_at": now}
+        for user_id in user_ids
+    ])
+    db.session.commit()
+
+
+def legacy_materialize(medications, start_date, days):
+    """El bucle anterior (LIKE por horario), extendido a varios dias"""
+    for medication in medications:
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            for schedule_time in medication.schedules:
+                hour, minute = map(int, schedule_time.split(":"))
+                schedule_datetime = datetime.combine(day, datetime.min.time().replace(hour=hour, minute=minute))
+                existing_task = Task.query.filter(
+                    Task.user_id == medication.user_id,
+                    Task.title.like(f"%{medication.name}%"),
+                    Task.due_date == schedule_datetime
+                ).first()
+                if not existing_task:
+                    db.session.add(Task(
+                        user_id=medication.user_id,
+                        title=f"Tomar medicamento: {medication.name}",
+                        priority="high",
+                        due_date=schedule_datetime,
+                        status="pending"
+                    ))
+            db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    start_date = date.today()
+    expected = args.users * args.days * len(SCHEDULES)
+
+    with app.app_context():
+        seed(args.users)
+        print_header(f"Dosis: {args.users} usuarios x {args.days} dias x {len(SCHEDULES)} tomas = {expected} tareas")
+
+        started = time.perf_counter()
+        processed, created = materialize_all(start_date, args.days, args.batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"Job por conjuntos:   {elapsed:8.2f}s  ({processed} medicamentos, {created} tareas nuevas)")
+
+        started = time.perf_counter()
+        _, created_again = materialize_all(start_date, args.days, args.batch_size)
+        print(f"Segunda ejecucion:   {time.perf_counter() - started:8.2f}s  ({created_again} tareas nuevas)")
+
+        total = db.session.scalar(db.select(db.func.count(Task.id)))
+        assert created == expected == total and created_again == 0
+
+        # Bucle anterior sobre una muestra, partiendo tambien de una tabla vacia
+        db.session.execute(db.delete(Task))
+        db.session.commit()
+        sample = Medication.query.order_by(Medication.id).limit(args.legacy_sample).all()
+        started = time.perf_counter()
+        legacy_materialize(sample, start_date, args.days)
+        legacy = time.perf_counter() - started
+        estimate = legacy * args.users / len(sample)
+        print(f"Bucle anterior:      {legacy:8.2f}s  para {len(sample)} usuarios "
+              f"(~{estimate:.0f}s estimados para {args.users}, x{estimate / elapsed:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: exportacion de tareas con pandas en memoria vs streaming por lotes
+
+Siembra un usuario con muchas tareas y ejecuta cada modo en un proceso
+aparte (para medir su pico de memoria sin ruido de los demas):
+- antes: Task.query.all() + to_dict + pandas.ExcelWriter sobre un BytesIO
+- csv: POST /api/reports/csv?format=csv (generador por lotes)
+- xlsx: POST /api/reports/csv?format=xlsx (openpyxl write_only a archivo temporal)
+Reporta el incremento del pico de RSS, el tiempo hasta el primer byte y el
+tiempo total de la descarga.
+
+Uso: python benchmarks/bench_export.py [--tasks 100000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import create_bench_app, create_user, print_header
+from app import db
+from app.models.task import Task
+
+MODES = ('antes', 'csv', 'xlsx')
+
+
+def seed(app, user_id, count):
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': user_id, 'title': f"Tarea {i}", 'body': "Descripcion de la tarea " * 4,
+            'priority': ('low', 'medium', 'high')[i % 3], 'status': 'completed' if i % 2 else 'pending',
+            'due_date': now + timedelta(hours=i % 500), 'created_at': now - timedelta(minutes=i),
+            'completed_at': now if i % 2 else None
+        }
+        for i in range(count)
+    ]
+    with app.app_context():
+        for start in range(0, count, 10000):
+            db.session.execute(Task.__table__.insert(), rows[start:start + 10000])
+        db.session.commit()
+
+
+def legacy_export(user_id):
+    """Implementacion anterior de la exportacion (todo en memoria)"""
+    import pandas as pd
+    from io import BytesIO
+
+    tasks_data = [t.to_dict() for t in Task.query.filter_by(user_id=user_id).all()]
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        pd.DataFrame(tasks_data).to_excel(writer, sheet_name='Tareas', index=False)
+    buffer.seek(0)
+    return buffer
+
+
+def run_child(mode, user_id):
+    """Ejecuta un modo y escribe en stdout un JSON con las mediciones"""
+    from flask_jwt_extended import create_access_token
+    from app.create_app import create_app
+
+    app = create_app("development")
+    app.config.update(DEBUG=False)
+    client = app.test_client()
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Calentar imports y la conexion antes de tomar la linea base de memoria
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+    client.get("/api/reports/dashboard", headers=headers)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    size = 0
+    start = time.perf_counter()
+    if mode == 'antes':
+        with app.app_context():
+            buffer = legacy_export(user_id)
+            first_byte = time.perf_counter()
+            size = len(buffer.getvalue())
+    else:
+        response = client.post(f"/api/reports/csv?format={mode}", headers=headers, json={}, buffered=False)
+        first_byte = None
+        for chunk in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(chunk)
+        response.close()
+    total = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'rss_mb': (peak_kb - baseline_kb) / 1024,
+        'ttfb_ms': (first_byte - start) * 1000,
+        'total_s': total,
+        'size_mb': size / 1024 / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--child", choices=MODES)
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.user_id)
+        return
+
+    app = create_bench_app()
+    user_id, _ = create_user(app, "export@synaptech.com")
+    seed(app, user_id, args.tasks)
+
+    print_header("BENCHMARK: EXPORTACION EN MEMORIA VS STREAMING POR LOTES")
+    print(f"{args.tasks} tareas | lote {app.config['EXPORT_BATCH_SIZE']}")
+    print()
+    print(f"{'modo':<16} {'pico RSS (MB)':>14} {'1er byte (ms)':>14} {'total (s)':>10} {'tamaño (MB)':>12}")
+
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--user-id", str(user_id)],
+            capture_output=True, text=True, check=True, env=os.environ.copy()
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        label = {'antes': 'antes (pandas)', 'csv': 'csv stream', 'xlsx': 'xlsx write_only'}[mode]
+        print(f"{label:<16} {result['rss_mb']:>14.1f} {result['ttfb_ms']:>14.1f} "
+              f"{result['total_s']:>10.2f} {result['size_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: totales de metricas sumando filas diarias en Python vs acumulados
+
+Siembra usuarios con varios años de metricas (via record_events, como en
+produccion) y compara para rangos de 30, 365 y 1095 dias:
+- antes: cargar las filas diarias del rango y sumarlas con generadores
+- despues: metric_totals (meses y semanas completos de productivity_rollups
+  mas los dias sueltos de los bordes, sumados en SQL)
+
+Uso: python benchmarks/bench_metrics.py [--users 50] [--years 3] [--rounds 20]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from common import create_bench_app, create_user, print_header
+from app import db
+from app.models.sync import ProductivityMetric
+from app.services.productivity_metrics import METRIC_FIELDS, metric_totals, record_events
+
+
+def legacy_totals(user_id, start, end):
+    """Implementacion anterior de GET /api/reports/metrics"""
+    metrics = ProductivityMetric.query.filter(
+        ProductivityMetric.user_id == user_id,
+        ProductivityMetric.date >= start,
+        ProductivityMetric.date <= end
+    ).all()
+    return {
+        'tasks_completed': sum(m.tasks_completed for m in metrics),
+        'tasks_created': sum(m.tasks_created for m in metrics),
+        'routines_followed': sum(m.routines_followed for m in metrics),
+        'reminders_acknowledged': sum(m.reminders_acknowledged for m in metrics),
+        'total_focus_time': sum(m.total_focus_time for m in metrics)
+    }
+
+
+def measure(app, func, user_ids, start, end, rounds):
+    with app.app_context():
+        results = {}
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            for user_id in user_ids:
+                results[user_id] = func(user_id, start, end)
+                db.session.remove()
+        elapsed = time.perf_counter() - begin
+    return elapsed / (rounds * len(user_ids)) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    user_ids = [create_user(app, f"metricas{i}@synaptech.com")[0] for i in range(args.users)]
+    today = date.today()
+    rng = random.Random(3)
+
+    seed_start = time.perf_counter()
+    with app.app_context():
+        for user_id in user_ids:
+            record_events(
+                (user_id, today - timedelta(days=d), field, rng.randint(0, 5))
+                for d in range(args.years * 365) for field in METRIC_FIELDS
+            )
+        db.session.commit()
+    seeded = time.perf_counter() - seed_start
+
+    print_header("BENCHMARK: TOTALES DE METRICAS FILAS DIARIAS VS ACUMULADOS")
+    print(f"{args.users} usuarios x {args.years * 365} dias (sembrado en {seeded:.1f}s) | {args.rounds} rondas")
+    print()
+    print(f"{'rango (dias)':>13} {'antes (ms)':>11} {'despues (ms)':>13} {'speedup':>8}  iguales")
+
+    for days in (30, 365, args.years * 365 - 1):
+        start = today - timedelta(days=days)
+        legacy_ms, legacy = measure(app, legacy_totals, user_ids, start, today, args.rounds)
+        new_ms, new = measure(app, metric_totals, user_ids, start, today, args.rounds)
+        same = all(legacy[user_id] == new[user_id] for user_id in user_ids)
+        print(f"{days:>13} {legacy_ms:>11.2f} {new_ms:>13.2f} {legacy_ms / new_ms:>7.1f}x  {'si' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
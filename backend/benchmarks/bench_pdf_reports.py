@@ -0,0 +1,179 @@
+"""
+Benchmark: reporte PDF generado en el request vs en segundo plano con cache
+
+Siembra usuarios con tareas, rutinas sugeridas y metricas y mide:
+1. Tiempo de render por PDF: estilos creados en cada llamada (como antes)
+   vs estilos compartidos del proceso (pdf_styles).
+2. Clientes concurrentes pidiendo reportes:
+   - antes: el request construye el PDF (datos + render) antes de responder
+   - despues: POST /api/reports/pdf encola y responde; el cliente consulta
+     download_url hasta obtener el PDF. Primera ronda en frio (renderiza) y
+     rondas siguientes con los mismos datos (cache en disco).
+   Reporta throughput, latencia del POST y tiempo hasta tener el PDF.
+
+Uso: python benchmarks/bench_pdf_reports.py [--users 20] [--clients 8] [--rounds 3]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("REPORTS_DIR", tempfile.mkdtemp(prefix="synaptech_reports_bench_"))
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from common import create_bench_app, print_header
+from app import db, services
+from app.models.routine import RoutineSuggestion
+from app.models.sync import ProductivityMetric
+from app.models.task import Task
+from app.services import pdf_reports
+from app.services.report_service import pdf_styles
+
+
+def seed(app, users):
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.execute(
+            text("INSERT INTO users (email, password_hash, full_name, role, is_active) "
+                 "VALUES (:email, 'x', :name, 'user', 1)"),
+            [{"email": f"pdf{i}@synaptech.com", "name": f"Usuario {i}"} for i in range(users)]
+        )
+        user_ids = [row[0] for row in db.session.execute(text("SELECT id FROM users")).all()]
+        db.session.execute(Task.__table__.insert(), [
+            {'user_id': user_id, 'title': f"Tarea {j}", 'priority': 'medium',
+             'status': 'pending' if j % 2 else 'completed', 'created_at': now - timedelta(hours=j)}
+            for user_id in user_ids for j in range(40)
+        ])
+        db.session.execute(ProductivityMetric.__table__.insert(), [
+            {'user_id': user_id, 'date': date.today() - timedelta(days=d), 'tasks_completed': d % 4}
+            for user_id in user_ids for d in range(30)
+        ])
+        db.session.execute(RoutineSuggestion.__table__.insert(), [
+            {'user_id': user_id, 'task_id': task_id, 'fingerprint': 'x', 'generation': 1,
+             'cuerpo': "Dividir la tarea en bloques de 25 minutos con pausas cortas"}
+            for task_id, user_id in db.session.execute(text("SELECT id, user_id FROM tasks WHERE status = 'pending'"))
+        ])
+        db.session.commit()
+        tokens = {user_id: create_access_token(identity=str(user_id)) for user_id in user_ids}
+    return user_ids, tokens
+
+
+def render_once(start, end, user_id, shared_styles):
+    if not shared_styles:
+        pdf_styles.cache_clear()
+    data = pdf_reports._report_data(user_id, start, end)
+    begin = time.perf_counter()
+    services.get('report').generate_pdf_report(*data)
+    return (time.perf_counter() - begin) * 1000
+
+
+def measure_render(app, user_ids, start, end):
+    results = {}
+    with app.app_context():
+        for shared in (False, True):
+            render_once(start, end, user_ids[0], shared)  # calentar imports
+            results[shared] = statistics.mean(render_once(start, end, user_id, shared) for user_id in user_ids)
+    return results
+
+
+def legacy_request(app, user_id, start, end):
+    """Implementacion anterior: datos + render completo dentro del request"""
+    begin = time.perf_counter()
+    with app.app_context():
+        try:
+            pdf_styles.cache_clear()
+            buffer = services.get('report').generate_pdf_report(*pdf_reports._report_data(user_id, start, end))
+            assert buffer.getvalue().startswith(b'%PDF')
+        finally:
+            db.session.remove()
+    elapsed = (time.perf_counter() - begin) * 1000
+    return elapsed, elapsed
+
+
+def async_request(client, token):
+    """(ms del POST, ms hasta tener el PDF descargado)"""
+    headers = {"Authorization": f"Bearer {token}"}
+    begin = time.perf_counter()
+    response = client.post("/api/reports/pdf", headers=headers, json={})
+    post_ms = (time.perf_counter() - begin) * 1000
+    url = response.get_json()["download_url"]
+    while True:
+        download = client.get(url, headers=headers)
+        if download.status_code == 200:
+            assert download.data.startswith(b'%PDF')
+            break
+        assert download.status_code == 202, download.get_json()
+        time.sleep(0.005)
+    return post_ms, (time.perf_counter() - begin) * 1000
+
+
+def run_round(clients, calls):
+    """Ejecuta las llamadas con N hilos: (req/s, latencias POST, latencias hasta el PDF)"""
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(lambda call: call(), calls))
+    elapsed = time.perf_counter() - begin
+    return len(calls) / elapsed, [r[0] for r in results], [r[1] for r in results]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    user_ids, tokens = seed(app, args.users)
+    end = datetime.now().date()
+    start = end - timedelta(days=30)
+
+    print_header("BENCHMARK: PDF EN EL REQUEST VS EN SEGUNDO PLANO CON CACHE")
+    print(f"{args.users} usuarios | {args.clients} clientes concurrentes | {args.rounds} rondas")
+    print()
+
+    render = measure_render(app, user_ids, start, end)
+    print("Render por PDF (ms)")
+    print(f"  estilos por llamada: {render[False]:.2f}")
+    print(f"  estilos compartidos: {render[True]:.2f}")
+    print()
+
+    client = app.test_client()
+    local = threading.local()
+
+    def client_for_thread():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client
+
+    scenarios = [("antes (en el request)", [
+        lambda user_id=user_id: legacy_request(app, user_id, start, end) for user_id in user_ids
+    ])]
+    for round_number in range(args.rounds):
+        label = "despues (frio)" if round_number == 0 else f"despues (cache {round_number})"
+        scenarios.append((label, [
+            lambda user_id=user_id: async_request(client_for_thread(), tokens[user_id]) for user_id in user_ids
+        ]))
+
+    print(f"{'escenario':<24} {'req/s':>8} {'POST p50':>9} {'POST p99':>9} {'PDF p50':>8} {'PDF p99':>8}")
+    for label, calls in scenarios:
+        throughput, post_ms, total_ms = run_round(args.clients, calls)
+        print(f"{label:<24} {throughput:>8.1f} {percentile(post_ms, 50):>9.1f} {percentile(post_ms, 99):>9.1f} "
+              f"{percentile(total_ms, 50):>8.1f} {percentile(total_ms, 99):>8.1f}")
+
+    print(f"\npdf_reports: {client.get('/metrics').get_json()['pdf_reports']}")
+
+
+if __name__ == "__main__":
+    main()
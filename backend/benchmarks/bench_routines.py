@@ -0,0 +1,72 @@
+"""
+Benchmark: generacion de rutinas en un solo prompt vs por bloques en paralelo
+
+El modelo se sustituye por StubProvider, cuya latencia crece con el numero de
+tareas del prompt (base + costo por tarea), como ocurre con la salida de un
+LLM. Se mide la latencia de extremo a extremo segun el numero de tareas.
+
+Uso: python benchmarks/bench_routines.py [--base 0.5] [--per-task 0.02] [--chunk-size 25] [--concurrency 4]
+"""
+import argparse
+import time
+
+from common import print_header
+from app.services.gemini_service import GeminiService
+from app.services.llm_providers import StubProvider
+
+
+def make_tasks(count):
+    priorities = ['urgent', 'high', 'medium', 'low']
+    return [
+        {
+            'id': i + 1,
+            'title': f"Tarea {i + 1}",
+            'body': f"Descripcion de la tarea {i + 1}",
+            'priority': priorities[i % 4],
+            'due_date': f"2025-11-{(i % 28) + 1:02d}T10:00:00",
+            'status': 'pending'
+        }
+        for i in range(count)
+    ]
+
+
+def measure(service, tasks):
+    start = time.perf_counter()
+    result = service.generate_routine_suggestions(tasks)
+    elapsed = time.perf_counter() - start
+    assert len(result) == len(tasks), "El merge perdio tareas"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", type=float, default=0.5)
+    parser.add_argument("--per-task", type=float, default=0.02)
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--counts", default="10,50,100,200,400")
+    args = parser.parse_args()
+
+    service = GeminiService()
+    service.provider = StubProvider(latency=args.base, per_item_latency=args.per_task)
+
+    print_header("BENCHMARK: RUTINAS UN PROMPT VS BLOQUES PARALELOS")
+    print(f"Stub: {args.base}s + {args.per_task}s/tarea | bloque={args.chunk_size} concurrencia={args.concurrency}")
+    print()
+    print(f"{'tareas':>8} {'un prompt (s)':>15} {'bloques (s)':>13} {'speedup':>9}")
+
+    for count in [int(c) for c in args.counts.split(",")]:
+        tasks = make_tasks(count)
+
+        service.routine_chunk_size = count
+        single = measure(service, tasks)
+
+        service.routine_chunk_size = args.chunk_size
+        service.routine_max_concurrency = args.concurrency
+        chunked = measure(service, tasks)
+
+        print(f"{count:>8} {single:>15.2f} {chunked:>13.2f} {single / chunked:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
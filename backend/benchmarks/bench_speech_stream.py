@@ -0,0 +1,73 @@
+"""
+Benchmark: memoria pico y tiempo de la transcripcion por ventanas
+
+Genera WAVs sinteticos (tono con pausas) de distinta duracion en disco y
+los transcribe con el reconocedor stub. La memoria pico (tracemalloc) debe
+mantenerse casi constante aunque el archivo crezca.
+
+Uso: python benchmarks/bench_speech_stream.py [--minutes 1,5,20] [--latency 0.05]
+"""
+import argparse
+import math
+import os
+import struct
+import tempfile
+import time
+import tracemalloc
+import wave
+
+from common import print_header
+from app.services.speech_service import SpeechService, StubSpeechRecognizer
+
+SAMPLE_RATE = 16000
+
+
+def write_wav(path, seconds):
+    """Tono de 440Hz con 0.5s de silencio cada 4s, escrito por segundos"""
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        for second in range(int(seconds)):
+            silent_from = SAMPLE_RATE // 2 if second % 4 == 3 else SAMPLE_RATE
+            frames = b"".join(
+                struct.pack('<h', int(8000 * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)) if i < silent_from else 0)
+                for i in range(SAMPLE_RATE)
+            )
+            wav.writeframes(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", default="1,5,20")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    recognizer = StubSpeechRecognizer(latency=args.latency)
+    service = SpeechService(recognizer=recognizer)
+
+    print_header("BENCHMARK: TRANSCRIPCION POR VENTANAS")
+    print(f"Ventana: {service.window_seconds}s | En vuelo: {service.max_in_flight} | Latencia stub: {args.latency}s")
+    print()
+    print(f"{'minutos':>8} {'archivo (MB)':>13} {'pico (MB)':>10} {'ventanas':>9} {'tiempo (s)':>11}")
+
+    workdir = tempfile.mkdtemp(prefix="synaptech_speech_")
+    for minutes in [float(m) for m in args.minutes.split(",")]:
+        path = os.path.join(workdir, f"audio_{minutes}.wav")
+        write_wav(path, minutes * 60)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        recognizer.calls = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        service.transcribe_audio_file(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        os.unlink(path)
+
+        print(f"{minutes:>8.0f} {size_mb:>13.1f} {peak / 1024 / 1024:>10.1f} {recognizer.calls:>9} {elapsed:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
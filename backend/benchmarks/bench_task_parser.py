@@ -0,0 +1,102 @@
+"""
+Benchmark: parser local de tareas vs Gemini sobre un corpus etiquetado
+
+Para cada texto del corpus (benchmarks/data/task_corpus.json) se ejecuta el
+parser por reglas y se cuenta:
+- hit rate: textos que resuelve localmente (confianza >= minimo)
+- accuracy: de esos, cuantos coinciden con la referencia en prioridad y
+  fecha de vencimiento (y hora, si la referencia la tiene)
+- latencia ahorrada: llamadas al modelo evitadas x latencia del modelo
+
+La referencia son las etiquetas del corpus; con --live se usa la respuesta
+real de Gemini (requiere GEMINI_API_KEY) y se mide su latencia.
+
+Uso: python benchmarks/bench_task_parser.py [--min-confidence 0.8] [--model-latency 1.5] [--live] [-v]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from common import print_header
+from app.services.task_parser import parse_task
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "task_corpus.json")
+
+
+def load_corpus():
+    with open(CORPUS, encoding="utf-8") as corpus_file:
+        corpus = json.load(corpus_file)
+    return datetime.fromisoformat(corpus["now"]), corpus["items"]
+
+
+def matches(result, reference):
+    """Misma prioridad y mismo dia de vencimiento (y hora si la referencia la trae)"""
+    if result["priority"] != reference["priority"]:
+        return False
+    due = reference["due"]
+    return result["due_date"][:len(due)] == due
+
+
+def live_references(items):
+    """Respuestas reales del modelo como referencia (y su latencia media)"""
+    from app.services.gemini_service import GeminiService
+
+    service = GeminiService()
+    if not service.provider:
+        raise SystemExit("--live requiere GEMINI_API_KEY")
+    service.local_parser_enabled = False
+
+    references, elapsed = [], 0.0
+    for item in items:
+        started = time.perf_counter()
+        result = service.process_task_input(body_text=item["text"])
+        elapsed += time.perf_counter() - started
+        references.append({"priority": result["priority"], "due": result["due_date"][:10]})
+    return references, elapsed / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument("--model-latency", type=float, default=1.5, help="Segundos por llamada a Gemini")
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    now, items = load_corpus()
+    references = items
+    model_latency = args.model_latency
+    if args.live:
+        # En vivo las fechas relativas se resuelven respecto a hoy
+        now = datetime.now()
+        references, model_latency = live_references(items)
+
+    hits = correct = 0
+    local_time = 0.0
+    for item, reference in zip(items, references):
+        started = time.perf_counter()
+        result, confidence = parse_task(item["text"], now=now)
+        local_time += time.perf_counter() - started
+
+        is_hit = result is not None and confidence >= args.min_confidence
+        ok = is_hit and matches(result, reference)
+        hits += is_hit
+        correct += ok
+        if args.verbose:
+            status = ("OK " if ok else "MAL") if is_hit else "IA "
+            print(f"{status} {confidence:.2f} {item['text'][:50]:50} -> "
+                  f"{result['priority'] if result else '-':7} {result['due_date'] if result else '-'}")
+
+    total = len(items)
+    print_header(f"Parser local: {total} textos, confianza minima {args.min_confidence}")
+    print(f"Resueltos localmente:   {hits}/{total} ({100 * hits / total:.0f}%)")
+    print(f"Accuracy (locales):     {correct}/{hits} ({100 * correct / max(hits, 1):.0f}%)")
+    print(f"Tiempo del parser:      {1e6 * local_time / total:.0f} µs por texto")
+    print(f"Latencia ahorrada:      {hits * model_latency:.1f}s en el corpus "
+          f"({model_latency:.2f}s por llamada evitada)")
+
+
+if __name__ == "__main__":
+    main()
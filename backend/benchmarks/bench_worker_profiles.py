@@ -0,0 +1,176 @@
+"""
+Prueba de carga: perfiles de Gunicorn sync vs gthread vs gevent con el LLM stub
+
+Levanta Gunicorn con cada perfil (GUNICORN_WORKER_CLASS) sobre la misma base
+y el proveedor stub con latencia fija, y lanza N clientes concurrentes contra
+POST /api/tasks y GET /api/routines durante un tiempo fijo. Reporta req/s,
+p50 y p99 por ruta y si el perfil cumple el objetivo de p99.
+
+Con --fail-on-miss sale con codigo 1 si algun perfil no cumple el objetivo
+(util para fijar el perfil de despliegue en CI).
+
+Uso: python benchmarks/bench_worker_profiles.py [--profiles sync,gthread,gevent]
+     [--concurrency 32] [--duration 15] [--llm-latency 0.3] [--p99-target-ms 2000]
+"""
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+from importlib.util import find_spec
+
+import requests
+
+from common import backend_path, create_bench_app, create_user, print_header
+
+ROUTES = ("POST /api/tasks", "GET /api/routines")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def start_server(profile, port, args):
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        "GUNICORN_WORKER_CLASS": profile,
+        "GUNICORN_WORKERS": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "GUNICORN_WORKER_CONNECTIONS": str(args.threads),
+        "LLM_PROVIDER": "stub",
+        "STUB_LLM_LATENCY": str(args.llm_latency),
+        # Sin parser local ni cache: cada request llega al stub
+        "LOCAL_TASK_PARSER_ENABLED": "false",
+        "GEMINI_CACHE_BACKEND": "none",
+        "ASYNC_TASK_PROCESSING": "false",
+    }
+    env.pop("WORKER_CONCURRENCY", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_config.py", "--access-logfile", "/dev/null", "wsgi:app"],
+        cwd=backend_path,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Gunicorn ({profile}) no arranco en el puerto {port}")
+
+
+def run_load(port, users, concurrency, duration, routines_every):
+    """Clientes en bucle hasta el final del tiempo -> {ruta: [latencias]}, errores, total"""
+    latencies = {route: [] for route in ROUTES}
+    errors = []
+    lock = threading.Lock()
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+    base_url = f"http://127.0.0.1:{port}"
+
+    def client(number):
+        session = requests.Session()
+        headers = users[number % len(users)]
+        while time.perf_counter() < deadline:
+            n = next(counter)
+            if n % routines_every == routines_every - 1:
+                route = ROUTES[1]
+                call = lambda: session.get(f"{base_url}/api/routines", headers=headers, timeout=120)
+            else:
+                route = ROUTES[0]
+                call = lambda: session.post(
+                    f"{base_url}/api/tasks",
+                    json={"cuerpo": f"Revisar el informe numero {n} del proyecto"},
+                    headers=headers,
+                    timeout=120
+                )
+            start = time.perf_counter()
+            try:
+                status = call().status_code
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status in (200, 201, 304):
+                    latencies[route].append(elapsed)
+                else:
+                    errors.append(status)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default="sync,gthread,gevent")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16, help="Hilos (gthread) o greenlets (gevent) por worker")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes simultaneos")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--routines-every", type=int, default=5, help="1 de cada N requests es GET /api/routines")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--p99-target-ms", type=float, default=2000.0)
+    parser.add_argument("--port", type=int, default=5101)
+    parser.add_argument("--fail-on-miss", action="store_true")
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    users = [create_user(app, f"carga{i}@synaptech.com")[1] for i in range(args.users)]
+
+    print_header("CARGA: PERFILES DE GUNICORN CON LLM STUB")
+    print(f"{args.workers} workers | {args.threads} hilos/greenlets | {args.concurrency} clientes "
+          f"| {args.duration:.0f}s | stub {args.llm_latency}s | objetivo p99 {args.p99_target_ms:.0f} ms")
+    print()
+    print(f"{'perfil':<9} {'req/s':>7} {'errores':>8} "
+          + " ".join(f"{name + ' p50/p99 (ms)':>30}" for name in ROUTES) + f" {'objetivo':>9}")
+
+    missed = []
+    for offset, profile in enumerate(args.profiles.split(",")):
+        if profile == "gevent" and find_spec("gevent") is None:
+            print(f"{profile:<9} omitido (pip install gevent)")
+            continue
+
+        server = start_server(profile, args.port + offset, args)
+        try:
+            latencies, errors, elapsed = run_load(
+                args.port + offset, users, args.concurrency, args.duration, args.routines_every
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        completed = sum(len(values) for values in latencies.values())
+        p99_ms = {route: percentile(values, 0.99) * 1000 for route, values in latencies.items()}
+        meets = not errors and all(p99 <= args.p99_target_ms for p99 in p99_ms.values())
+        if not meets:
+            missed.append(profile)
+
+        columns = " ".join(
+            f"{percentile(latencies[route], 0.5) * 1000:>14.0f} / {p99_ms[route]:>13.0f}" for route in ROUTES
+        )
+        print(f"{profile:<9} {completed / elapsed:>7.1f} {len(errors):>8} {columns} {'OK' if meets else 'NO':>9}")
+
+    if args.fail_on_miss and missed:
+        print(f"\nNo cumplen el objetivo de p99: {', '.join(missed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Comprobacion de planes de consulta: las rutas calientes deben usar indices
+
+Siembra un dataset (muchos usuarios con tareas, medicamentos y metricas),
+llama a cada ruta con el test client capturando el SQL que emite y ejecuta
+EXPLAIN sobre cada SELECT que toca una tabla vigilada. Sale con codigo 1 si
+alguna de esas consultas recorre completa una tabla vigilada en lugar de
+buscar por indice.
+
+Es un script independiente: nada lo ejecuta automaticamente. Conviene
+correrlo a mano al cambiar consultas o indices (o sumarlo a un pipeline,
+que fallara por el codigo de salida).
+
+Funciona con SQLite (EXPLAIN QUERY PLAN) y con PostgreSQL (EXPLAIN FORMAT
+JSON) si DATABASE_URL apunta a una base de pruebas.
+
+Uso: python benchmarks/check_query_plans.py [--users 200] [--tasks-per-user 50]
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import event, text
+
+from common import create_bench_app, create_user, print_header
+from app import db
+from app.models.task import Task
+from app.models.medication import Medication
+from app.models.sync import ProductivityMetric
+
+WATCHED_TABLES = ('tasks', 'medications', 'productivity_metrics', 'reminder_logs',
+                  'routine_suggestions', 'device_syncs')
+
+# (descripcion, metodo, url)
+HOT_ROUTES = [
+    ("Listado de tareas", "GET", "/api/tasks"),
+    ("Listado de tareas pendientes", "GET", "/api/tasks?status=pending"),
+    ("Rutinas (tareas pendientes)", "GET", "/api/routines"),
+    ("Medicamentos activos", "GET", "/api/medications"),
+    ("Dashboard", "GET", "/api/reports/dashboard"),
+]
+
+
+def seed(app, users, tasks_per_user):
+    """Usuarios sinteticos con tareas, medicamentos y metricas de 30 dias"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(users):
+            db.session.execute(
+                text("INSERT INTO users (email, password_hash, full_name, role, is_active) "
+                     "VALUES (:email, 'x', 'Seed', 'user', :active)"),
+                {"email": f"seed{i}@synaptech.com", "active": True}
+            )
+        user_ids = [row[0] for row in db.session.execute(text("SELECT id FROM users")).all()]
+
+        task_rows, medication_rows, metric_rows = [], [], []
+        for user_id in user_ids:
+            for j in range(tasks_per_user):
+                status = rng.choice(['pending', 'completed', 'completed'])
+                created_at = now - timedelta(days=rng.randint(0, 365), minutes=j)
+                task_rows.append({
+                    'user_id': user_id, 'title': f"Tarea {j}", 'priority': 'medium',
+                    'status': status, 'created_at': created_at,
+                    'due_date': created_at + timedelta(days=rng.randint(0, 10)),
+                    'completed_at': created_at + timedelta(days=1) if status == 'completed' else None
+                })
+            for j in range(3):
+                medication_rows.append({
+                    'user_id': user_id, 'name': f"Medicamento {j}", 'schedules': ["08:00", "20:00"],
+                    'is_active': j != 2, 'created_at': now - timedelta(days=j)
+                })
+            for d in range(30):
+                metric_rows.append({
+                    'user_id': user_id, 'date': date.today() - timedelta(days=d),
+                    'tasks_completed': rng.randint(0, 5), 'tasks_created': rng.randint(0, 5)
+                })
+
+        db.session.execute(Task.__table__.insert(), task_rows)
+        db.session.execute(Medication.__table__.insert(), medication_rows)
+        db.session.execute(ProductivityMetric.__table__.insert(), metric_rows)
+        db.session.commit()
+
+        # Estadisticas actualizadas para que el planner elija como en produccion
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+
+def capture_statements(app, method, url, headers):
+    """Llama a la ruta y devuelve los (sql, params) SELECT que ejecuto"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = app.test_client().open(url, method=method, headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return response.status_code, captured
+
+
+def full_scans(app, statement, parameters):
+    """Tablas vigiladas que el plan recorre completas"""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                details = [row[-1] for row in plan]
+                return [
+                    table for table in WATCHED_TABLES
+                    if any(detail.startswith(f"SCAN {table}") for detail in details)
+                ], details
+
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            plan = plan if isinstance(plan, list) else json.loads(plan)
+            nodes = []
+
+            def walk(node):
+                nodes.append(node)
+                for child in node.get("Plans", []):
+                    walk(child)
+
+            walk(plan[0]["Plan"])
+            details = [f"{node['Node Type']} {node.get('Relation Name', '')}".strip() for node in nodes]
+            return [
+                node["Relation Name"] for node in nodes
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES
+            ], details
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    _, headers = create_user(app)
+    seed(app, args.users, args.tasks_per_user)
+
+    print_header("REGRESION DE PLANES DE CONSULTA")
+    failures = 0
+    for description, method, url in HOT_ROUTES:
+        status, statements = capture_statements(app, method, url, headers)
+        for statement, parameters in statements:
+            if not any(table in statement for table in WATCHED_TABLES):
+                continue
+            scans, details = full_scans(app, statement, parameters)
+            ok = not scans and status < 500
+            failures += 0 if ok else 1
+            print(f"[{'OK' if ok else 'FALLO'}] {description} ({method} {url} -> {status})")
+            for detail in details:
+                print(f"       {detail}")
+
+    print()
+    if failures:
+        print(f"❌ {failures} consultas sin indice")
+        sys.exit(1)
+    print("✅ Todas las consultas calientes usan indices")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Utilidades compartidas por los benchmarks: app Flask sobre una base SQLite temporal"""
+import os
+import sys
+import tempfile
+
+# Agregar el path del backend al PYTHONPATH
+backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_path)
+
+# La configuracion lee DATABASE_URL al importarse, asi que se fija antes
+_db_file = os.path.join(tempfile.mkdtemp(prefix="synaptech_bench_"), "bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+
+from flask_jwt_extended import create_access_token
+from app import db
+from app.create_app import create_app
+from app.models.user import User
+
+
+def create_bench_app(**config_overrides):
+    """Crea la app con una base de datos limpia"""
+    app = create_app("development")
+    app.config.update(DEBUG=False, **config_overrides)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def create_user(app, email="bench@synaptech.com"):
+    """Crea un usuario y devuelve (user_id, headers con JWT)"""
+    with app.app_context():
+        user = User(email=email, full_name="Usuario Benchmark")
+        user.set_password("Password123!")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        return user.id, {"Authorization": f"Bearer {token}"}
+
+
+def print_header(title):
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
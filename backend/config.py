@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -23,10 +24,103 @@ class Config:
     
     # API Keys
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
     SPEECH_API_KEY = os.getenv('SPEECH_API_KEY', '')
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET', '')
     
+    # Proveedor de LLM: gemini, stub (local, para pruebas de carga sin red) o none
+    LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini').lower()
+    # Stub: latencia base + por item generado (segundos), fraccion de fallos y semilla
+    STUB_LLM_LATENCY = float(os.getenv('STUB_LLM_LATENCY', '0.5'))
+    STUB_LLM_LATENCY_PER_ITEM = float(os.getenv('STUB_LLM_LATENCY_PER_ITEM', '0.0'))
+    STUB_LLM_FAILURE_RATE = float(os.getenv('STUB_LLM_FAILURE_RATE', '0.0'))
+    STUB_LLM_SEED = int(os.getenv('STUB_LLM_SEED', '0'))
+    
+    # Cache de respuestas de Gemini: 'memory' (por worker), 'database' (compartida) o 'none'
+    GEMINI_CACHE_BACKEND = os.getenv('GEMINI_CACHE_BACKEND', 'memory')
+    GEMINI_CACHE_MAXSIZE = int(os.getenv('GEMINI_CACHE_MAXSIZE', '1024'))
+    GEMINI_CACHE_TTL = int(os.getenv('GEMINI_CACHE_TTL', '3600'))  # segundos
+    
+    # Token para GET /metrics (Authorization: Bearer); sin token solo responde a localhost
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
+    # Rutinas: tareas por prompt y prompts simultaneos a Gemini
+    ROUTINE_CHUNK_SIZE = int(os.getenv('ROUTINE_CHUNK_SIZE', '25'))
+    ROUTINE_MAX_CONCURRENCY = int(os.getenv('ROUTINE_MAX_CONCURRENCY', '4'))
+    
+    # Extraccion local de tareas por reglas antes de llamar a Gemini: solo se
+    # usa si la confianza del parser alcanza el minimo (si no, decide el modelo)
+    LOCAL_TASK_PARSER_ENABLED = os.getenv('LOCAL_TASK_PARSER_ENABLED', 'true').lower() == 'true'
+    LOCAL_TASK_PARSER_MIN_CONFIDENCE = float(os.getenv('LOCAL_TASK_PARSER_MIN_CONFIDENCE', '0.8'))
+    
+    # Creacion de tareas por lotes: maximo por peticion, tareas por prompt y prompts simultaneos
+    TASK_BATCH_MAX_ITEMS = int(os.getenv('TASK_BATCH_MAX_ITEMS', '100'))
+    TASK_BATCH_CHUNK_SIZE = int(os.getenv('TASK_BATCH_CHUNK_SIZE', '20'))
+    TASK_BATCH_MAX_CONCURRENCY = int(os.getenv('TASK_BATCH_MAX_CONCURRENCY', '4'))
+    
+    # Transcripcion por ventanas (la API sincrona admite hasta ~60s por peticion)
+    SPEECH_STREAM_WINDOW_SECONDS = float(os.getenv('SPEECH_STREAM_WINDOW_SECONDS', '30'))
+    SPEECH_STREAM_MAX_IN_FLIGHT = int(os.getenv('SPEECH_STREAM_MAX_IN_FLIGHT', '4'))
+    
+    # Llamadas HTTP a Speech API: pool, timeouts (s), reintentos y circuit breaker
+    SPEECH_HTTP_POOL_SIZE = int(os.getenv('SPEECH_HTTP_POOL_SIZE', '10'))
+    SPEECH_CONNECT_TIMEOUT = float(os.getenv('SPEECH_CONNECT_TIMEOUT', '3.05'))
+    SPEECH_READ_TIMEOUT = float(os.getenv('SPEECH_READ_TIMEOUT', '30'))
+    SPEECH_MAX_RETRIES = int(os.getenv('SPEECH_MAX_RETRIES', '3'))
+    SPEECH_BACKOFF_BASE = float(os.getenv('SPEECH_BACKOFF_BASE', '0.5'))
+    SPEECH_BACKOFF_MAX = float(os.getenv('SPEECH_BACKOFF_MAX', '8'))
+    # Plazo total de una llamada con todos sus reintentos; menor que el timeout de Gunicorn (120s)
+    SPEECH_HTTP_DEADLINE = float(os.getenv('SPEECH_HTTP_DEADLINE', '60'))
+    SPEECH_BREAKER_THRESHOLD = int(os.getenv('SPEECH_BREAKER_THRESHOLD', '5'))
+    SPEECH_BREAKER_RESET_SECONDS = float(os.getenv('SPEECH_BREAKER_RESET_SECONDS', '30'))
+    
+    # Paginacion de GET /api/tasks
+    TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', '50'))
+    TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', '200'))
+    
+    # Procesamiento asincrono de tareas (responde 202 y procesa con IA en segundo plano)
+    ASYNC_TASK_PROCESSING = os.getenv('ASYNC_TASK_PROCESSING', 'false').lower() == 'true'
+    TASK_WORKER_THREADS = int(os.getenv('TASK_WORKER_THREADS', '4'))
+    
+    # Pool de conexiones por worker: una por request simultaneo (WORKER_CONCURRENCY,
+    # lo fija gunicorn_config.py segun el perfil) mas los hilos de trabajos en
+    # segundo plano, con tope DB_POOL_MAX_SIZE para no agotar max_connections
+    WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', min(WORKER_CONCURRENCY + TASK_WORKER_THREADS, DB_POOL_MAX_SIZE)))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '2'))
+    # Espera maxima por una conexion libre (s), reciclado antes de que el
+    # proveedor cierre las inactivas (s) y comprobacion al sacarla del pool
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # Tiempo maximo por sentencia en PostgreSQL (ms, 0 = sin limite)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+    # Detras de PgBouncer (modo transaccion): sin pool propio por worker
+    DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'false').lower() == 'true'
+    
+    # Dosis de medicamentos: dias que se materializan como tareas (1 = solo hoy)
+    # y medicamentos por lote en el job que recorre todos los activos
+    DOSE_HORIZON_DAYS = int(os.getenv('DOSE_HORIZON_DAYS', '1'))
+    DOSE_BATCH_SIZE = int(os.getenv('DOSE_BATCH_SIZE', '500'))
+    
+    # Filas por lote al exportar tareas a CSV/XLSX (memoria constante)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+    
+    # Reportes PDF en segundo plano: directorio de cache (compartido entre
+    # workers), segundos antes de reencolar uno pendiente y PDFs por usuario
+    REPORTS_DIR = os.getenv('REPORTS_DIR', os.path.join(tempfile.gettempdir(), 'synaptech_reports'))
+    REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '300'))
+    REPORTS_MAX_PER_USER = int(os.getenv('REPORTS_MAX_PER_USER', '10'))
+    
+    # Analitica de cohortes (GET /api/reports/analytics): usuarios y dias por consulta
+    ANALYTICS_MAX_USERS = int(os.getenv('ANALYTICS_MAX_USERS', '500'))
+    ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '366'))
+    
+    # Presupuesto del tiempo de importacion al arrancar un worker (flask import-profile)
+    IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '1500'))
+    
     # Configuracion CORS
     # Añade tu dominio de frontend en producción aquí
     cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000')
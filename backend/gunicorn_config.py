@@ -3,12 +3,38 @@ import os
 
 # Configuracion de Gunicorn para produccion
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+
+# Perfil de workers (GUNICORN_WORKER_CLASS):
+# - sync: un request por worker; una llamada a Gemini/Speech bloquea el worker entero
+# - gthread: GUNICORN_THREADS hilos por worker; mientras un hilo espera la
+#   respuesta HTTP de la IA los demas atienden otros requests
+# - gevent: GUNICORN_WORKER_CONNECTIONS greenlets por worker (pip install gevent);
+#   requests, psycopg2 (con psycogreen) y grpc ceden el worker mientras esperan
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+_io_workers = worker_class in ('gthread', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1 if _io_workers else multiprocessing.cpu_count() * 2 + 1))
+# Con threads > 1 Gunicorn cambia sync por gthread, asi que solo aplica a gthread
+threads = int(os.getenv('GUNICORN_THREADS', '8')) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
 timeout = 120  # Aumentado para operaciones de IA
 keepalive = 2
 
+# Requests simultaneos por worker: la app dimensiona con esto el pool de la BD
+# (una conexion por request en curso, ver DB_POOL_SIZE en config.py)
+if worker_class == 'gevent':
+    _concurrency = worker_connections
+elif worker_class == 'gthread':
+    _concurrency = threads
+else:
+    _concurrency = 1
+os.environ.setdefault('WORKER_CONCURRENCY', str(_concurrency))
+
+# Cargar la app en el proceso padre antes de bifurcar: los imports se hacen
+# una sola vez y los workers arrancan en copy-on-write. Desactivado por
+# defecto porque impide recargar el codigo con HUP sin reiniciar el master.
+# Con gevent no conviene: los imports quedarian antes del monkey-patching
+preload_app = os.getenv('GUNICORN_PRELOAD_APP', 'false').lower() == 'true'
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -27,3 +53,40 @@ proc_name = "synaptech_api"
 
 # Reload automatico en desarrollo (deshabilitado en produccion)
 reload = False
+
+
+
+def post_worker_init(worker):
+    """
+    Crea y calienta los servicios compartidos en cada worker antes de aceptar peticiones
+
+    Corre despues de cargar la app y, con gevent, despues del monkey-patching,
+    asi que los clientes HTTP y gRPC de la IA se crean ya cooperativos.
+    """
+    from wsgi import app
+    from app import db
+    from app.utils.db_pool import pool_stats
+
+    if worker_class == 'gevent':
+        _patch_blocking_drivers(worker)
+
+    with app.app_context():
+        # Con preload_app las conexiones abiertas por el padre no se comparten
+        db.engine.dispose(close=False)
+        pool_stats.reset()
+        app.extensions['services'].warm_up()
+    worker.log.info("Servicios listos en el worker %s", worker.pid)
+
+
+def _patch_blocking_drivers(worker):
+    """psycopg2 y grpc no ceden el control a gevent sin su parche propio"""
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        worker.log.warning("psycogreen no instalado: las consultas a PostgreSQL bloquean el worker gevent")
+    try:
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+    except ImportError:
+        pass
@@ -0,0 +1,32 @@
+"""Add ai_response_cache table (shared AI response cache)
+
+Revision ID: add_ai_response_cache_009
+Revises: add_task_processing_error_008
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ai_response_cache_009'
+down_revision = 'add_task_processing_error_008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ai_response_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('value', sa.JSON(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_ai_response_cache_expires_at', 'ai_response_cache', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ai_response_cache_expires_at', table_name='ai_response_cache')
+    op.drop_table('ai_response_cache')
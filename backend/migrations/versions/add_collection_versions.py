@@ -0,0 +1,30 @@
+"""Add collection_versions table for ETags on listings
+
+Revision ID: add_collection_versions_004
+Revises: add_hot_query_indexes_003
+Create Date: 2025-12-03 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_collection_versions_004'
+down_revision = 'add_hot_query_indexes_003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'collection_versions',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('collection', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'collection')
+    )
+
+
+def downgrade():
+    op.drop_table('collection_versions')
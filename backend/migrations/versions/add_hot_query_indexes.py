@@ -0,0 +1,62 @@
+"""Add indexes for per-user hot queries on tasks, medications and logs
+
+Revision ID: add_hot_query_indexes_003
+Revises: add_tasks_listing_index_002
+Create Date: 2025-12-02 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_query_indexes_003'
+down_revision = 'add_tasks_listing_index_002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tareas pendientes por usuario y vencimiento (rutinas, tareas de hoy)
+    op.create_index(
+        'ix_tasks_pending_user_due', 'tasks', ['user_id', 'due_date'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    # Tareas completadas por usuario y fecha de completado (metricas, dashboard)
+    op.create_index(
+        'ix_tasks_completed_user_completed_at', 'tasks', ['user_id', 'completed_at'],
+        postgresql_where=sa.text("status = 'completed'")
+    )
+    op.create_index(
+        'ix_medications_user_active_created', 'medications',
+        ['user_id', 'is_active', sa.text('created_at DESC')]
+    )
+    op.create_index(
+        'ix_device_syncs_user_created', 'device_syncs',
+        ['user_id', sa.text('created_at DESC')]
+    )
+    op.create_index(
+        'ix_reminder_logs_user_acknowledged_at', 'reminder_logs', ['user_id', 'acknowledged_at'],
+        postgresql_where=sa.text('was_acknowledged')
+    )
+    op.create_index('ix_reminder_logs_task_id', 'reminder_logs', ['task_id'])
+
+    # Antes de la restriccion unica, conservar solo la fila mas reciente por (user_id, date)
+    op.execute("""
+        DELETE FROM productivity_metrics
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM productivity_metrics GROUP BY user_id, date
+        )
+    """)
+    op.create_unique_constraint(
+        'uq_productivity_metrics_user_date', 'productivity_metrics', ['user_id', 'date']
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_productivity_metrics_user_date', 'productivity_metrics', type_='unique')
+    op.drop_index('ix_reminder_logs_task_id', table_name='reminder_logs')
+    op.drop_index('ix_reminder_logs_user_acknowledged_at', table_name='reminder_logs')
+    op.drop_index('ix_device_syncs_user_created', table_name='device_syncs')
+    op.drop_index('ix_medications_user_active_created', table_name='medications')
+    op.drop_index('ix_tasks_completed_user_completed_at', table_name='tasks')
+    op.drop_index('ix_tasks_pending_user_due', table_name='tasks')
@@ -0,0 +1,34 @@
+"""Add job_checkpoints table for resumable batch jobs
+
+Revision ID: add_job_checkpoints_006
+Revises: add_task_medication_link_005
+Create Date: 2025-12-05 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_checkpoints_006'
+down_revision = 'add_task_medication_link_005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('job_name', sa.String(length=100), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('created', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('job_name', 'run_date')
+    )
+
+
+def downgrade():
+    op.drop_table('job_checkpoints')
@@ -0,0 +1,37 @@
+"""Add productivity_rollups table (weekly/monthly sums of daily metrics)
+
+Los acumulados existentes se reconstruyen con `flask rebuild-metrics`.
+
+Revision ID: add_productivity_rollups_007
+Revises: add_job_checkpoints_006
+Create Date: 2025-12-08 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_productivity_rollups_007'
+down_revision = 'add_job_checkpoints_006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'productivity_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('tasks_completed', sa.Integer(), nullable=False),
+        sa.Column('tasks_created', sa.Integer(), nullable=False),
+        sa.Column('routines_followed', sa.Integer(), nullable=False),
+        sa.Column('reminders_acknowledged', sa.Integer(), nullable=False),
+        sa.Column('total_focus_time', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'period', 'period_start')
+    )
+
+
+def downgrade():
+    op.drop_table('productivity_rollups')
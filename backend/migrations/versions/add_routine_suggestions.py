@@ -0,0 +1,48 @@
+"""Add routine_suggestions and routine_states tables
+
+Revision ID: add_routine_suggestions_010
+Revises: add_ai_response_cache_009
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_routine_suggestions_010'
+down_revision = 'add_ai_response_cache_009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'routine_suggestions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('cuerpo', sa.Text(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('task_id')
+    )
+    op.create_index('ix_routine_suggestions_user_id', 'routine_suggestions', ['user_id'], unique=False)
+    op.create_table(
+        'routine_states',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('generated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('routine_states')
+    op.drop_index('ix_routine_suggestions_user_id', table_name='routine_suggestions')
+    op.drop_table('routine_suggestions')
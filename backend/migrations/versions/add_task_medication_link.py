@@ -0,0 +1,36 @@
+"""Link dose tasks to medications by (medication_id, scheduled_at)
+
+Revision ID: add_task_medication_link_005
+Revises: add_collection_versions_004
+Create Date: 2025-12-04 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_task_medication_link_005'
+down_revision = 'add_collection_versions_004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('medication_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('scheduled_at', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_tasks_medication_id', 'medications', ['medication_id'], ['id'],
+            ondelete='SET NULL'
+        )
+        batch_op.create_unique_constraint(
+            'uq_tasks_medication_scheduled', ['medication_id', 'scheduled_at']
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_tasks_medication_scheduled', type_='unique')
+        batch_op.drop_constraint('fk_tasks_medication_id', type_='foreignkey')
+        batch_op.drop_column('scheduled_at')
+        batch_op.drop_column('medication_id')
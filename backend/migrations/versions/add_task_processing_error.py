@@ -0,0 +1,25 @@
+"""Add tasks.processing_error for asynchronous AI processing
+
+Revision ID: add_task_processing_error_008
+Revises: add_productivity_rollups_007
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_task_processing_error_008'
+down_revision = 'add_productivity_rollups_007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('processing_error', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_column('processing_error')
@@ -0,0 +1,44 @@
+"""Cover the full keyset order (created_at, id) in task listing indexes
+
+Revision ID: add_tasks_keyset_indexes_011
+Revises: add_routine_suggestions_010
+Create Date: 2025-12-09 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_tasks_keyset_indexes_011'
+down_revision = 'add_routine_suggestions_010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Listado sin filtro de estado
+    op.create_index(
+        'ix_tasks_user_created',
+        'tasks',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+    # Con filtro de estado: se agrega id al final para ordenar sin sort extra
+    op.drop_index('ix_tasks_user_status_created', table_name='tasks')
+    op.create_index(
+        'ix_tasks_user_status_created',
+        'tasks',
+        ['user_id', 'status', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tasks_user_status_created', table_name='tasks')
+    op.create_index(
+        'ix_tasks_user_status_created',
+        'tasks',
+        ['user_id', 'status', sa.text('created_at DESC')],
+        unique=False
+    )
+    op.drop_index('ix_tasks_user_created', table_name='tasks')
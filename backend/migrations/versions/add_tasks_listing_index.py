@@ -0,0 +1,28 @@
+"""Add composite index for paginated task listing
+
+Revision ID: add_tasks_listing_index_002
+Revises: add_medications_001
+Create Date: 2025-12-01 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_tasks_listing_index_002'
+down_revision = 'add_medications_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_tasks_user_status_created',
+        'tasks',
+        ['user_id', 'status', sa.text('created_at DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tasks_user_status_created', table_name='tasks')
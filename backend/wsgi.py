@@ -1,4 +1,6 @@
 import os
+from datetime import date
+import click
 from app.create_app import create_app
 from app import db
 from flask_migrate import Migrate
@@ -22,5 +24,57 @@ def reset_db():
     db.create_all()
     print('Base de datos reseteada')
 
+@app.cli.command()
+@click.option('--date', 'run_date', default=None, help='Dia a precalcular (YYYY-MM-DD, por defecto mañana)')
+@click.option('--batch-size', type=int, default=None, help='Medicamentos por lote')
+@click.option('--restart', is_flag=True, help='Ignorar el checkpoint y recorrer todo de nuevo')
+def schedule_doses(run_date, batch_size, restart):
+    """Precalcular las dosis del dia para todos los medicamentos activos (job nocturno)"""
+    from app.services.dose_scheduler import run_daily_doses
+    
+    run_date = date.fromisoformat(run_date) if run_date else None
+    checkpoint = run_daily_doses(run_date, batch_size=batch_size, restart=restart)
+    print(f'Dosis del {checkpoint.run_date}: {checkpoint.processed} medicamentos, '
+          f'{checkpoint.created} tareas nuevas (completado {checkpoint.completed_at})')
+
+@app.cli.command()
+@click.option('--since', default=None, help='Primer dia a recalcular (YYYY-MM-DD, por defecto hace 90 dias)')
+@click.option('--until', default=None, help='Ultimo dia (YYYY-MM-DD, por defecto hoy)')
+@click.option('--user-id', type=int, default=None, help='Solo este usuario')
+def rebuild_metrics(since, until, user_id):
+    """Recalcular metricas diarias y acumulados semanales/mensuales desde tareas y recordatorios"""
+    from datetime import timedelta
+    from app.services.productivity_metrics import rebuild_metrics as rebuild
+    
+    until = date.fromisoformat(until) if until else date.today()
+    since = date.fromisoformat(since) if since else until - timedelta(days=90)
+    rows = rebuild(since, until, user_id=user_id)
+    db.session.commit()
+    print(f'Metricas del {since} al {until}: {rows} filas diarias recalculadas')
+
+@app.cli.command()
+@click.option('--budget-ms', type=float, default=None, help='Tiempo maximo de importacion (ms)')
+@click.option('--top', type=int, default=15, help='Modulos mas lentos a mostrar')
+def import_profile(budget_ms, top):
+    """Medir el tiempo de importacion del arranque; falla si supera el presupuesto"""
+    from app.utils.import_profile import profile_imports, summarize
+    
+    budget_ms = budget_ms or app.config['IMPORT_TIME_BUDGET_MS']
+    summary = summarize(profile_imports('wsgi', cwd=os.path.dirname(os.path.abspath(__file__))), top)
+    
+    print(f"{'acumulado (ms)':>15}  modulo")
+    for name, cumulative_ms in summary['slowest']:
+        print(f'{cumulative_ms:>15.1f}  {name}')
+    print(f"\nTotal: {summary['total_ms']:.1f} ms en {summary['modules']} modulos (presupuesto {budget_ms:.0f} ms)")
+    
+    errors = []
+    if summary['total_ms'] > budget_ms:
+        errors.append(f"la importacion tarda {summary['total_ms']:.1f} ms, mas que el presupuesto de {budget_ms:.0f} ms")
+    if summary['eager_heavy_modules']:
+        errors.append(f"se importan al arrancar: {', '.join(summary['eager_heavy_modules'])}")
+    if errors:
+        raise click.ClickException('; '.join(errors))
+    print('OK')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)